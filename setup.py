@@ -31,6 +31,15 @@ setup(
     install_requires=[
         "geotagx_validator>=0.1.2",
     ],
+    extras_require={
+        "asyncio": [
+            "trollius>=2.1; python_version < '3'",
+            "futures>=3.0; python_version < '3'",
+        ],
+        "binary": [
+            "msgpack>=0.6",
+        ],
+    },
     dependency_links=[
         "https://github.com/geotagx/geotagx-tool-validator/archive/v0.1.2.tar.gz#egg=geotagx_validator-0.1.2",
     ],
@@ -24,8 +24,10 @@
 # DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
 # OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
 # OR OTHER DEALINGS IN THE SOFTWARE.
-import argparse
-from geotagx_validator.helper import check_arg_type, print_exception
+#
+# Modules are only imported when they are needed so that the tool starts as
+# quickly as possible, in particular when it displays its help or version, or
+# when every project it is asked to format is already formatted.
 
 def main():
     """Executes the application.
@@ -37,34 +39,876 @@ def main():
 def run(arguments):
     """Executes the application with the specified command-line arguments.
 
+    Each project is formatted independently so that a project that cannot be
+    formatted does not prevent the remaining projects from being processed. If
+    more than one job is requested, the projects are distributed across a pool
+    of worker processes.
+
+    In check mode, projects are formatted in memory and compared to their files,
+    which are never written.
+
+    If the statistics are written to the standard output, every other message
+    is printed to the standard error instead.
+
     Args:
         arguments (argparse.Namespace): A set of command-line arguments.
 
     Returns:
-        int: 0 if validation was successful, 1 otherwise.
+        int: 0 if every project was successfully formatted, otherwise the number
+            of projects that could not be formatted, or in check mode, that could
+            not be formatted or are not formatted (capped at 255).
     """
-    from geotagx_validator.helper import sanitize_paths, deserialize_configuration_set
-    from core import format_configuration_set
-    from helper import serialize_configuration_set
+    from geotagx_validator.helper import sanitize_paths, print_exception
+    from helper import imap_parallel
+    import sys
 
     exit_code = 0
+    stdout = sys.stdout
+    statistics_file = None
     try:
         if not arguments.quiet:
             _setup_logging(arguments.verbose)
 
-        for path in sanitize_paths(arguments.paths):
-            configuration_set = deserialize_configuration_set(path)
-            serialize_configuration_set(
-                format_configuration_set(configuration_set),
-                path,
-                overwrite=True
-            )
-            print "The project located at '{}' was successfully formatted.".format(path)
+        _set_default_locations(arguments)
+
+        if arguments.check:
+            if arguments.daemon or arguments.watch or "-" in arguments.paths:
+                raise ValueError("The --check option cannot be combined with --daemon, --watch or the standard input.")
+            # A check does not modify anything, not even the cache.
+            arguments.cache_directory = None
+
+        _check_output_options(arguments)
+
+        if arguments.daemon:
+            return _serve(arguments)
+        elif not arguments.paths:
+            raise ValueError("No project paths were specified.")
+        elif "-" in arguments.paths:
+            if len(arguments.paths) > 1:
+                raise ValueError("The standard input cannot be formatted along with projects.")
+            exit_code = _format_stream(sys.stdin, sys.stdout, arguments)
+            return exit_code
+
+        paths = sanitize_paths(arguments.paths)
+        if arguments.watch:
+            return _watch(paths, arguments)
+
+        statistics_file = _open_statistics_file(arguments.statistics)
+        if statistics_file is stdout:
+            # The standard output only contains the statistics, so that they can be
+            # piped into another program, and every message goes to the standard error.
+            sys.stdout = sys.stderr
+
+        # Projects are formatted by the daemon if one is running, which spares
+        # this process from loading the formatter.
+        if _forwards_to_daemon(arguments):
+            results = _forward_projects(paths, arguments)
+        else:
+            results = imap_parallel(_format_project, [(p, arguments) for p in paths], arguments.jobs)
+
+        failures = []
+        unformatted = []
+        directories = set()
+        for result in results:
+            path, error = result["path"], result["error"]
+            if statistics_file:
+                _write_statistics(statistics_file, result)
+
+            if error is not None:
+                print "The project located at '{}' could not be formatted.".format(path)
+                print_exception(error, arguments.verbose)
+                failures.append(path)
+            elif result["differences"]:
+                print "The project located at '{}' is not formatted:".format(path)
+                for filename, summary in result["differences"]:
+                    print "  {}: {}".format(filename, summary) if summary else "  {}".format(filename)
+                unformatted.append(path)
+            elif result["cached"]:
+                print "The project located at '{}' is already formatted.".format(path)
+            elif result["written"] == 0:
+                print "The project located at '{}' is already formatted.".format(path)
+            else:
+                print "The project located at '{}' was successfully formatted ({} file(s) written).".format(path, result["written"])
+                directories.add(path)
+
+            # The remaining projects are not formatted once the outcome of the check is known.
+            if arguments.check and arguments.fail_fast and (failures or unformatted):
+                results.close()
+                break
+
+        # The files' data is flushed to disk as they are written, but not the
+        # directory entries that replace the previous files. Each directory that
+        # was written to is flushed once, and only after the last project has
+        # been written, since a project's files are all in its directory.
+        if directories:
+            from helper import sync_directories
+            sync_directories(directories)
+
+        if failures and len(paths) > 1:
+            print "{} of {} projects could not be formatted:".format(len(failures), len(paths))
+            for path in failures:
+                print "  {}".format(path)
+
+        if unformatted and len(paths) > 1:
+            print "{} of {} projects are not formatted:".format(len(unformatted), len(paths))
+            for path in unformatted:
+                print "  {}".format(path)
+
+        if arguments.cache_directory:
+            from cache import evict
+            evict(arguments.cache_directory, arguments.cache_size)
+
+        exit_code = len(failures) + len(unformatted)
     except Exception as e:
         print_exception(e, arguments.verbose)
         exit_code = 1
     finally:
-        return exit_code
+        sys.stdout = stdout
+        if statistics_file and statistics_file is not stdout:
+            statistics_file.close()
+
+        # An exit status is stored in a single byte so the number of failures is
+        # clamped to prevent it from wrapping around to a successful status.
+        return min(exit_code, 255)
+
+
+def _format_project(job):
+    """Formats the project located at the specified path.
+
+    This function is executed by the worker processes which is why it never
+    raises: any error is returned to the caller instead.
+
+    Args:
+        job (tuple): A (path, arguments) pair where path is the project's directory
+            and arguments is the set of command-line arguments.
+
+    Returns:
+        dict: The project's path, the exception that prevented it from being formatted
+            (None if it was successfully formatted), whether the project was skipped
+            because it was found in the cache, the number of files written, in check
+            mode, the files that are not formatted and, if requested, the time spent
+            in each stage and the number of nodes processed.
+    """
+    from instrumentation import set_recorder, stage
+
+    path, arguments = job
+    result = {
+        "path": path,
+        "error": None,
+        "cached": False,
+        "written": 0,
+        "differences": [],
+        "statistics": None,
+    }
+
+    recorder = None
+    if arguments.statistics:
+        from instrumentation import Recorder
+        from helper import get_cache_statistics
+        recorder = Recorder()
+        cache_statistics = get_cache_statistics()
+
+    previous_recorder = set_recorder(recorder)
+    try:
+        cache_directory = arguments.cache_directory
+        if cache_directory:
+            from cache import get_cache_key, is_cached, add_to_cache
+            with stage("cache"):
+                cached = is_cached(get_cache_key(path, _get_cache_salt(arguments)), cache_directory) and _copies_exist(path, arguments)
+            if cached:
+                result["cached"] = True
+                return result
+
+        # The formatter is only loaded once it is certain the project needs to be formatted.
+        from geotagx_validator.helper import deserialize_configuration_set
+        from core import format_configuration_set
+        from helper import serialize_configuration_set
+        from instrumentation import count_nodes
+
+        with stage("deserialize"):
+            if arguments.stream_tutorial:
+                configuration_set = _deserialize_configurations(path, ("project", "task_presenter"))
+            else:
+                configuration_set = deserialize_configuration_set(path)
+
+        configuration_set = format_configuration_set(
+            configuration_set,
+            tutorial_processes=arguments.tutorial_jobs,
+            tutorial_chunk_size=arguments.tutorial_chunk_size
+        )
+        count_nodes(configuration_set)
+
+        if arguments.check:
+            with stage("compare"):
+                result["differences"] = _compare_configuration_set(configuration_set, path, arguments)
+        else:
+            with stage("serialize"):
+                result["written"] = serialize_configuration_set(
+                    configuration_set,
+                    path,
+                    overwrite=True,
+                    validate_configuration_set=False,
+                    sync=False,
+                    compress=arguments.compact,
+                    gzip=arguments.gzip,
+                    binary=arguments.binary
+                )
+
+        if arguments.stream_tutorial and not (arguments.check and arguments.fail_fast and result["differences"]):
+            # The tutorial is formatted as it is written, and the time spent
+            # formatting it is measured apart, in the format.tutorial stage.
+            with stage("compare" if arguments.check else "serialize"):
+                filenames = _stream_tutorial(path, configuration_set, arguments)
+            if not arguments.check:
+                result["written"] += len(filenames)
+            else:
+                result["differences"].extend((f, "differs" if arguments.diff else None) for f in filenames)
+
+        if cache_directory:
+            # The project has been formatted, so failing to remember it only
+            # means it will be formatted again next time.
+            try:
+                with stage("cache"):
+                    add_to_cache(get_cache_key(path, _get_cache_salt(arguments)), cache_directory)
+            except (IOError, OSError) as e:
+                import logging
+                logging.warning("The project located at '{}' could not be added to the cache. {}".format(path, e))
+
+        _log_cache_statistics()
+    except Exception as e:
+        from helper import _picklable_exception
+        result["error"] = _picklable_exception(e)
+    finally:
+        set_recorder(previous_recorder)
+        if recorder is not None:
+            for name, statistics in get_cache_statistics().iteritems():
+                for key in ("hits", "misses"):
+                    recorder.count("{}_cache_{}".format(name, key), statistics[key] - cache_statistics[name][key])
+            result["statistics"] = recorder.to_dict()
+
+    return result
+
+
+def _compare_configuration_set(configuration_set, path, arguments):
+    """Compares the specified formatted configurations to the files of the project
+    located at the given path.
+
+    Args:
+        configuration_set (dict): The project's formatted set of configurations.
+        path (basestring): A path to the project directory.
+        arguments (argparse.Namespace): The set of command-line arguments.
+
+    Returns:
+        list: A (filename, summary) pair for each configuration file that is not
+            formatted, where summary describes how the file differs from its
+            formatted configuration if --diff was specified, and is None otherwise.
+    """
+    from helper import get_configuration_filenames, iter_json_string, find_stale_files
+
+    filenames = get_configuration_filenames(path)
+    differences = []
+    for key in sorted(configuration_set):
+        filename, configuration = filenames[key], configuration_set[key]
+        data = iter_json_string(configuration, arguments.compact)
+        for stale_filename in find_stale_files(filename, data, configuration, arguments.gzip, arguments.binary):
+            if not arguments.diff:
+                summary = None
+            elif stale_filename == filename:
+                summary = _summarize_differences(filename, configuration)
+            else:
+                summary = "differs"
+            differences.append((stale_filename, summary))
+
+        if differences and arguments.check and arguments.fail_fast:
+            break
+
+    return differences
+
+
+def _summarize_differences(filename, configuration, limit=3):
+    """Describes how the specified file differs from the given formatted configuration.
+
+    Args:
+        filename (basestring): The name of the configuration file.
+        configuration (dict): The formatted configuration.
+        limit (int): The maximum number of differing values that are named.
+
+    Returns:
+        basestring: A one-line summary of the differences.
+    """
+    from helper import deserialize_configuration
+    from itertools import islice
+
+    try:
+        current_configuration = deserialize_configuration(filename)
+    except IOError:
+        return "missing"
+    except ValueError:
+        return "not a JSON object"
+
+    differences = list(islice(_iter_differences(current_configuration, configuration), limit + 1))
+    if not differences:
+        return "layout differs"
+    elif len(differences) > limit:
+        return "{} and more differ".format(", ".join(differences[:limit]))
+    else:
+        return "{} differ{}".format(", ".join(differences), "s" if len(differences) == 1 else "")
+
+
+def _iter_differences(current, expected):
+    """Returns the location of each value that differs between two JSON values.
+
+    Args:
+        current (object): The current value.
+        expected (object): The expected value.
+
+    Returns:
+        iterator: The JSON pointer, e.g. /questionnaire/questions/0/title, of each
+            value that was added, removed or changed.
+    """
+    missing = object()
+    stack = [("", current, expected)]
+    while stack:
+        pointer, current, expected = stack.pop()
+        if isinstance(current, dict) and isinstance(expected, dict):
+            for key in sorted(set(current) | set(expected), reverse=True):
+                child_pointer = u"{}/{}".format(pointer, key.replace(u"~", u"~0").replace(u"/", u"~1"))
+                stack.append((child_pointer, current.get(key, missing), expected.get(key, missing)))
+        elif isinstance(current, list) and isinstance(expected, list) and len(current) == len(expected):
+            for i in reversed(xrange(len(current))):
+                stack.append((u"{}/{}".format(pointer, i), current[i], expected[i]))
+        elif current != expected:
+            yield pointer or u"/"
+
+
+def _get_cache_salt(arguments):
+    """Returns the salt of the cache keys of the projects formatted with the
+    specified options, so that a project is formatted again when an option
+    that changes its files is changed.
+
+    Args:
+        arguments (argparse.Namespace): The set of command-line arguments.
+
+    Returns:
+        basestring: The salt.
+    """
+    return ",".join(name for name in ("compact", "gzip", "binary") if getattr(arguments, name))
+
+
+def _copies_exist(path, arguments):
+    """Checks whether the copies of the configuration files of the project located
+    at the given path, that the specified options write next to them, exist.
+
+    A project's cache key only depends on its configuration files, so a project
+    whose copies were removed since it was formatted must be formatted again.
+
+    Args:
+        path (basestring): A path to a project directory.
+        arguments (argparse.Namespace): The set of command-line arguments.
+
+    Returns:
+        bool: True if every copy exists, False otherwise.
+    """
+    from helper import get_configuration_filenames
+    import os
+
+    if not (arguments.gzip or arguments.binary):
+        return True
+
+    from binary import get_binary_filename
+
+    for filename in get_configuration_filenames(path).itervalues():
+        if not os.path.isfile(filename):
+            continue
+        elif arguments.gzip and not os.path.isfile(filename + ".gz"):
+            return False
+        elif arguments.binary and not os.path.isfile(get_binary_filename(filename)):
+            return False
+
+    return True
+
+
+def _serve(arguments):
+    """Runs the formatter as a daemon that formats projects and configuration sets
+    on behalf of its clients, until the process is interrupted or terminated.
+
+    The daemon formats projects with the options it was started with, except for
+    those its clients send along with their requests (see _handle_request.OPTIONS).
+
+    Args:
+        arguments (argparse.Namespace): The set of command-line arguments.
+
+    Returns:
+        int: 0 once the process is interrupted or terminated.
+    """
+    from server import serve, is_running
+    import multiprocessing
+
+    if is_running(arguments.socket):
+        raise ValueError("A daemon is already running on '{}'.".format(arguments.socket))
+
+    # The formatter and validator are loaded once and for all, and before any
+    # worker process is created, so that no request pays for them.
+    import geotagx_validator.core, core, project, task_presenter, question, tutorial
+
+    processes = arguments.jobs or multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(processes) if processes > 1 else None
+    if pool is None:
+        handler = lambda request: _handle_request((request, arguments))
+    else:
+        handler = lambda request: pool.apply(_handle_request, ((request, arguments),))
+
+    print "Listening on '{}'. Press Ctrl+C to stop.".format(arguments.socket)
+    try:
+        serve(arguments.socket, handler)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        if arguments.cache_directory:
+            from cache import evict
+            evict(arguments.cache_directory, arguments.cache_size)
+
+    return 0
+
+
+def _handle_request(job):
+    """Handles a request sent to the daemon.
+
+    A request either contains the "path" to a project directory, which is formatted
+    in place, or a "configuration_set" which is formatted and returned. A request
+    may also contain any of the options listed in _handle_request.OPTIONS, e.g.
+    "compact" or "cache_directory", which take precedence over the daemon's.
+
+    Args:
+        job (tuple): A (request, arguments) pair where request is the request to handle
+            and arguments is the daemon's set of command-line arguments.
+
+    Returns:
+        dict: The response to the request. If a project was formatted, the response
+            contains its path, whether it was skipped because it was found in the
+            cache, and the number of files written. If a configuration set was
+            formatted, the response contains the formatted configuration set.
+
+    Raises:
+        ValueError: If the request contains neither a path nor a configuration set,
+            or one of its options is invalid.
+        Exception: If the project or configuration set could not be formatted.
+    """
+    from argparse import ArgumentTypeError, Namespace
+
+    request, arguments = job
+    options = {}
+    for key, convert in _handle_request.OPTIONS.iteritems():
+        if key in request:
+            try:
+                options[key] = convert(request[key])
+            except (TypeError, ValueError, ArgumentTypeError):
+                raise ValueError("The value of the '{}' option is invalid.".format(key))
+    if options:
+        arguments = Namespace(**dict(vars(arguments), **options))
+        _check_output_options(arguments)
+
+    if "path" in request:
+        result = _format_project((request["path"], arguments))
+        if result["error"] is not None:
+            raise result["error"]
+
+        return {
+            "path": result["path"],
+            "cached": result["cached"],
+            "written": result["written"],
+        }
+    elif "configuration_set" in request:
+        from core import format_configuration_set
+        return {
+            "configuration_set": format_configuration_set(
+                request["configuration_set"],
+                tutorial_processes=arguments.tutorial_jobs,
+                tutorial_chunk_size=arguments.tutorial_chunk_size
+            ),
+        }
+    else:
+        raise ValueError("A request must contain either a 'path' or a 'configuration_set'.")
+
+
+def _check_output_options(arguments):
+    """Checks that the specified output options can be combined.
+
+    A binary copy of a configuration file is converted from the formatted
+    configuration, which is never held in memory when a tutorial is streamed.
+
+    Args:
+        arguments (argparse.Namespace): The set of command-line arguments.
+
+    Raises:
+        ValueError: If both --binary and --stream-tutorial are set.
+        ImportError: If --binary is set and msgpack is not installed.
+    """
+    if arguments.binary:
+        if arguments.stream_tutorial:
+            raise ValueError("The --binary option cannot be combined with --stream-tutorial.")
+
+        from binary import _get_msgpack
+        _get_msgpack()
+
+
+def _optional_string(value):
+    """Checks that the specified request option is either a string or None.
+
+    Args:
+        value (object): The value to check.
+
+    Returns:
+        basestring: The value.
+
+    Raises:
+        TypeError: If the value is neither a basestring nor None.
+    """
+    if value is not None and not isinstance(value, basestring):
+        raise TypeError("'{}' is not a string.".format(value))
+    return value
+
+
+def _forwards_to_daemon(arguments):
+    """Checks whether projects should be formatted by a running daemon.
+
+    Options that only affect the current process, such as --stats and --check,
+    are not supported by the daemon, in which case projects are formatted locally.
+    Since projects are sent by path, they are also formatted locally if the socket
+    does not belong to the current user, e.g. a socket in the temporary directory
+    created by someone else.
+
+    Args:
+        arguments (argparse.Namespace): The set of command-line arguments.
+
+    Returns:
+        bool: True if projects should be sent to a running daemon, False otherwise.
+    """
+    import os
+
+    if arguments.socket is None or arguments.statistics or arguments.check:
+        return False
+
+    import stat
+
+    try:
+        status = os.lstat(arguments.socket)
+    except OSError:
+        return False
+
+    if not stat.S_ISSOCK(status.st_mode) or status.st_uid != os.getuid():
+        import logging
+        logging.warning("The file '{}' is not a socket that belongs to the current user, so projects are formatted without the daemon.".format(arguments.socket))
+        return False
+
+    from server import is_running
+    return is_running(arguments.socket)
+
+
+def _forward_projects(paths, arguments):
+    """Sends the specified projects to the running daemon to be formatted.
+
+    Args:
+        paths (list): The paths to the project directories to format.
+        arguments (argparse.Namespace): The set of command-line arguments.
+
+    Returns:
+        iterator: The result of formatting each project, in the same format as the
+            results returned by _format_project, and in the same order as the paths.
+    """
+    from itertools import imap
+    import os
+
+    # The daemon may have been started from a different directory.
+    options = {k: getattr(arguments, k) for k in _handle_request.OPTIONS}
+    if options["cache_directory"]:
+        options["cache_directory"] = os.path.abspath(options["cache_directory"])
+    jobs = [(os.path.abspath(p), arguments.socket, options) for p in paths]
+    if arguments.jobs == 1:
+        for result in imap(_forward_project, jobs):
+            yield result
+    else:
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(arguments.jobs or None)
+        try:
+            for result in pool.imap(_forward_project, jobs):
+                yield result
+        finally:
+            pool.close()
+
+
+def _forward_project(job):
+    """Sends the specified project to the running daemon to be formatted.
+
+    Args:
+        job (tuple): A (path, address, options) tuple where path is the project's directory,
+            address is the path to the daemon's socket, and options is a dictionary of
+            the options sent along with the project.
+
+    Returns:
+        dict: The result of formatting the project, in the same format as the
+            results returned by _format_project.
+    """
+    from server import send_request, get_exception
+
+    path, address, options = job
+    result = {
+        "path": path,
+        "error": None,
+        "cached": False,
+        "written": 0,
+        "differences": [],
+        "statistics": None,
+    }
+    try:
+        response = send_request(address, dict(options, path=path))
+        result["error"] = get_exception(response)
+        if result["error"] is None:
+            result["cached"] = response["cached"]
+            result["written"] = response["written"]
+    except Exception as e:
+        result["error"] = e
+
+    return result
+
+
+def _format_stream(input, output, arguments):
+    """Formats the configuration sets read from the input file, and writes them
+    to the output file.
+
+    Both files contain one configuration set in JSON format per line, and the
+    configuration sets are written in the order they are read. A configuration
+    set that cannot be formatted is replaced by an object whose "error" member
+    contains the type and message of the exception that was raised. Only a
+    limited number of configuration sets is ever held in memory.
+
+    Args:
+        input (file): The file to read configuration sets from.
+        output (file): The file to write formatted configuration sets to.
+        arguments (argparse.Namespace): The set of command-line arguments.
+
+    Returns:
+        int: The number of configuration sets that could not be formatted.
+    """
+    from helper import imap_parallel
+    import logging
+
+    failures = 0
+    lines = iter(input.readline, "")
+    jobs = ((number, line, arguments) for number, line in enumerate(lines, 1) if line.strip())
+    for number, line, error in imap_parallel(_format_json_line, jobs, arguments.jobs):
+        if error is not None:
+            failures += 1
+            if not arguments.quiet:
+                logging.error("The configuration set on line {} could not be formatted. {}: {}".format(number, type(error).__name__, error))
+
+        output.write(line)
+        output.write("\n")
+        output.flush()
+
+    return failures
+
+
+def _format_json_line(job):
+    """Formats the configuration set stored in the specified line of JSON.
+
+    Args:
+        job (tuple): A (number, line, arguments) triple where number is the line's
+            number, line is the configuration set in JSON format, and arguments
+            is the set of command-line arguments.
+
+    Returns:
+        tuple: The line's number, the formatted configuration set (or a description
+            of the error that prevented it from being formatted) as a line of JSON,
+            and the error, or None if the configuration set was successfully formatted.
+    """
+    from core import format_configuration_set
+    from helper import to_json_string, _picklable_exception
+    import json
+
+    number, line, arguments = job
+    try:
+        configuration_set = json.loads(line)
+        if not isinstance(configuration_set, dict):
+            raise ValueError("A configuration set must be a JSON object.")
+
+        configuration_set = format_configuration_set(
+            configuration_set,
+            tutorial_processes=arguments.tutorial_jobs,
+            tutorial_chunk_size=arguments.tutorial_chunk_size
+        )
+        return number, to_json_string(configuration_set, compress=True), None
+    except Exception as e:
+        error = {"error": {"type": type(e).__name__, "message": unicode(e)}}
+        return number, json.dumps(error), _picklable_exception(e)
+
+
+def _watch(paths, arguments):
+    """Reformats the specified projects whenever their configuration files change,
+    until the process is interrupted.
+
+    Args:
+        paths (list): The paths to the project directories to monitor.
+        arguments (argparse.Namespace): The set of command-line arguments.
+
+    Returns:
+        int: 0 once the process is interrupted.
+    """
+    from watch import watch
+
+    print "Watching {} project(s) for changes. Press Ctrl+C to stop.".format(len(paths))
+    try:
+        watch(paths, lambda path, keys: _format_changed_configurations(path, keys, arguments), arguments.debounce)
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+def _format_changed_configurations(path, keys, arguments):
+    """Formats the configurations of the project located at the given path that have changed.
+
+    A tutorial configuration depends on the task presenter's language configuration,
+    so it is formatted whenever the task presenter configuration changes.
+
+    Args:
+        path (basestring): A path to a project directory.
+        keys (set): The keys of the configurations that have changed.
+        arguments (argparse.Namespace): The set of command-line arguments.
+
+    Returns:
+        list: The names of the files that were written, which the watcher does
+            not report as changes.
+    """
+    from geotagx_validator.helper import print_exception
+    from project import format_project_configuration
+    from task_presenter import format_task_presenter_configuration
+    from tutorial import format_tutorial_configuration
+    from helper import get_configuration_filenames, iter_json_string, write_configuration_file
+
+    keys = set(keys)
+    if "task_presenter" in keys:
+        keys.add("tutorial")
+
+    try:
+        configurations = _deserialize_configurations(path, keys | set(["task_presenter"]))
+        formatted = {}
+        if "project" in keys and "project" in configurations:
+            formatted["project"] = format_project_configuration(configurations["project"])
+
+        # The task presenter configuration is always formatted since the tutorial
+        # requires a formatted language configuration, but only written if it changed.
+        task_presenter = configurations.get("task_presenter")
+        if task_presenter is not None:
+            task_presenter = format_task_presenter_configuration(task_presenter)
+            if "task_presenter" in keys:
+                formatted["task_presenter"] = task_presenter
+
+        if "tutorial" in keys and "tutorial" in configurations:
+            if task_presenter is None:
+                raise ValueError("A tutorial configuration cannot be formatted without a task presenter configuration.")
+            formatted["tutorial"] = format_tutorial_configuration(configurations["tutorial"], task_presenter, True, False)
+
+        filenames = get_configuration_filenames(path)
+        written = []
+        for key, configuration in formatted.iteritems():
+            data = iter_json_string(configuration, arguments.compact)
+            written.extend(write_configuration_file(filenames[key], data, configuration, True, arguments.gzip, arguments.binary))
+
+        if written:
+            print "The project located at '{}' was successfully formatted ({} file(s) written).".format(path, len(written))
+        return written
+    except Exception as e:
+        print "The project located at '{}' could not be formatted.".format(path)
+        print_exception(e, arguments.verbose)
+        return []
+
+
+def _deserialize_configurations(path, keys):
+    """Reads the specified configurations of the project located at the given path.
+
+    Args:
+        path (basestring): A path to a project directory.
+        keys (iterable): The keys of the configurations to read.
+
+    Returns:
+        dict: A set of configurations, which only contains those that exist.
+    """
+    from helper import get_configuration_filenames, deserialize_configuration
+    import os
+
+    filenames = get_configuration_filenames(path)
+    return {k: deserialize_configuration(filenames[k]) for k in keys if os.path.isfile(filenames[k])}
+
+
+def _stream_tutorial(path, configuration_set, arguments):
+    """Formats the tutorial configuration of the project located at the given path,
+    one subject at a time.
+
+    Args:
+        path (basestring): A path to a project directory.
+        configuration_set (dict): The project's formatted set of configurations,
+            which contains its task presenter configuration.
+        arguments (argparse.Namespace): The set of command-line arguments.
+
+    Returns:
+        list: The names of the files that were written or, in check mode, that
+            are not formatted.
+
+    Raises:
+        ValueError: If the tutorial configuration is invalid, or the project
+            has no task presenter configuration.
+    """
+    from helper import write_configuration_file, find_stale_files
+    from instrumentation import stage_iterator
+    from reader import ConfigurationSetReader
+    from tutorial import format_tutorial_stream
+    from contextlib import closing
+
+    reader = ConfigurationSetReader(path)
+    if "tutorial" not in reader:
+        return []
+    elif "task_presenter" not in configuration_set:
+        raise ValueError("A tutorial configuration cannot be formatted without a task presenter configuration.")
+
+    filename = reader.filenames["tutorial"]
+    with closing(reader.open("tutorial")) as file:
+        chunks = format_tutorial_stream(
+            file,
+            configuration_set["task_presenter"],
+            validate_task_presenter_configuration=False,
+            compress=arguments.compact,
+            processes=arguments.tutorial_jobs,
+            chunk_size=arguments.tutorial_chunk_size
+        )
+        # The mapping is closed as soon as the tutorial has been read, before the
+        # file is replaced, since a mapped file cannot be replaced on every platform.
+        chunks = stage_iterator("format.tutorial", _close_when_exhausted(chunks, file))
+        if arguments.check:
+            return find_stale_files(filename, chunks, gzip=arguments.gzip)
+        else:
+            return write_configuration_file(filename, chunks, sync=False, gzip=arguments.gzip)
+
+
+def _close_when_exhausted(chunks, file):
+    """Returns the specified chunks unchanged, and closes the given file once
+    every chunk has been read.
+
+    Args:
+        chunks (iterable): The chunks of data to return.
+        file (file): The file to close, e.g. the file the chunks are read from.
+
+    Returns:
+        iterator: The chunks.
+    """
+    try:
+        for chunk in chunks:
+            yield chunk
+    finally:
+        file.close()
 
 
 def get_argparser(subparsers=None):
@@ -83,7 +927,12 @@ def get_argparser(subparsers=None):
     Raises:
         TypeError: If the subparsers argument is not a NoneType or an argparse._SubParsersAction instance.
     """
-    check_arg_type(get_argparser, "subparsers", subparsers, (argparse._SubParsersAction, type(None)))
+    import argparse
+
+    # The validator is not needed to display the tool's help or version.
+    if subparsers is not None:
+        from geotagx_validator.helper import check_arg_type
+        check_arg_type(get_argparser, "subparsers", subparsers, (argparse._SubParsersAction, type(None)))
 
     parser = None
     parser_arguments = {
@@ -100,13 +949,157 @@ def get_argparser(subparsers=None):
     options.add_argument("-h", "--help", action="help", help="Display this help and exit.")
     options.add_argument("-q", "--quiet", action="store_true", help="Suppress all warnings.")
     options.add_argument("-v", "--verbose", action="store_true", help="Detail the actions being performed.")
+    options.add_argument("-j", "--jobs", type=_natural_number, default=1, metavar="N", help="Format up to N projects in parallel. If N is 0, one job is run per available CPU.")
+    options.add_argument("--cache", action="store_true", help="Remember formatted projects so they can be skipped if they have not changed since, in $XDG_CACHE_HOME/geotagx-formatter or ~/.cache/geotagx-formatter.")
+    options.add_argument("--cache-dir", dest="cache_directory", metavar="DIR", default=argparse.SUPPRESS, help="Remember formatted projects in DIR, like --cache.")
+    options.add_argument("--cache-size", type=_natural_number, default=10000, metavar="N", help="Remember at most N projects, evicting the least recently used ones. The default is 10000.")
+    options.add_argument("--no-cache", dest="cache_directory", action="store_const", const=None, default=argparse.SUPPRESS, help="Format every project, even if it has not changed since it was last formatted, and even if --cache or --cache-dir is specified. This is the default.")
+    options.add_argument("--stats", dest="statistics", metavar="FILE", help="Append the time spent in each stage and the number of nodes processed for each project to FILE, as lines of JSON. If FILE is '-', they are written to the standard output, and every other message to the standard error.")
+    options.add_argument("--stream-tutorial", action="store_true", help="Format tutorials one subject at a time instead of loading them in memory. Only the subjects and default messages of a tutorial are validated.")
+    options.add_argument("--tutorial-jobs", type=_natural_number, default=1, metavar="N", help="Format a tutorial's subjects with N parallel jobs. If N is 0, one job is run per available CPU. This option has no effect on projects formatted by parallel jobs (see --jobs).")
+    options.add_argument("--tutorial-chunk-size", type=_positive_integer, default=256, metavar="N", help="Send N tutorial subjects at a time to each job. The default is 256.")
+    options.add_argument("--compact", action="store_true", help="Write configurations without any whitespace, which makes their files several times smaller.")
+    options.add_argument("--gzip", action="store_true", help="Also write a gzip-compressed copy of each configuration file next to it, e.g. project.json.gz, for web servers that serve precompressed files.")
+    options.add_argument("--binary", action="store_true", help="Also write a copy of each configuration file in the MessagePack format next to it, e.g. project.msgpack, which geotagx_formatter.binary.load_binary_configuration loads faster than the JSON file. This requires msgpack, and cannot be combined with --stream-tutorial.")
+    options.add_argument("-c", "--check", action="store_true", help="Check whether the projects are formatted without writing anything, and exit with the number of projects that are not formatted or could not be formatted.")
+    options.add_argument("--fail-fast", action="store_true", help="In check mode, stop at the first project that is not formatted or could not be formatted.")
+    options.add_argument("--diff", action="store_true", help="In check mode, summarize how each file that is not formatted differs from its formatted configuration.")
+    options.add_argument("-w", "--watch", action="store_true", help="Keep running and reformat each project's configuration files whenever they change.")
+    options.add_argument("--debounce", type=float, default=1.0, metavar="SECONDS", help="In watch mode, wait until a project's files have not changed for SECONDS before reformatting them. The default is 1.")
+    options.add_argument("--daemon", action="store_true", help="Keep running and format the projects sent by other instances of the tool, which then no longer need to load the formatter. The daemon formats projects with its own options.")
+    options.add_argument("--socket", metavar="FILE", default=argparse.SUPPRESS, help="The daemon's socket. The default is $XDG_RUNTIME_DIR/geotagx-formatter.sock, or a file in the temporary directory.")
+    options.add_argument("--no-daemon", dest="socket", action="store_const", const=None, default=argparse.SUPPRESS, help="Format projects in this process, even if a daemon is running.")
     options.add_argument("-V", "--version", action="version", help="Display version information and exit.", version=_version())
 
-    parser.add_argument("paths", metavar="PATH", nargs="+")
+    parser.add_argument("paths", metavar="PATH", nargs="*", help="A project directory, or '-' to format the configuration sets read from the standard input, one per line in JSON format, and write them to the standard output.")
 
     return parser
 
 
+def _open_statistics_file(filename):
+    """Opens the file that per-project statistics are written to.
+
+    Args:
+        filename (str): The file's name, "-" for the standard output, or None.
+
+    Returns:
+        file: The opened file, or None if no filename was specified.
+    """
+    import sys
+
+    if not filename:
+        return None
+    elif filename == "-":
+        return sys.stdout
+    else:
+        return open(filename, "a")
+
+
+def _write_statistics(file, result):
+    """Writes the specified project's statistics to a file, as a line of JSON.
+
+    Args:
+        file (file): The file to write to.
+        result (dict): The result of formatting a project, as returned by _format_project.
+    """
+    import json
+
+    if result["error"] is not None:
+        status = "failed"
+    elif result["differences"]:
+        status = "unformatted"
+    elif result["cached"]:
+        status = "cached"
+    else:
+        status = "formatted"
+
+    record = {
+        "path": result["path"],
+        "status": status,
+    }
+    record.update(result["statistics"] or {})
+    file.write(json.dumps(record, sort_keys=True) + "\n")
+    file.flush()
+
+
+def _log_cache_statistics():
+    """Logs the hit and miss counters of the caches used to normalize strings."""
+    import logging
+    from helper import get_cache_statistics
+
+    for name, statistics in sorted(get_cache_statistics().iteritems()):
+        logging.info("The {} cache has {hits} hit(s) and {misses} miss(es), and held up to {peak_size} entries.".format(name.replace("_", " "), **statistics))
+
+
+def _natural_number(value):
+    """Converts the specified command-line value into a non-negative integer.
+
+    Args:
+        value (str): The value to convert.
+
+    Returns:
+        int: A non-negative integer.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a non-negative integer.
+    """
+    import argparse
+
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+
+    if number < 0:
+        raise argparse.ArgumentTypeError("'{}' is not a non-negative integer.".format(value))
+
+    return number
+
+
+def _positive_integer(value):
+    """Converts the specified command-line value into a positive integer.
+
+    Args:
+        value (str): The value to convert.
+
+    Returns:
+        int: A positive integer.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a positive integer.
+    """
+    import argparse
+
+    number = _natural_number(value)
+    if number == 0:
+        raise argparse.ArgumentTypeError("'{}' is not a positive integer.".format(value))
+
+    return number
+
+
+def _set_default_locations(arguments):
+    """Sets the cache directory and daemon socket to their defaults, unless they
+    were specified on the command line.
+
+    The defaults are determined when the tool is run rather than when its
+    arguments are parsed, which spares --help and --version from loading the
+    modules that determine them. Projects are only cached if --cache or
+    --cache-dir is specified, in which case the cache directory is not None.
+
+    Args:
+        arguments (argparse.Namespace): The set of command-line arguments.
+    """
+    if not hasattr(arguments, "cache_directory"):
+        arguments.cache_directory = None
+        if arguments.cache:
+            from cache import get_default_cache_directory
+            arguments.cache_directory = get_default_cache_directory()
+
+    if not hasattr(arguments, "socket"):
+        from server import get_default_address
+        arguments.socket = get_default_address()
+
+
 def _version():
     """Returns the tool's version string."""
     from __init__ import __version__
@@ -124,5 +1117,19 @@ def _setup_logging(verbose=False):
     logging.basicConfig(format="[%(levelname)s] %(message)s", level=logging_level)
 
 
+_handle_request.OPTIONS = {
+    "compact": bool,
+    "gzip": bool,
+    "binary": bool,
+    "stream_tutorial": bool,
+    "cache_directory": _optional_string,
+    "tutorial_jobs": _natural_number,
+    "tutorial_chunk_size": _positive_integer,
+}
+"""The options a client may send along with a request, and the functions that
+convert their values. A client sends all of them so that a project is formatted
+exactly as it would be by the client itself."""
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+#
+# This module is part of the GeoTag-X project formatter tool.
+# It contains an interface to the formatter that can be used from asyncio
+# event loops without blocking them.
+#
+# Author: Jeremy Othieno (j.othieno@gmail.com)
+#
+# Copyright (c) 2017 UNITAR/UNOSAT
+#
+# The MIT License (MIT)
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# On Python 2, this module requires trollius, the asyncio backport, and futures,
+# the concurrent.futures backport, which may be installed with the 'asyncio'
+# extra, e.g. pip install geotagx-formatter[asyncio]. The futures it returns can
+# be awaited in coroutines, i.e. result = yield From(future) with trollius.
+from geotagx_validator.helper import check_arg_type
+
+class AsyncFormatter(object):
+    """Formats and serializes configuration sets without blocking an event loop.
+
+    Configuration sets are formatted and serialized by a pool of worker threads,
+    whose size limits the number of requests processed concurrently. Any other
+    request waits for a worker to become available, without blocking the event
+    loop. The subjects of large tutorials may also be distributed across worker
+    processes, in chunks, so that they do not compete with the event loop for
+    the interpreter lock. The worker processes are created along with the
+    formatter, by the thread that creates it, rather than forked from a worker
+    thread, and are shared by every request.
+    """
+
+    def __init__(self, max_workers=4, tutorial_processes=1, tutorial_chunk_size=256, loop=None):
+        """Creates a formatter.
+
+        Args:
+            max_workers (int): The maximum number of configuration sets formatted
+                or serialized concurrently.
+            tutorial_processes (int): The number of worker processes used to format
+                tutorials' subjects. If set to 1, the subjects are formatted by the
+                worker thread. If set to 0, one worker process is created per
+                available CPU.
+            tutorial_chunk_size (int): The number of tutorial subjects sent to a
+                worker process at a time.
+            loop (asyncio.AbstractEventLoop): The event loop the futures are attached
+                to. If None, the current event loop is used.
+
+        Raises:
+            TypeError: If max_workers, tutorial_processes or tutorial_chunk_size is not an integer.
+            ValueError: If max_workers is not a positive integer.
+            ImportError: If asyncio and concurrent.futures, or their backports, are not installed.
+        """
+        check_arg_type(AsyncFormatter, "max_workers", max_workers, int)
+        check_arg_type(AsyncFormatter, "tutorial_processes", tutorial_processes, int)
+        check_arg_type(AsyncFormatter, "tutorial_chunk_size", tutorial_chunk_size, int)
+        if max_workers < 1:
+            raise ValueError("The maximum number of workers must be a positive integer.")
+
+        asyncio = _get_asyncio()
+        from concurrent.futures import ThreadPoolExecutor
+        import multiprocessing
+
+        if tutorial_processes == 0:
+            tutorial_processes = multiprocessing.cpu_count()
+
+        self.loop = loop or asyncio.get_event_loop()
+        self.tutorial_processes = tutorial_processes
+        self.tutorial_chunk_size = tutorial_chunk_size
+        # The worker processes are forked before any worker thread is started.
+        self.pool = multiprocessing.Pool(tutorial_processes) if tutorial_processes > 1 else None
+        self.executor = ThreadPoolExecutor(max_workers)
+
+    def format_configuration_set(self, configuration_set, validate_configuration_set=True, copy_on_write=False):
+        """Formats the specified set of project configurations.
+
+        Args:
+            configuration_set (dict): A dictionary containing a set of configurations to format.
+            validate_configuration_set (bool): If set to True, the configurations will be
+                validated before they are processed.
+            copy_on_write (bool): If set to True, the configuration set is left unchanged
+                and a formatted copy of it is returned instead, so that it may still be
+                used by the event loop while it is formatted.
+
+        Returns:
+            asyncio.Future: A future whose result is the formatted set of project
+                configurations, or whose exception is the error that prevented
+                it from being formatted.
+        """
+        from core import format_configuration_set
+        from functools import partial
+
+        return self.loop.run_in_executor(
+            self.executor,
+            partial(
+                _run_with_pool,
+                self.pool,
+                format_configuration_set,
+                configuration_set,
+                validate_configuration_set,
+                self.tutorial_processes,
+                self.tutorial_chunk_size,
+                copy_on_write
+            )
+        )
+
+    def serialize_configuration_set(
+        self,
+        configuration_set,
+        path,
+        overwrite=False,
+        validate_configuration_set=True,
+        sync=True,
+        compress=False,
+        gzip=False,
+        binary=False
+    ):
+        """Writes the specified set of configurations to the given path.
+
+        Args:
+            configuration_set (dict): A set of configurations to serialize.
+            path (basestring): The path to the directory to write the configurations to.
+            overwrite (bool): If set to True, existing configuration files will be overwritten.
+            validate_configuration_set (bool): If set to True, the configuration set
+                will be validated before it is written.
+            sync (bool): If set to True, the files are flushed to disk before the
+                future's result is set.
+            compress (bool): If set to True, the files are compressed as much as possible.
+            gzip (bool): If set to True, a gzip-compressed copy of each file is written
+                next to it.
+            binary (bool): If set to True, a copy of each file in the MessagePack
+                format is written next to it. This requires msgpack.
+
+        Returns:
+            asyncio.Future: A future whose result is the number of files that were
+                written, or whose exception is the error that prevented the
+                configuration set from being written.
+        """
+        from helper import serialize_configuration_set
+        from functools import partial
+
+        return self.loop.run_in_executor(
+            self.executor,
+            partial(
+                serialize_configuration_set,
+                configuration_set,
+                path,
+                overwrite=overwrite,
+                validate_configuration_set=validate_configuration_set,
+                sync=sync,
+                compress=compress,
+                gzip=gzip,
+                binary=binary
+            )
+        )
+
+    def close(self, wait=True):
+        """Shuts down the formatter's worker threads and processes.
+
+        Args:
+            wait (bool): If set to True, this method blocks until the pending
+                requests have been processed, and the worker processes have exited.
+        """
+        self.executor.shutdown(wait)
+        if self.pool is not None:
+            # The worker processes exit once the pending requests no longer need them.
+            self.pool.close()
+            if wait:
+                self.pool.join()
+
+
+def _run_with_pool(pool, function, *args):
+    """Calls the specified function on behalf of a worker thread, which sends the
+    tutorial subjects it formats in parallel to the specified pool of worker processes.
+
+    Args:
+        pool (multiprocessing.Pool): The pool of worker processes, or None.
+        function (function): The function to call.
+        *args: The function's arguments.
+
+    Returns:
+        object: The function's result.
+    """
+    from helper import _worker_pool
+
+    with _worker_pool(pool):
+        return function(*args)
+
+
+def _get_asyncio():
+    """Returns the asyncio module, or its backport.
+
+    Returns:
+        module: The asyncio module, or trollius.
+
+    Raises:
+        ImportError: If neither asyncio nor trollius is installed.
+    """
+    try:
+        import asyncio
+    except ImportError:
+        try:
+            import trollius as asyncio
+        except ImportError:
+            raise ImportError("The asynchronous interface requires asyncio or its backport, trollius.")
+
+    return asyncio
+
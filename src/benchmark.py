@@ -0,0 +1,440 @@
+# -*- coding: utf-8 -*-
+#
+# This module is part of the GeoTag-X project formatter tool.
+# It contains a benchmark suite that measures the formatter's performance on
+# synthetic project configurations.
+#
+# Author: Jeremy Othieno (j.othieno@gmail.com)
+#
+# Copyright (c) 2017 UNITAR/UNOSAT
+#
+# The MIT License (MIT)
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The benchmark suite may be run with
+#
+#     python -m geotagx_formatter.benchmark --help
+#
+import argparse
+
+def main():
+    """Executes the benchmark suite.
+    """
+    import sys
+    sys.exit(run(get_argparser().parse_args(sys.argv[1:])))
+
+
+def run(arguments):
+    """Executes the benchmark suite with the specified command-line arguments.
+
+    Args:
+        arguments (argparse.Namespace): A set of command-line arguments.
+
+    Returns:
+        int: 0 if the benchmark was successful and no regression was detected, 1 otherwise.
+    """
+    import json
+
+    parameters = {
+        "questions": arguments.questions,
+        "options": arguments.options,
+        "depth": arguments.depth,
+        "subjects": arguments.subjects,
+        "assertions": arguments.assertions,
+        "languages": arguments.languages,
+    }
+    report = run_benchmark(parameters, arguments.stages, arguments.repeat, not arguments.no_validation)
+    _print_report(report)
+
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump(report, file, indent=4, separators=(",", ": "), sort_keys=True)
+
+    if arguments.compare:
+        with open(arguments.compare, "r") as file:
+            baseline = json.load(file)
+        if not _compare_reports(baseline, report, arguments.tolerance):
+            return 1
+
+    startup = report["results"].get("startup")
+    if arguments.startup_budget is not None and startup is not None and startup["min"] > arguments.startup_budget:
+        print "The tool took {:.4f}s to start, which exceeds the budget of {:.4f}s.".format(startup["min"], arguments.startup_budget)
+        return 1
+
+    return 0
+
+
+def run_benchmark(parameters, stages=None, repeat=5, validate=True):
+    """Measures the performance of each of the specified stages.
+
+    Each stage is measured in a separate process so that its peak memory usage
+    is not affected by the stages measured before it.
+
+    Args:
+        parameters (dict): The parameters passed to generate_configuration_set.
+        stages (list): The names of the stages to measure. If None, every stage
+            in run_benchmark.STAGES is measured.
+        repeat (int): The number of times each stage is run.
+        validate (bool): If set to False, configuration sets are not validated
+            before they are formatted.
+
+    Returns:
+        dict: A report that contains the measurements of each stage, as well as
+            information about the environment they were made in.
+    """
+    from __init__ import __version__
+    import multiprocessing, platform, time
+
+    results = {}
+    for stage in stages or sorted(run_benchmark.STAGES):
+        pool = multiprocessing.Pool(1)
+        try:
+            results[stage] = pool.apply(_measure, (stage, parameters, repeat, validate))
+        finally:
+            pool.terminate()
+            pool.join()
+
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "parameters": parameters,
+        "repeat": repeat,
+        "validate": validate,
+        "results": results,
+    }
+
+
+def _measure(stage, parameters, repeat, validate):
+    """Measures the performance of the specified stage.
+
+    Args:
+        stage (str): The name of the stage to measure.
+        parameters (dict): The parameters passed to generate_configuration_set.
+        repeat (int): The number of times the stage is run.
+        validate (bool): If set to False, configuration sets are not validated
+            before they are formatted.
+
+    Returns:
+        dict: The stage's minimum, mean and maximum running times in seconds, as
+            well as the peak memory usage, in kilobytes, of the process before
+            and after the stage was run.
+    """
+    import time
+
+    setup, execute = run_benchmark.STAGES[stage]
+    times = []
+    baseline_memory = None
+    for _ in xrange(repeat):
+        # A new configuration set is generated each time since formatting it
+        # modifies it, and the previous one is released before then.
+        context = None
+        context = setup(generate_configuration_set(**parameters), validate)
+        if baseline_memory is None:
+            baseline_memory = _get_peak_memory()
+
+        start = time.time()
+        execute(context, validate)
+        times.append(time.time() - start)
+
+        _teardown(context)
+
+    return {
+        "min": min(times),
+        "mean": sum(times) / len(times),
+        "max": max(times),
+        "baseline_memory": baseline_memory,
+        "peak_memory": _get_peak_memory(),
+    }
+
+
+def _get_peak_memory():
+    """Returns the peak memory usage of the current process, in kilobytes."""
+    import resource, sys
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _setup_format(configuration_set, validate):
+    """Prepares the format stage."""
+    return {"configuration_set": configuration_set}
+
+
+def _execute_format(context, validate):
+    """Executes the format stage."""
+    from core import format_configuration_set
+    format_configuration_set(context["configuration_set"], validate)
+
+
+def _setup_serialize(configuration_set, validate):
+    """Prepares the serialize stage."""
+    from core import format_configuration_set
+    from tempfile import mkdtemp
+    return {
+        "configuration_set": format_configuration_set(configuration_set, validate),
+        "path": mkdtemp(prefix="geotagx-formatter-benchmark-"),
+    }
+
+
+def _execute_serialize(context, validate):
+    """Executes the serialize stage."""
+    from helper import serialize_configuration_set
+    serialize_configuration_set(context["configuration_set"], context["path"], overwrite=True, validate_configuration_set=False)
+
+
+def _setup_run(configuration_set, validate):
+    """Prepares the end-to-end stage by writing an unformatted project to disk."""
+    from tempfile import mkdtemp
+    import json, os
+
+    path = mkdtemp(prefix="geotagx-formatter-benchmark-")
+    for key, configuration in configuration_set.iteritems():
+        with open(os.path.join(path, key + ".json"), "w") as file:
+            json.dump(configuration, file)
+
+    return {"path": path}
+
+
+def _execute_run(context, validate):
+    """Executes the end-to-end stage."""
+    from __main__ import get_argparser, run
+    import os, sys
+
+    arguments = get_argparser().parse_args(["--quiet", "--no-cache", "--no-daemon", context["path"]])
+    stdout = sys.stdout
+    with open(os.devnull, "w") as sys.stdout:
+        try:
+            run(arguments)
+        finally:
+            sys.stdout = stdout
+
+
+def _setup_startup(configuration_set, validate):
+    """Prepares the startup stage."""
+    return {}
+
+
+def _execute_startup(context, validate):
+    """Executes the startup stage, which displays the tool's version in a new process."""
+    import os, subprocess, sys
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__main__.py")
+    with open(os.devnull, "w") as devnull:
+        subprocess.check_call([sys.executable, script, "--version"], stdout=devnull)
+
+
+def _teardown(context):
+    """Removes any directory created by a stage's setup."""
+    from shutil import rmtree
+
+    path = context.get("path")
+    if path:
+        rmtree(path, ignore_errors=True)
+
+
+run_benchmark.STAGES = {
+    "format": (_setup_format, _execute_format),
+    "serialize": (_setup_serialize, _execute_serialize),
+    "run": (_setup_run, _execute_run),
+    "startup": (_setup_startup, _execute_startup),
+}
+"""The set of stages that can be measured, and the functions that prepare and execute them."""
+
+
+def generate_configuration_set(questions=10, options=10, depth=1, subjects=100, assertions=3, languages=1):
+    """Generates a synthetic configuration set.
+
+    The same parameters always generate the same configuration set.
+
+    Args:
+        questions (int): The number of questions in the questionnaire. The questions
+            cycle through every type of input.
+        options (int): The number of options at each level of a dropdown-list or
+            multiple-option input.
+        depth (int): The number of nested levels of options in a dropdown-list input.
+        subjects (int): The number of tutorial subjects.
+        assertions (int): The number of assertions per tutorial subject.
+        languages (int): The number of languages the project is available in. If
+            there is more than one, half of the strings are already normalized
+            and translated into each language.
+
+    Returns:
+        dict: A configuration set.
+    """
+    codes = generate_configuration_set.LANGUAGE_CODES[:max(1, languages)]
+
+    def string(text, index):
+        if len(codes) > 1 and index % 2:
+            return {code: u"{} ({})".format(text, code) for code in codes}
+        return u"  {}  ".format(text)
+
+    def option_list(level, index):
+        result = [
+            {"label": string(u"Option {}.{}".format(level, i), i), "value": u"option-{}-{}".format(level, i)}
+            for i in xrange(options)
+        ]
+        if level < depth:
+            result.append({"label": string(u"Group {}".format(level), index), "options": option_list(level + 1, index)})
+        return result
+
+    input_types = generate_configuration_set.INPUT_TYPES
+    question_list = []
+    for i in xrange(questions):
+        input_type = input_types[i % len(input_types)]
+        question_input = {"type": input_type}
+        if input_type in ("dropdown-list", "multiple-option"):
+            question_input["options"] = option_list(1, i)
+            if input_type == "dropdown-list":
+                question_input["prompt"] = string(u"Select an option", i)
+        elif input_type in ("text", "number", "url"):
+            question_input["placeholder"] = string(u"Enter a value", i)
+        elif input_type == "datetime":
+            question_input["date-format"] = u" yyyy/MM/dd "
+
+        question_list.append({
+            "key": u"question-{}".format(i),
+            "title": string(u"Question {}".format(i), i),
+            "help": string(u"Help for question {}".format(i), i + 1),
+            "input": question_input,
+        })
+
+    subject_list = []
+    for i in xrange(subjects):
+        subject_list.append({
+            "source": u" http://example.com/images/{}.jpg ".format(i),
+            "page": u" http://example.com/pages/{} ".format(i),
+            "assertions": {
+                u"question-{}".format(j): {
+                    "expects": u" option-1-{} ".format(j % max(1, options)),
+                    "messages": {
+                        "on-wrong-answer": string(u"Wrong answer to question {}".format(j), i + j),
+                    },
+                }
+                for j in xrange(min(assertions, questions))
+            },
+        })
+
+    return {
+        "project": {
+            "name": u" Benchmark Project ",
+            "short_name": u"benchmark",
+            "description": u" A synthetic project used to benchmark the formatter. ",
+            "repository": u" https://github.com/geotagx/benchmark ",
+        },
+        "task_presenter": {
+            "language": {
+                "default": codes[0],
+                "available": list(codes),
+            },
+            "subject": {},
+            "questionnaire": {
+                "questions": question_list,
+            },
+        },
+        "tutorial": {
+            "default-message": {
+                "on-correct-answer": string(u"Correct!", 0),
+                "on-wrong-answer": string(u"Try again.", 1),
+            },
+            "subjects": subject_list,
+        },
+    }
+
+
+generate_configuration_set.LANGUAGE_CODES = ["en", "fr", "es", "ar", "zh", "ru", "pt", "de", "it", "ja", "sw", "hi"]
+"""The language codes used by generated configuration sets."""
+
+generate_configuration_set.INPUT_TYPES = ["dropdown-list", "multiple-option", "text", "number", "datetime", "url", "geotagging"]
+"""The types of input used by generated questions."""
+
+
+def _print_report(report):
+    """Prints the specified benchmark report."""
+    print "GeoTag-X Project Formatter v{version} on Python {python} ({platform})".format(**report)
+    print "Parameters: {}".format(", ".join("{}={}".format(k, v) for k, v in sorted(report["parameters"].iteritems())))
+    print "{:<12}{:>12}{:>12}{:>12}{:>16}".format("Stage", "Min (s)", "Mean (s)", "Max (s)", "Peak (KiB)")
+    for stage, result in sorted(report["results"].iteritems()):
+        print "{:<12}{min:>12.4f}{mean:>12.4f}{max:>12.4f}{peak_memory:>16}".format(stage, **result)
+
+
+def _compare_reports(baseline, report, tolerance):
+    """Compares a benchmark report to a baseline and prints the differences.
+
+    Args:
+        baseline (dict): The report to compare to.
+        report (dict): The report to compare.
+        tolerance (float): The relative increase in running time or peak memory
+            usage above which a stage is considered to have regressed.
+
+    Returns:
+        bool: True if no stage has regressed, False otherwise.
+    """
+    if baseline.get("parameters") != report["parameters"]:
+        print "Warning: the baseline was measured with different parameters."
+
+    success = True
+    print "Compared to v{} ({}):".format(baseline.get("version"), baseline.get("date"))
+    for stage, result in sorted(report["results"].iteritems()):
+        previous = baseline.get("results", {}).get(stage)
+        if previous is None:
+            continue
+
+        for metric in ("min", "peak_memory"):
+            ratio = float(result[metric]) / previous[metric] if previous[metric] else 1.0
+            regressed = ratio > 1.0 + tolerance
+            success = success and not regressed
+            print "  {:<12}{:<14}{:>+9.1%}{}".format(stage, metric, ratio - 1.0, "  REGRESSION" if regressed else "")
+
+    return success
+
+
+def get_argparser():
+    """Constructs the benchmark suite's command-line argument parser.
+
+    Returns:
+        argparse.ArgumentParser: A command-line argument parser instance.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m geotagx_formatter.benchmark",
+        description="Measures the GeoTag-X project formatter's performance on synthetic projects.",
+        add_help=False
+    )
+    options = parser.add_argument_group("OPTIONS")
+    options.add_argument("-h", "--help", action="help", help="Display this help and exit.")
+    options.add_argument("--questions", type=int, default=50, metavar="N", help="Generate N questions. The default is 50.")
+    options.add_argument("--options", type=int, default=20, metavar="N", help="Generate N options per level of options. The default is 20.")
+    options.add_argument("--depth", type=int, default=3, metavar="N", help="Nest N levels of options in dropdown lists. The default is 3.")
+    options.add_argument("--subjects", type=int, default=2000, metavar="N", help="Generate N tutorial subjects. The default is 2000.")
+    options.add_argument("--assertions", type=int, default=5, metavar="N", help="Generate N assertions per tutorial subject. The default is 5.")
+    options.add_argument("--languages", type=int, default=3, metavar="N", help="Make the project available in N languages. The default is 3.")
+    options.add_argument("--stage", dest="stages", action="append", choices=sorted(run_benchmark.STAGES), help="Only measure the specified stage. This option may be repeated.")
+    options.add_argument("--repeat", type=int, default=5, metavar="N", help="Run each stage N times. The default is 5.")
+    options.add_argument("--no-validation", action="store_true", help="Do not validate configurations before formatting them.")
+    options.add_argument("-o", "--output", metavar="FILE", help="Save the results to FILE.")
+    options.add_argument("--compare", metavar="FILE", help="Compare the results to those saved in FILE and fail if a stage has regressed.")
+    options.add_argument("--startup-budget", type=float, metavar="SECONDS", help="Fail if the tool takes more than SECONDS to start, as measured by the startup stage.")
+    options.add_argument("--tolerance", type=float, default=0.1, metavar="RATIO", help="The relative increase in running time or memory usage tolerated by --compare. The default is 0.1.")
+
+    return parser
+
+
+if __name__ == "__main__":
+    main()
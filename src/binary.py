@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+#
+# This module is part of the GeoTag-X project formatter tool.
+# It contains functions that convert formatted configurations into MessagePack,
+# a binary format that is smaller than JSON and much faster to load, and load
+# them back.
+#
+# Author: Jeremy Othieno (j.othieno@gmail.com)
+#
+# Copyright (c) 2017 UNITAR/UNOSAT
+#
+# The MIT License (MIT)
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# MessagePack (https://msgpack.org) is a documented format that is portable
+# across languages and interpreter versions, and loading it never executes any
+# code. Strings are stored as UTF-8 encoded MessagePack strings, so a file loads
+# to the same dictionary as json.load returns for its JSON counterpart. This
+# module requires msgpack, which may be installed with the 'binary' extra, e.g.
+# pip install geotagx-formatter[binary].
+from geotagx_validator.helper import check_arg_type
+
+def get_binary_filename(filename):
+    """Returns the name of the binary copy of the specified configuration file.
+
+    Args:
+        filename (basestring): The name of a JSON configuration file, e.g. tutorial.json.
+
+    Returns:
+        basestring: The name of the binary configuration file, e.g. tutorial.msgpack.
+
+    Raises:
+        TypeError: If the filename argument is not a basestring.
+    """
+    check_arg_type(get_binary_filename, "filename", filename, basestring)
+
+    import os
+    return os.path.splitext(filename)[0] + ".msgpack"
+
+
+def to_binary_string(configuration):
+    """Converts the specified configuration into a string in the MessagePack format.
+
+    Args:
+        configuration (dict): The configuration to convert. It may only contain
+            dictionaries, lists, strings, numbers, booleans and None, like any
+            configuration that can be converted into JSON.
+
+    Returns:
+        str: The configuration in the MessagePack format.
+
+    Raises:
+        TypeError: If the configuration argument is not a dictionary, or contains
+            a value of any other type.
+        ImportError: If msgpack is not installed.
+    """
+    check_arg_type(to_binary_string, "configuration", configuration, dict)
+
+    # Byte strings are stored as strings rather than binary data, like unicode
+    # strings, since both represent text in a configuration.
+    return _get_msgpack().packb(configuration, use_bin_type=False)
+
+
+def from_binary_string(data):
+    """Converts the specified string in the MessagePack format into a configuration.
+
+    Args:
+        data (str): The configuration in the MessagePack format.
+
+    Returns:
+        dict: The configuration.
+
+    Raises:
+        TypeError: If the data argument is not a str.
+        ValueError: If the data is not a configuration in the MessagePack format.
+        ImportError: If msgpack is not installed.
+    """
+    check_arg_type(from_binary_string, "data", data, str)
+
+    msgpack = _get_msgpack()
+    try:
+        configuration = msgpack.unpackb(data, raw=False)
+    except Exception:
+        # The exceptions raised for invalid data differ between versions of msgpack.
+        configuration = None
+
+    if not isinstance(configuration, dict):
+        raise ValueError("The data is not a configuration in the MessagePack format.")
+
+    return configuration
+
+
+def load_binary_configuration(filename):
+    """Reads the configuration stored in the specified binary configuration file.
+
+    The configuration is equal to the one that helper.deserialize_configuration
+    returns for the JSON file the binary file is a copy of.
+
+    Args:
+        filename (basestring): The name of the file to read.
+
+    Returns:
+        dict: The configuration.
+
+    Raises:
+        TypeError: If the filename argument is not a basestring.
+        IOError: If the file could not be read.
+        ValueError: If the file does not contain a configuration in the MessagePack format.
+        ImportError: If msgpack is not installed.
+    """
+    check_arg_type(load_binary_configuration, "filename", filename, basestring)
+
+    with open(filename, "rb") as file:
+        data = file.read()
+
+    try:
+        return from_binary_string(data)
+    except ValueError:
+        raise ValueError("The file '{}' does not contain a configuration in the MessagePack format.".format(filename))
+
+
+def _get_msgpack():
+    """Returns the msgpack module.
+
+    Returns:
+        module: The msgpack module.
+
+    Raises:
+        ImportError: If msgpack is not installed.
+    """
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError("Binary configurations require msgpack, which may be installed with 'pip install geotagx-formatter[binary]'.")
+
+    return msgpack
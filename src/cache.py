@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+#
+# This module is part of the GeoTag-X project formatter tool.
+# It contains functions that help keep track of projects that have already been
+# formatted so that they can be skipped.
+#
+# Author: Jeremy Othieno (j.othieno@gmail.com)
+#
+# Copyright (c) 2017 UNITAR/UNOSAT
+#
+# The MIT License (MIT)
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# The cache is a directory that contains one empty file per entry. An entry's
+# name is a digest of the tool's version and the content of a project's
+# configuration files, as they were after the project was formatted. If the
+# digest of a project's current configuration files matches an entry, the
+# project is already formatted and can be skipped. An entry's modification time
+# is updated each time it is hit, which allows the least recently used entries
+# to be evicted when the cache grows too large.
+from geotagx_validator.helper import check_arg_type
+import os
+
+def get_default_cache_directory():
+    """Returns the path to the default cache directory.
+
+    Returns:
+        basestring: The path to the default cache directory.
+    """
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(root, "geotagx-formatter")
+
+
+def get_cache_key(path, salt=""):
+    """Computes the cache key of the project located at the specified path.
+
+    Args:
+        path (basestring): A path to a project directory.
+        salt (basestring): Additional data used to compute the key, e.g. a set of
+            options that affect how a project is formatted.
+
+    Returns:
+        basestring: The project's cache key.
+
+    Raises:
+        TypeError: If either the path or salt argument is not a basestring.
+    """
+    check_arg_type(get_cache_key, "path", path, basestring)
+    check_arg_type(get_cache_key, "salt", salt, basestring)
+
+    from __init__ import __version__
+    from helper import get_configuration_filenames
+    from hashlib import sha1
+
+    digest = sha1()
+    digest.update("{}\0{}\0".format(__version__, salt))
+    for key, filename in sorted(get_configuration_filenames(path).iteritems()):
+        digest.update("{}\0".format(key))
+        try:
+            with open(filename, "rb") as file:
+                digest.update("{}\0".format(os.fstat(file.fileno()).st_size))
+                for chunk in iter(lambda: file.read(get_cache_key.CHUNK_SIZE), ""):
+                    digest.update(chunk)
+        except IOError:
+            # A missing configuration file is part of the project's state too.
+            digest.update("-\0")
+
+    return digest.hexdigest()
+
+
+get_cache_key.CHUNK_SIZE = 1 << 20
+"""The number of bytes read at a time when computing a cache key."""
+
+
+def is_cached(key, directory):
+    """Checks whether the specified key is in the cache.
+
+    If the key is found, its entry is marked as the most recently used.
+
+    Args:
+        key (basestring): The key to look up.
+        directory (basestring): A path to the cache directory.
+
+    Returns:
+        bool: True if the key is in the cache, False otherwise.
+
+    Raises:
+        TypeError: If either the key or directory argument is not a basestring.
+    """
+    check_arg_type(is_cached, "key", key, basestring)
+    check_arg_type(is_cached, "directory", directory, basestring)
+
+    try:
+        os.utime(os.path.join(directory, key), None)
+        return True
+    except OSError:
+        return False
+
+
+def add_to_cache(key, directory):
+    """Adds the specified key to the cache.
+
+    Args:
+        key (basestring): The key to add.
+        directory (basestring): A path to the cache directory. If the directory
+            does not exist, it is created.
+
+    Raises:
+        TypeError: If either the key or directory argument is not a basestring.
+        IOError: If the key could not be written to the cache.
+    """
+    check_arg_type(add_to_cache, "key", key, basestring)
+    check_arg_type(add_to_cache, "directory", directory, basestring)
+
+    try:
+        os.makedirs(directory)
+    except OSError:
+        if not os.path.isdir(directory):
+            raise IOError("The cache directory '{}' could not be created.".format(directory))
+
+    open(os.path.join(directory, key), "a").close()
+
+
+def evict(directory, size):
+    """Removes the least recently used entries until the cache holds at most
+    the specified number of entries.
+
+    Args:
+        directory (basestring): A path to the cache directory.
+        size (int): The maximum number of entries the cache may hold.
+
+    Returns:
+        int: The number of entries that were removed.
+
+    Raises:
+        TypeError: If the directory argument is not a basestring, or size is not an integer.
+    """
+    check_arg_type(evict, "directory", directory, basestring)
+    check_arg_type(evict, "size", size, int)
+
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return 0
+
+    if len(names) <= size:
+        return 0
+
+    entries = []
+    for name in names:
+        try:
+            entries.append((os.path.getmtime(os.path.join(directory, name)), name))
+        except OSError:
+            pass # The entry was removed by another process.
+
+    entries.sort()
+    removed = 0
+    for _, name in entries[:max(len(entries) - size, 0)]:
+        try:
+            os.remove(os.path.join(directory, name))
+            removed += 1
+        except OSError:
+            pass
+
+    return removed
@@ -26,42 +26,209 @@
 # OR OTHER DEALINGS IN THE SOFTWARE.
 from geotagx_validator.helper import check_arg_type
 
-def format_configuration_set(configuration_set, validate_configuration_set=True):
+def format_configuration_set(
+    configuration_set,
+    validate_configuration_set=True,
+    tutorial_processes=1,
+    tutorial_chunk_size=256,
+    copy_on_write=False
+):
     """Formats the specified set of project configurations.
 
+    The configuration set is validated once, before any of its configurations is
+    formatted. Each formatter is then run without validation and only ever
+    rewrites a valid value into an equivalent normalized form, which means the
+    formatted set is guaranteed to be valid and does not need to be validated
+    again, e.g. when it is serialized.
+
+    Note that validating and formatting are two separate passes over the set.
+    The set is validated by geotagx_validator.core.is_configuration_set as it
+    is, rather than node by node as it is formatted, so that it is subject to
+    every check the validator makes, including those that involve more than
+    one node, and fails with the validator's own error messages.
+
+    By default, the configuration set is formatted in place. In copy-on-write
+    mode, it is left unchanged and a formatted copy is returned instead, which
+    shares every configuration, field, question or subject that did not need
+    to be formatted with the original, rather than a deep copy of it.
+
     Args:
         configurations (dict): A dictionary containing a set of configurations to format.
         validate_configuration_set (bool): If set to True, the configurations will be
             validated before they are processed.
+        tutorial_processes (int): The number of worker processes used to format the
+            tutorial's subjects. If set to 1, the subjects are formatted in the current
+            process. If set to 0, one worker process is created per available CPU.
+        tutorial_chunk_size (int): The number of tutorial subjects sent to a worker
+            process at a time.
+        copy_on_write (bool): If set to True, the configuration set is left unchanged
+            and a formatted copy of it is returned instead.
 
     Returns:
         dict: A formatted set of project configurations.
 
     Raises:
-        TypeError: If the configuration_set argument is not a dictionary.
+        TypeError: If the configuration_set argument is not a dictionary,
+            validate_configuration_set and copy_on_write are not booleans, or
+            tutorial_processes and tutorial_chunk_size are not integers.
         ValueError: If the specified configuration set is invalid.
     """
     check_arg_type(format_configuration_set, "configuration_set", configuration_set, dict)
     check_arg_type(format_configuration_set, "validate_configuration_set", validate_configuration_set, bool)
+    check_arg_type(format_configuration_set, "tutorial_processes", tutorial_processes, int)
+    check_arg_type(format_configuration_set, "tutorial_chunk_size", tutorial_chunk_size, int)
+    check_arg_type(format_configuration_set, "copy_on_write", copy_on_write, bool)
+
+    return _format_configuration_set(
+        configuration_set,
+        validate_configuration_set,
+        tutorial_processes,
+        tutorial_chunk_size,
+        copy_on_write
+    )
+
+
+def format_configuration_sets(
+    configuration_sets,
+    validate_configuration_sets=True,
+    processes=1,
+    tutorial_processes=1,
+    tutorial_chunk_size=256,
+    copy_on_write=False
+):
+    """Formats each of the specified sets of project configurations.
 
-    from project import format_project_configuration
-    from task_presenter import format_task_presenter_configuration
-    from tutorial import format_tutorial_configuration
-    from geotagx_validator.core import is_configuration_set
+    The configuration sets are read from the iterable as the results are consumed,
+    so an iterable that produces its configuration sets lazily is never loaded in
+    memory in full. A configuration set that cannot be formatted does not prevent
+    the remaining ones from being formatted.
+
+    Args:
+        configuration_sets (iterable): The configuration sets to format.
+        validate_configuration_sets (bool): If set to True, each configuration set
+            will be validated before it is formatted.
+        processes (int): The number of worker processes used to format the configuration
+            sets. If set to 1, the configuration sets are formatted in the current
+            process. If set to 0, one worker process is created per available CPU.
+        tutorial_processes (int): The number of worker processes used to format each
+            tutorial's subjects. This has no effect if processes is not 1.
+        tutorial_chunk_size (int): The number of tutorial subjects sent to a worker
+            process at a time.
+        copy_on_write (bool): If set to True, each configuration set is left unchanged
+            and a formatted copy of it is returned instead. This has no effect on
+            configuration sets formatted by worker processes, which are copies.
+
+    Returns:
+        iterator: A (configuration_set, error) pair for each configuration set, in
+            the same order as the iterable. If a configuration set was successfully
+            formatted, configuration_set is the formatted set and error is None.
+            Otherwise configuration_set is None and error is the exception that
+            prevented it from being formatted.
+
+    Raises:
+        TypeError: If validate_configuration_sets and copy_on_write are not booleans,
+            or processes, tutorial_processes and tutorial_chunk_size are not integers.
+    """
+    check_arg_type(format_configuration_sets, "validate_configuration_sets", validate_configuration_sets, bool)
+    check_arg_type(format_configuration_sets, "processes", processes, int)
+    check_arg_type(format_configuration_sets, "tutorial_processes", tutorial_processes, int)
+    check_arg_type(format_configuration_sets, "tutorial_chunk_size", tutorial_chunk_size, int)
+    check_arg_type(format_configuration_sets, "copy_on_write", copy_on_write, bool)
+
+    from helper import imap_parallel
+
+    jobs = (
+        (c, validate_configuration_sets, tutorial_processes, tutorial_chunk_size, copy_on_write)
+        for c in configuration_sets
+    )
+    return imap_parallel(__format_configuration_set_job, jobs, processes)
+
+
+def __format_configuration_set_job(job):
+    """Formats a configuration set on behalf of format_configuration_sets.
+
+    This function may be executed by worker processes which is why it never
+    raises: any error is returned to the caller instead.
+
+    Args:
+        job (tuple): A (configuration_set, validate, tutorial_processes, tutorial_chunk_size,
+            copy_on_write) tuple where validate is True if the configuration set should
+            be validated.
+
+    Returns:
+        tuple: A (configuration_set, error) pair.
+    """
+    configuration_set, validate, tutorial_processes, tutorial_chunk_size, copy_on_write = job
+    try:
+        check_arg_type(format_configuration_sets, "configuration_set", configuration_set, dict)
+        return _format_configuration_set(configuration_set, validate, tutorial_processes, tutorial_chunk_size, copy_on_write), None
+    except Exception as e:
+        from helper import _picklable_exception
+        return None, _picklable_exception(e)
+
+
+def _format_configuration_set(
+    configuration_set,
+    validate_configuration_set,
+    tutorial_processes,
+    tutorial_chunk_size,
+    copy_on_write=False
+):
+    """Formats the specified set of project configurations.
+
+    Unlike format_configuration_set, this function does not check its arguments.
+
+    Args:
+        configuration_set (dict): A dictionary containing a set of configurations to format.
+        validate_configuration_set (bool): If set to True, the configurations will be
+            validated before they are processed.
+        tutorial_processes (int): The number of worker processes used to format the
+            tutorial's subjects.
+        tutorial_chunk_size (int): The number of tutorial subjects sent to a worker
+            process at a time.
+        copy_on_write (bool): If set to True, the configuration set is left unchanged
+            and a formatted copy of it is returned instead.
+
+    Returns:
+        dict: A formatted set of project configurations.
+
+    Raises:
+        ValueError: If the specified configuration set is invalid.
+    """
+    from instrumentation import stage
+    from helper import _CopyOnWrite, _interning
 
     if validate_configuration_set:
-        valid, message = is_configuration_set(configuration_set)
+        from geotagx_validator.core import is_configuration_set
+        with stage("validate"):
+            valid, message = is_configuration_set(configuration_set)
         if not valid:
             raise ValueError(message)
 
-    formatters = {
-        "project": format_project_configuration,
-        "task_presenter": format_task_presenter_configuration,
-        "tutorial": lambda c, v: format_tutorial_configuration(c, configuration_set["task_presenter"], v, False),
-    }
-    for key, configuration in configuration_set.iteritems():
-        formatter = formatters.get(key, None)
-        if formatter:
-            configuration = formatter(configuration, False)
-
-    return configuration_set
+    # The task presenter is formatted before the tutorial since the tutorial
+    # depends on its language configuration. A formatter is only loaded if the
+    # set contains the configuration it formats.
+    writer = _CopyOnWrite(configuration_set, copy_on_write)
+    with _interning():
+        if "project" in configuration_set:
+            from project import _format_project_configuration
+            with stage("format.project"):
+                writer.set("project", _format_project_configuration(configuration_set["project"], copy_on_write))
+
+        if "task_presenter" in configuration_set:
+            from task_presenter import _format_task_presenter_configuration
+            with stage("format.task_presenter"):
+                writer.set("task_presenter", _format_task_presenter_configuration(configuration_set["task_presenter"], copy_on_write))
+
+        if "tutorial" in configuration_set:
+            from tutorial import _format_tutorial_configuration
+            with stage("format.tutorial"):
+                writer.set("tutorial", _format_tutorial_configuration(
+                    configuration_set["tutorial"],
+                    writer.container["task_presenter"]["language"],
+                    tutorial_processes,
+                    tutorial_chunk_size,
+                    copy_on_write
+                ))
+
+    return writer.container
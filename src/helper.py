@@ -26,6 +26,7 @@
 # OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
 # OR OTHER DEALINGS IN THE SOFTWARE.
 from geotagx_validator.helper import check_arg_type
+import threading
 
 def to_json_string(dictionary, compress=False):
     """Converts the specified dictionary into a string in JSON format.
@@ -44,15 +45,95 @@ def to_json_string(dictionary, compress=False):
     check_arg_type(to_json_string, "dictionary", dictionary, dict)
     check_arg_type(to_json_string, "compress", compress, bool)
 
-    from json import dumps
-    output = dumps(
-        dictionary,
-        indent=0 if compress else 4,
+    return "".join(iter_json_string(dictionary, compress))
+
+
+def iter_json_string(dictionary, compress=False):
+    """Converts the specified dictionary into a string in JSON format, one chunk at a time.
+
+    Joining the chunks produces the exact same string as to_json_string but,
+    unlike to_json_string, the whole string never needs to be held in memory,
+    which is what makes it possible to write very large configurations to a file.
+
+    A compressed string is produced one member of the dictionary, or one item of
+    a member that is a list, e.g. a tutorial subject, at a time. Each of them is
+    converted in a single call to the encoder, which is several times faster than
+    converting the dictionary one tiny fragment at a time.
+
+    Args:
+        dictionary (dict): A dictionary to convert.
+        compress (bool): If set to True, the string will be compressed
+            as much as possible.
+
+    Returns:
+        iterator: The UTF-8 encoded chunks of a string in JSON format.
+
+    Raises:
+        TypeError: If dictionary argument is not a dict, or compress is not a bool.
+    """
+    check_arg_type(iter_json_string, "dictionary", dictionary, dict)
+    check_arg_type(iter_json_string, "compress", compress, bool)
+
+    if compress:
+        from stream import iter_json_object_string
+        members = ((k, v, isinstance(v, list)) for k, v in dictionary.iteritems())
+        return iter_json_object_string(members, compress)
+    else:
+        return group_chunks(get_json_encoder(compress).iterencode(dictionary))
+
+
+def get_json_encoder(compress=False):
+    """Returns the JSON encoder used to serialize configurations.
+
+    Args:
+        compress (bool): If set to True, the encoder produces strings that are
+            compressed as much as possible.
+
+    Returns:
+        json.JSONEncoder: A JSON encoder.
+    """
+    from json import JSONEncoder
+
+    # A compressed string has no line breaks, and an indentation of None is
+    # the only one that does not produce any. The encoding is spelled exactly
+    # as the encoder's default since any other spelling, even "UTF-8", makes
+    # it convert strings with a slower, pure Python function.
+    return JSONEncoder(
+        indent=None if compress else 4,
         separators=(",", ":" if compress else ": "),
-        encoding="UTF-8",
+        encoding="utf-8",
         ensure_ascii=False
-    ).encode("UTF-8")
-    return output.replace("\n", "") if compress else output
+    )
+
+
+def group_chunks(fragments):
+    """Encodes the specified string fragments in UTF-8 and groups them into larger chunks.
+
+    A JSON encoder produces a great number of tiny fragments, which are grouped
+    so that they can be written efficiently.
+
+    Args:
+        fragments (iterable): The fragments to group.
+
+    Returns:
+        iterator: The UTF-8 encoded chunks.
+    """
+    buffer, buffer_size = [], 0
+    for fragment in fragments:
+        if isinstance(fragment, unicode):
+            fragment = fragment.encode("UTF-8")
+        buffer.append(fragment)
+        buffer_size += len(fragment)
+        if buffer_size >= group_chunks.CHUNK_SIZE:
+            yield "".join(buffer)
+            buffer, buffer_size = [], 0
+
+    if buffer:
+        yield "".join(buffer)
+
+
+group_chunks.CHUNK_SIZE = 1 << 16
+"""The approximate size of each chunk, in bytes."""
 
 
 def normalize_string(string, language_code):
@@ -75,9 +156,7 @@ def normalize_string(string, language_code):
     check_arg_type(normalize_string, "string", string, basestring)
     check_arg_type(normalize_string, "language_code", language_code, basestring)
 
-    from geotagx_validator.helper import is_language_code
-
-    if not is_language_code(language_code):
+    if not __is_language_code(language_code):
         raise ValueError("'{}' is not a valid language code.".format(language_code))
 
     return {language_code: string}
@@ -90,6 +169,13 @@ def normalize_configuration_string(configuration_string, default_language):
     exception: since a configuration string can be either a basestring or
     dictionary object, only the basestring instance will be normalized.
 
+    Within the scope of a call to a formatter, i.e. while _interning is in effect,
+    the language code and string of a normalized string are interned: the same
+    string normalized with the same language code, e.g. every option labelled
+    "Yes", is represented by the same language code and string objects, which
+    are immutable. Each normalized string is a dictionary of its own though,
+    so modifying one never affects another.
+
     Args:
         configuration_string (basestring|dict): The configuration string to normalize.
         default_language (basestring): A language code that the string will be associated with.
@@ -102,17 +188,456 @@ def normalize_configuration_string(configuration_string, default_language):
             dictionary, or default_language is not a string.
         ValueError: If the configuration_string argument is invalid.
     """
-    from geotagx_validator.helper import is_configuration_string
-
-    if not is_configuration_string(configuration_string):
+    if not __is_configuration_string(configuration_string):
         raise ValueError("A configuration string must be a non-empty or normalized string.")
     elif isinstance(configuration_string, basestring):
-        return normalize_string(configuration_string, default_language)
+        key = (default_language, configuration_string)
+        interned = getattr(__INTERNED, "strings", None)
+        if interned is None:
+            return __normalize_string(key)
+
+        # The table holds the first normalized string, which is never returned,
+        # and each occurrence gets a copy that shares its key and value.
+        return dict(__memoize(interned, key, __normalize_string, key))
     else:
         return configuration_string
 
 
-def serialize_configuration_set(configuration_set, path, overwrite=False):
+def _normalize_configuration_strings(configuration_strings, default_language):
+    """Normalizes each of the specified configuration strings in a single pass.
+
+    This is equivalent to normalizing each string with normalize_configuration_string,
+    but the default language is validated, and the current thread's table of
+    interned strings looked up, once for the whole batch rather than once per string.
+
+    Args:
+        configuration_strings (list): The configuration strings to normalize.
+        default_language (basestring): A language code that the strings will be associated with.
+
+    Returns:
+        list: The normalized strings, in the same order.
+
+    Raises:
+        TypeError: If default_language is not a string, and one of the configuration
+            strings needs to be associated with it.
+        ValueError: If one of the configuration strings, or the default language, is invalid.
+    """
+    interned = getattr(__INTERNED, "strings", None)
+    language_checked = False
+    normalized = []
+    for configuration_string in configuration_strings:
+        if not __is_configuration_string(configuration_string):
+            raise ValueError("A configuration string must be a non-empty or normalized string.")
+        elif not isinstance(configuration_string, basestring):
+            normalized.append(configuration_string)
+            continue
+
+        if not language_checked:
+            check_arg_type(_normalize_configuration_strings, "default_language", default_language, basestring)
+            if not __is_language_code(default_language):
+                raise ValueError("'{}' is not a valid language code.".format(default_language))
+            language_checked = True
+
+        if interned is None:
+            normalized.append({default_language: configuration_string})
+        else:
+            key = (default_language, configuration_string)
+            normalized.append(dict(__memoize(interned, key, __normalize_string, key)))
+
+    return normalized
+
+
+def _interning():
+    """Returns a context manager within which the strings normalized by the current
+    thread are interned, and the lists of options it formats are memoized.
+
+    Each formatter that returns a configuration interns the strings it normalizes,
+    and memoizes the lists of options it formats, in tables of its own, which are
+    discarded once it returns, so the interned strings and memoized lists are only
+    shared by the configuration it returns. A formatter called by another, e.g.
+    by core.format_configuration_set, uses its caller's tables.
+
+    Returns:
+        object: A context manager.
+    """
+    from contextlib import contextmanager
+    return contextmanager(__interning)()
+
+
+def __interning():
+    """Interns the strings normalized, memoizes the validation of strings and language
+    codes, and memoizes the lists of options formatted, by the current thread until
+    the generator is resumed."""
+    if getattr(__INTERNED, "strings", None) is not None:
+        yield
+        return
+
+    tables = {name: __Cache() for name in __CACHES}
+    __INTERNED.strings = tables["normalized_string"]
+    __INTERNED.language_codes = tables["language_code"]
+    __INTERNED.configuration_strings = tables["configuration_string"]
+    __INTERNED.options = {}
+    try:
+        yield
+    finally:
+        __INTERNED.strings = __INTERNED.language_codes = __INTERNED.configuration_strings = None
+        __INTERNED.options = None
+        # The tables are discarded, but their statistics are accumulated.
+        for name, table in tables.iteritems():
+            statistics = __CACHES[name]
+            statistics.hits += table.hits
+            statistics.misses += table.misses
+            statistics.peak_size = max(statistics.peak_size, len(table))
+
+
+def _interned_options():
+    """Returns the current thread's table of formatted lists of options, mapped to
+    a key that identifies their content, if _interning is in effect.
+
+    Returns:
+        dict|None: The table, or None if _interning is not in effect.
+    """
+    return getattr(__INTERNED, "options", None)
+
+
+def get_cache_statistics():
+    """Returns the statistics of the caches used to validate and intern strings during normalization.
+
+    Each call to a formatter has caches of its own (see _interning), so the
+    statistics are accumulated over every call that has returned.
+
+    Returns:
+        dict: A dictionary mapping each cache's name to its number of hits and
+            misses, and the largest number of entries it held during a call.
+    """
+    return {
+        name: {
+            "hits": cache.hits,
+            "misses": cache.misses,
+            "peak_size": cache.peak_size,
+        }
+        for name, cache in __CACHES.iteritems()
+    }
+
+
+def clear_caches():
+    """Resets the statistics of the caches used to validate and intern strings during normalization."""
+    for cache in __CACHES.itervalues():
+        cache.hits = cache.misses = cache.peak_size = 0
+
+
+class __Cache(dict):
+    """A dictionary that counts the number of times it's been hit and missed."""
+    hits = 0
+    misses = 0
+    peak_size = 0
+
+    SIZE = 1 << 16
+    """The maximum number of entries a cache may hold."""
+
+
+__CACHES = {
+    "language_code": __Cache(),
+    "configuration_string": __Cache(),
+    "normalized_string": __Cache(),
+}
+"""The statistics of the caches used to validate and intern strings during
+normalization. The caches themselves are the current thread's tables, which only
+last as long as a call to a formatter, so that a long-running process such as the
+daemon does not hold on to every string it has ever validated."""
+
+__WORKER_POOL = threading.local()
+"""The current thread's pool of worker processes, if any, in its pool attribute."""
+
+__INTERNED = threading.local()
+"""The current thread's tables, if any: the interned strings in its strings attribute,
+the validated language codes and configuration strings in its language_codes and
+configuration_strings attributes, and the formatted lists of options in its options
+attribute."""
+
+
+def __memoize(cache, key, function, argument):
+    """Returns the result of the function applied to the argument, as stored in the
+    cache under the specified key, and computes and stores it if it isn't.
+
+    Args:
+        cache (__Cache): The cache to look up.
+        key (hashable): The key the result is stored under.
+        function (function): The function whose result is cached.
+        argument (object): The argument the function is applied to.
+
+    Returns:
+        object: The result of the function.
+    """
+    try:
+        result = cache[key]
+        cache.hits += 1
+    except KeyError:
+        cache.misses += 1
+        result = function(argument)
+        if len(cache) >= __Cache.SIZE:
+            cache.clear()
+        cache[key] = result
+
+    return result
+
+
+def __normalize_string(key):
+    """Normalizes the string in the specified (language code, string) pair.
+
+    Args:
+        key (tuple): A (language_code, string) pair.
+
+    Returns:
+        dict: The normalized string.
+    """
+    language_code, string = key
+    return normalize_string(string, language_code)
+
+
+def __is_language_code(language_code):
+    """A memoized version of geotagx_validator.helper.is_language_code, while _interning is in effect."""
+    from geotagx_validator.helper import is_language_code
+
+    cache = getattr(__INTERNED, "language_codes", None)
+    if cache is None:
+        return is_language_code(language_code)
+
+    return __memoize(cache, language_code, is_language_code, language_code)
+
+
+def __is_configuration_string(configuration_string):
+    """A memoized version of geotagx_validator.helper.is_configuration_string, while
+    _interning is in effect.
+
+    A normalized string with a single translation, which is by far the most common,
+    is cached under its (language code, string) pair, which is cheap to build. Any
+    other normalized string is not cached.
+    """
+    from geotagx_validator.helper import is_configuration_string
+
+    cache = getattr(__INTERNED, "configuration_strings", None)
+    if cache is None:
+        return is_configuration_string(configuration_string)
+
+    key = configuration_string
+    if isinstance(configuration_string, dict):
+        if len(configuration_string) != 1:
+            return is_configuration_string(configuration_string)
+
+        key = next(configuration_string.iteritems())
+        if not isinstance(key[1], basestring):
+            return is_configuration_string(configuration_string)
+    elif not isinstance(configuration_string, basestring):
+        return is_configuration_string(configuration_string)
+
+    return __memoize(cache, key, is_configuration_string, configuration_string)
+
+
+class _CopyOnWrite(object):
+    """Assigns the fields of a dictionary, or the items of a list, on behalf of a formatter.
+
+    By default, the container is modified in place. In copy-on-write mode, the
+    container is left untouched and is only copied, once, when a field is set to
+    a different value, so that a formatter returns the original container if it
+    did not need to change it, and a shallow copy that shares every unchanged
+    field with the original otherwise.
+    """
+    __slots__ = ("container", "writable")
+
+    def __init__(self, container, copy_on_write=False):
+        """Prepares the specified container to be modified.
+
+        Args:
+            container (dict|list): The container to modify.
+            copy_on_write (bool): If set to True, the container is copied before
+                it is first modified.
+        """
+        self.container = container
+        self.writable = not copy_on_write
+
+    def set(self, key, value):
+        """Sets the value of the specified field or item."""
+        if not self.writable:
+            try:
+                if self.container[key] is value:
+                    return
+            except KeyError:
+                pass
+
+            container = self.container
+            self.container = container.copy() if isinstance(container, dict) else list(container)
+            self.writable = True
+
+        self.container[key] = value
+
+    def setdefault(self, key, value):
+        """Sets the value of the specified field, unless it is already set."""
+        if key not in self.container:
+            self.set(key, value)
+
+
+def imap_parallel(function, iterable, processes=1):
+    """Applies the function to each item in the iterable, possibly in parallel.
+
+    Items are read from the iterable as the results are consumed, and at most
+    two items per worker process are being processed at any given time, so an
+    iterable that produces its items lazily is never loaded in memory in full.
+
+    Args:
+        function (function): The function to apply. It must be defined at module level
+            if processes is not 1 since it will be sent to worker processes.
+        iterable (iterable): The items to process.
+        processes (int): The number of worker processes to use. If set to 1, the
+            items are processed in the current process. If set to 0, one worker
+            process is created per available CPU. Within the scope of _worker_pool,
+            the items are sent to the current thread's pool instead, which should
+            have this many worker processes.
+
+    Returns:
+        iterator: The results, in the same order as the items in the iterable.
+    """
+    from collections import deque
+    from itertools import imap
+    import multiprocessing
+
+    if processes == 0:
+        processes = multiprocessing.cpu_count()
+
+    # A pool's worker processes are daemonic and are not allowed to create
+    # worker processes of their own, so they process their items themselves.
+    if processes <= 1 or multiprocessing.current_process().daemon:
+        for result in imap(function, iterable):
+            yield result
+    else:
+        shared_pool = getattr(__WORKER_POOL, "pool", None)
+        pool = shared_pool or multiprocessing.Pool(processes)
+        try:
+            pending = deque()
+            for item in iterable:
+                pending.append(pool.apply_async(function, (item,)))
+                if len(pending) >= 2 * processes:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+            if shared_pool is None:
+                pool.close()
+        except:
+            if shared_pool is None:
+                pool.terminate()
+            raise
+        finally:
+            if shared_pool is None:
+                pool.join()
+
+
+def _worker_pool(pool):
+    """Returns a context manager within which imap_parallel sends the current thread's
+    items to the specified pool of worker processes, rather than to a pool of its own.
+
+    A pool should be created by the main thread, before any other thread is
+    started, since forking a process while other threads hold locks may leave
+    the child process deadlocked. The pool is neither closed nor terminated.
+
+    Args:
+        pool (multiprocessing.Pool): The pool of worker processes to use, or None
+            to let imap_parallel create a pool of its own.
+
+    Returns:
+        object: A context manager.
+    """
+    from contextlib import contextmanager
+    return contextmanager(__worker_pool)(pool)
+
+
+def __worker_pool(pool):
+    """Sets the current thread's pool of worker processes until the generator is resumed."""
+    previous = getattr(__WORKER_POOL, "pool", None)
+    __WORKER_POOL.pool = pool
+    try:
+        yield
+    finally:
+        __WORKER_POOL.pool = previous
+
+
+def _picklable_exception(exception):
+    """Returns an exception that can safely be sent across process boundaries.
+
+    Exceptions that cannot be pickled would otherwise stall the worker pool's
+    result handler, so they are converted into an Exception with the same message.
+
+    Args:
+        exception (Exception): The exception to convert.
+
+    Returns:
+        Exception: The original exception if it can be pickled, a copy of its message otherwise.
+    """
+    import cPickle as pickle
+    try:
+        pickle.loads(pickle.dumps(exception, pickle.HIGHEST_PROTOCOL))
+        return exception
+    except Exception:
+        return Exception("{}: {}".format(type(exception).__name__, exception))
+
+
+def deserialize_configuration(filename):
+    """Reads the configuration stored in the specified JSON file.
+
+    Args:
+        filename (basestring): The name of the file to read.
+
+    Returns:
+        dict: The configuration.
+
+    Raises:
+        TypeError: If the filename argument is not a basestring.
+        IOError: If the file could not be read.
+        ValueError: If the file does not contain a JSON object.
+    """
+    check_arg_type(deserialize_configuration, "filename", filename, basestring)
+
+    from json import load
+    with open(filename, "rb") as file:
+        configuration = load(file, encoding="UTF-8")
+
+    if not isinstance(configuration, dict):
+        raise ValueError("The file '{}' does not contain a configuration.".format(filename))
+
+    return configuration
+
+
+def get_configuration_filenames(path):
+    """Returns the names of the configuration files in the specified project directory.
+
+    Args:
+        path (basestring): A path to a project directory.
+
+    Returns:
+        dict: A dictionary mapping each configuration key to its file name.
+
+    Raises:
+        TypeError: If the path argument is not a basestring.
+    """
+    check_arg_type(get_configuration_filenames, "path", path, basestring)
+
+    import os
+    return {
+        "project": os.path.join(path, "project.json"),
+        "task_presenter": os.path.join(path, "task_presenter.json"),
+        "tutorial": os.path.join(path, "tutorial.json"),
+    }
+
+
+def serialize_configuration_set(
+    configuration_set,
+    path,
+    overwrite=False,
+    validate_configuration_set=True,
+    sync=True,
+    compress=False,
+    gzip=False,
+    binary=False
+):
     """Writes each of the specified configurations to their respective JSON files.
 
     Args:
@@ -121,35 +646,645 @@ def serialize_configuration_set(configuration_set, path, overwrite=False):
             be written.
         overwrite (bool): If set to True, any pre-existing configuration files
             will be overwritten.
+        validate_configuration_set (bool): If set to True, the configurations will be
+            validated before they are written. A configuration set returned by
+            core.format_configuration_set is valid by construction so there is no
+            need to validate it a second time.
+        sync (bool): If set to True, the files are flushed to disk before this function
+            returns. If set to False, it is up to the caller to flush them later, e.g. by
+            passing the path to sync_directories.
+        compress (bool): If set to True, the files are compressed as much as possible.
+        gzip (bool): If set to True, a gzip-compressed copy of each file is written
+            next to it, e.g. project.json.gz, for web servers that serve precompressed files.
+        binary (bool): If set to True, a copy of each file in the MessagePack format is
+            written next to it, e.g. project.msgpack, which binary.load_binary_configuration
+            loads much faster than the JSON file. This requires msgpack.
+
+    Returns:
+        int: The number of files written.
 
     Raises:
         TypeError: If the configuration_set argument is not a dictionary, path is not a
-            basestring, or overwrite is not a boolean.
+            basestring, or either overwrite, validate_configuration_set, sync, compress,
+            gzip or binary is not a boolean.
         ValueError: If the specified configuration set is not valid.
         IOError: If the specified path does not lead to a writable directory.
     """
     check_arg_type(serialize_configuration_set, "configuration_set", configuration_set, dict)
     check_arg_type(serialize_configuration_set, "path", path, basestring)
     check_arg_type(serialize_configuration_set, "overwrite", overwrite, bool)
+    check_arg_type(serialize_configuration_set, "validate_configuration_set", validate_configuration_set, bool)
+    check_arg_type(serialize_configuration_set, "sync", sync, bool)
+    check_arg_type(serialize_configuration_set, "compress", compress, bool)
+    check_arg_type(serialize_configuration_set, "gzip", gzip, bool)
+    check_arg_type(serialize_configuration_set, "binary", binary, bool)
 
     from geotagx_validator.core import is_configuration_set
     from geotagx_validator.helper import is_directory
     import os
 
-    valid, message = is_configuration_set(configuration_set)
-    if not valid:
-        raise ValueError(message)
-    elif not is_directory(path, check_writable=True):
+    if validate_configuration_set:
+        valid, message = is_configuration_set(configuration_set)
+        if not valid:
+            raise ValueError(message)
+
+    if not is_directory(path, check_writable=True):
         raise IOError("The path '{}' is not a writable directory. Please make sure you have the appropriate access permissions.".format(path))
 
-    filename = {
-        "project": os.path.join(path, "project.json"),
-        "task_presenter": os.path.join(path, "task_presenter.json"),
-        "tutorial": os.path.join(path, "tutorial.json"),
-    }
+    filename = get_configuration_filenames(path)
     if not overwrite and any(os.path.isfile(f) for f in filename.values()):
         raise IOError("The directory '{}' already contains a project (project.json), task presenter (task_presenter.json) and/or a tutorial (tutorial.json) configuration. To overwrite either, set the '-f' or '--force' flag.".format(path))
 
+    written = 0
     for key, configuration in configuration_set.iteritems():
-        with open(filename[key], "w") as file:
-            file.write(to_json_string(configuration))
+        data = iter_json_string(configuration, compress)
+        written += len(write_configuration_file(filename[key], data, configuration, sync, gzip, binary))
+
+    return written
+
+
+def write_configuration_file(filename, data, value=None, sync=True, gzip=False, binary=False):
+    """Writes the specified data to a configuration file and, if requested, to a
+    gzip-compressed copy and a binary copy of the file.
+
+    The files are written with write_file, which leaves a file untouched if it
+    already contains its data. The gzip-compressed copy, whose name is the file's
+    followed by .gz, is compressed from the file once it is written, so that it
+    matches the file even if the file was left untouched. It contains neither a
+    modification time nor a file name so that the same file is always compressed
+    into the same bytes. The binary copy, whose name is returned by
+    binary.get_binary_filename, is converted from the value, which is already
+    in memory, and loads to what the file deserializes to. Like the file, it is
+    left untouched if it already loads to the value, even if the keys of its
+    objects are stored in a different order.
+
+    Args:
+        filename (basestring): The name of the file to write.
+        data (str|iterable): The data to write, or an iterable of chunks of data.
+        value (object): If specified, the value that data is the JSON representation of.
+        sync (bool): If set to True, the data is flushed to disk before this function returns.
+        gzip (bool): If set to True, the gzip-compressed copy is written too.
+        binary (bool): If set to True, the binary copy is written too, which
+            requires the value.
+
+    Returns:
+        list: The names of the files that were written.
+
+    Raises:
+        TypeError: If the filename argument is not a basestring, data is neither a
+            str nor an iterable, or either sync, gzip or binary is not a boolean.
+        ValueError: If a binary copy is requested without the value.
+        IOError: If a file could not be written.
+        ImportError: If a binary copy is requested and msgpack is not installed.
+    """
+    check_arg_type(write_configuration_file, "gzip", gzip, bool)
+    check_arg_type(write_configuration_file, "binary", binary, bool)
+    if binary and value is None:
+        raise ValueError("A binary copy of a configuration file requires the configuration.")
+
+    written = []
+    if write_file(filename, data, value, sync):
+        written.append(filename)
+
+    if gzip:
+        with open(filename, "rb") as file:
+            chunks = iter(lambda: file.read(write_file.CHUNK_SIZE), "")
+            if write_file(filename + ".gz", __iter_compressed_chunks(chunks), sync=sync):
+                written.append(filename + ".gz")
+
+    if binary:
+        from binary import get_binary_filename, to_binary_string
+
+        binary_filename = get_binary_filename(filename)
+        if not __binary_file_contains(binary_filename, value) and write_file(binary_filename, to_binary_string(value), sync=sync):
+            written.append(binary_filename)
+
+    return written
+
+
+def find_stale_files(filename, data, value=None, gzip=False, binary=False):
+    """Returns the files that write_configuration_file would write, without writing them.
+
+    Args:
+        filename (basestring): The name of the file to check.
+        data (str|iterable): The expected content, or an iterable of chunks of it.
+        value (object): If specified, the value that data is the JSON representation of.
+        gzip (bool): If set to True, the gzip-compressed copy of the file is checked too.
+        binary (bool): If set to True, the binary copy of the file is checked too,
+            which requires the value.
+
+    Returns:
+        list: The names of the files that do not contain their expected data.
+
+    Raises:
+        TypeError: If the filename argument is not a basestring, data is neither a
+            str nor an iterable, or either gzip or binary is not a boolean.
+        ValueError: If the binary copy is checked without the value.
+        ImportError: If the binary copy is checked and msgpack is not installed.
+    """
+    check_arg_type(find_stale_files, "gzip", gzip, bool)
+    check_arg_type(find_stale_files, "binary", binary, bool)
+    if binary and value is None:
+        raise ValueError("A binary copy of a configuration file requires the configuration.")
+
+    if gzip:
+        # The compressed data is compared with the compressed copy as the data is
+        # compared with the file, so that neither is ever held in memory.
+        comparison = __FileComparison(filename + ".gz")
+        data = __compress_chunks([data] if isinstance(data, str) else data, comparison.update)
+
+    stale = []
+    if not file_contains(filename, data, value):
+        stale.append(filename)
+
+    if gzip:
+        # The compressed copy matches the data if the file would be written, and
+        # the file itself otherwise. The comparison stops at the first difference,
+        # so the remaining chunks are compressed here.
+        if stale:
+            for _ in data:
+                pass
+            matches = comparison.close()
+        else:
+            comparison.close()
+            with open(filename, "rb") as file:
+                chunks = iter(lambda: file.read(write_file.CHUNK_SIZE), "")
+                matches = file_contains(filename + ".gz", __iter_compressed_chunks(chunks))
+
+        if not matches:
+            stale.append(filename + ".gz")
+
+    if binary:
+        from binary import get_binary_filename
+
+        binary_filename = get_binary_filename(filename)
+        if not __binary_file_contains(binary_filename, value):
+            stale.append(binary_filename)
+
+    return stale
+
+
+def write_file(filename, data, value=None, sync=True):
+    """Atomically writes the specified data to a file, unless the file already contains it.
+
+    If the data is a string, the file's size is compared to the data's first,
+    and its content only if both sizes match, which means the file is rarely
+    read in full unless it is unchanged. If the data is an iterable of strings,
+    each chunk is compared to the file as it is produced, and the data is only
+    written once a chunk differs or the file's size does not match, so that an
+    unchanged file costs no more than reading it. Leaving an unchanged file
+    untouched preserves its modification time, which spares any tool that
+    monitors it.
+
+    The data is written to a temporary file in the same directory, which is
+    flushed to disk before it replaces the original file. This means the file
+    is either left as it was or contains all of the data, but never part of it,
+    even if the process is killed or the system crashes while it is written.
+    The data is flushed even if the directory is not, because a file system may
+    write the rename to disk before the data, and a crash would then replace
+    the original file with an empty one, which no later barrier can undo.
+
+    Args:
+        filename (basestring): The name of the file to write.
+        data (str|iterable): The data to write, or an iterable of chunks of data,
+            e.g. as returned by iter_json_string. Chunks are written as soon as
+            they are produced so the data never needs to be held in memory.
+        value (object): If specified, the value that data is the JSON representation
+            of. A file of the same size whose content differs from the data but
+            that deserializes to this value, e.g. because the keys of an object
+            were written in a different order, is also left untouched.
+        sync (bool): If set to True, the file's directory is also flushed to disk
+            before this function returns, so that the replacement itself is durable.
+            If set to False, it is up to the caller to flush it later, e.g. by passing
+            the directories of a whole batch of files to sync_directories once they
+            have all been written. Until then, a crash may revert the file to its
+            previous content, but never truncate it.
+
+    Returns:
+        bool: True if the file was written, False if it already contained the data.
+
+    Raises:
+        TypeError: If the filename argument is not a basestring, data is neither a
+            str nor an iterable, or sync is not a boolean.
+        IOError: If the file could not be written.
+    """
+    from collections import Iterable
+
+    check_arg_type(write_file, "filename", filename, basestring)
+    check_arg_type(write_file, "data", data, (str, Iterable))
+    check_arg_type(write_file, "sync", sync, bool)
+
+    import os
+    from itertools import chain
+    from tempfile import mkstemp
+
+    existing_file = None
+    if isinstance(data, str):
+        if __file_contains(filename, data, value):
+            return False
+        chunks = iter([data])
+    else:
+        chunks = iter(data)
+        try:
+            existing_file = open(filename, "rb")
+        except IOError:
+            pass
+
+    directory, basename = os.path.split(os.path.abspath(filename))
+    try:
+        # Chunks that match the beginning of the file are compared and dropped,
+        # and the temporary file is only created at the first one that differs.
+        unchanged_size = 0
+        if existing_file is not None:
+            for chunk in chunks:
+                if existing_file.read(len(chunk)) != chunk:
+                    chunks = chain([chunk], chunks)
+                    break
+                unchanged_size += len(chunk)
+            else:
+                if not existing_file.read(1):
+                    return False
+
+        descriptor, temporary_filename = mkstemp(prefix=".{}.".format(basename), suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                # The chunks that were dropped are copied back from the file itself.
+                if unchanged_size:
+                    __copy_file_prefix(existing_file, file, unchanged_size)
+
+                size = unchanged_size
+                for chunk in chunks:
+                    file.write(chunk)
+                    size += len(chunk)
+
+                unchanged = (
+                    existing_file is not None and
+                    os.fstat(existing_file.fileno()).st_size == size and
+                    __deserializes_to(existing_file, value)
+                )
+                if not unchanged:
+                    # The data must be on disk before the rename, which may otherwise
+                    # reach the disk first and leave an empty file after a crash.
+                    # Only the data is flushed, since the file's metadata is that of
+                    # a temporary file, and the rename is flushed with the directory.
+                    file.flush()
+                    getattr(os, "fdatasync", os.fsync)(file.fileno())
+
+            if unchanged:
+                os.remove(temporary_filename)
+                return False
+
+            # The file being replaced can't be open on every platform.
+            if existing_file is not None:
+                existing_file.close()
+
+            # The temporary file is only readable by its owner, so it's given the
+            # permissions of the file it replaces, or those of a newly created file.
+            try:
+                mode = os.stat(filename).st_mode & 0o7777
+            except OSError:
+                mode = 0o666 & ~__UMASK
+            os.chmod(temporary_filename, mode)
+
+            __replace_file(temporary_filename, filename)
+        except:
+            try:
+                os.remove(temporary_filename)
+            except OSError:
+                pass
+            raise
+    finally:
+        if existing_file is not None:
+            existing_file.close()
+
+    if sync:
+        __sync_directory(directory)
+
+    from instrumentation import count
+    count("files_written")
+    count("bytes_written", size)
+
+    return True
+
+
+def sync_directories(directories):
+    """Flushes the entries of each of the specified directories to disk.
+
+    This is the barrier for a batch of files written with write_file's sync
+    argument set to False: each directory is flushed once, however many files
+    were written in it, and regardless of the process that wrote them. Only the
+    specified directories are flushed, not the rest of the file system.
+
+    Args:
+        directories (iterable): The paths to the directories to flush.
+
+    Returns:
+        int: The number of directories that were flushed.
+
+    Raises:
+        TypeError: If the directories argument is not an iterable.
+    """
+    from collections import Iterable
+    import os
+
+    check_arg_type(sync_directories, "directories", directories, Iterable)
+
+    directories = set(os.path.abspath(d) for d in directories)
+    for directory in directories:
+        __sync_directory(directory)
+
+    return len(directories)
+
+
+def file_contains(filename, data, value=None):
+    """Checks whether the specified file contains the given data, without modifying it.
+
+    The file is compared to the data exactly as write_file compares them before
+    writing it, so a file that write_file would leave untouched contains its data.
+
+    Args:
+        filename (basestring): The name of the file to check.
+        data (str|iterable): The expected content, or an iterable of chunks of it,
+            e.g. as returned by iter_json_string. Chunks are compared as soon as
+            they are produced so the data never needs to be held in memory.
+        value (object): If specified, the value that data is the JSON representation
+            of. A file whose content differs from the data but that deserializes to
+            this value, e.g. because the keys of an object were written in a different
+            order, also contains the data.
+
+    Returns:
+        bool: True if the file exists and contains the data, False otherwise.
+
+    Raises:
+        TypeError: If the filename argument is not a basestring, or data is neither
+            a str nor an iterable.
+    """
+    from collections import Iterable
+
+    check_arg_type(file_contains, "filename", filename, basestring)
+    check_arg_type(file_contains, "data", data, (str, Iterable))
+
+    if isinstance(data, str):
+        return __file_contains(filename, data, value)
+
+    try:
+        file = open(filename, "rb")
+    except IOError:
+        return False
+
+    import os
+
+    with file:
+        size, matches = 0, True
+        for chunk in data:
+            size += len(chunk)
+            if matches and file.read(len(chunk)) != chunk:
+                if value is None:
+                    return False
+                matches = False
+
+        if matches and not file.read(1):
+            return True
+
+        # Like write_file, a file that deserializes to the value must also be of the same size.
+        return value is not None and os.fstat(file.fileno()).st_size == size and __deserializes_to(file, value)
+
+
+def __compress_chunks(chunks, consume):
+    """Returns the specified chunks unchanged, and passes their gzip-compressed
+    form to the given function as they are read.
+
+    Args:
+        chunks (iterable): The chunks of data to compress.
+        consume (function): The function each chunk of compressed data is passed
+            to. It has received the complete gzip-compressed data once every
+            chunk has been read.
+
+    Returns:
+        iterator: The chunks.
+    """
+    compressor = __get_compressor()
+    for chunk in chunks:
+        consume(compressor.compress(chunk))
+        yield chunk
+
+    consume(compressor.flush())
+
+
+def __iter_compressed_chunks(chunks):
+    """Compresses the specified chunks of data.
+
+    Args:
+        chunks (iterable): The chunks of data to compress.
+
+    Returns:
+        iterator: The chunks of the gzip-compressed data, as they are produced.
+    """
+    compressor = __get_compressor()
+    for chunk in chunks:
+        compressed_chunk = compressor.compress(chunk)
+        if compressed_chunk:
+            yield compressed_chunk
+
+    yield compressor.flush()
+
+
+def __get_compressor():
+    """Returns a compressor that produces gzip-compressed data.
+
+    The compressed data is reproducible: the gzip header contains neither a
+    modification time nor a file name.
+
+    Returns:
+        zlib.Compress: The compressor.
+    """
+    import zlib
+    return zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+class __FileComparison(object):
+    """Compares the content of a file with data that is produced one chunk at a time."""
+
+    def __init__(self, filename):
+        try:
+            self.__file = open(filename, "rb")
+        except IOError:
+            self.__file = None
+
+        self.__matches = self.__file is not None
+
+    def update(self, chunk):
+        """Compares the next chunk of data with the file."""
+        if self.__matches and self.__file.read(len(chunk)) != chunk:
+            self.__matches = False
+
+    def close(self):
+        """Closes the file.
+
+        Returns:
+            bool: True if the file exists and contains exactly the data it was
+                compared with, False otherwise.
+        """
+        if self.__file is None:
+            return False
+
+        with self.__file:
+            return self.__matches and not self.__file.read(1)
+
+
+def __binary_file_contains(filename, value):
+    """Checks whether the specified binary configuration file loads to the given value.
+
+    Args:
+        filename (basestring): The name of the file to check.
+        value (dict): The expected configuration.
+
+    Returns:
+        bool: True if the file exists and loads to the value, False otherwise.
+    """
+    from binary import load_binary_configuration
+    try:
+        return load_binary_configuration(filename) == value
+    except (IOError, ValueError):
+        return False
+
+
+def __replace_file(source, destination):
+    """Renames the source file to the destination, replacing the destination if it exists.
+
+    Args:
+        source (basestring): The name of the file to rename.
+        destination (basestring): The file's new name.
+    """
+    import os
+
+    try:
+        os.rename(source, destination)
+    except OSError:
+        # Windows does not allow a rename to replace an existing file.
+        if os.name != "nt" or not os.path.isfile(destination):
+            raise
+        os.remove(destination)
+        os.rename(source, destination)
+
+
+def __sync_directory(directory):
+    """Flushes the specified directory's entries to disk so that a rename in it is durable.
+
+    Args:
+        directory (basestring): The directory to flush.
+    """
+    import os
+
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return # Directories cannot be opened on some platforms, e.g. Windows.
+
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+def __read_umask():
+    """Returns the process's file mode creation mask.
+
+    The mask is read once, when this module is imported, since it can only be
+    read portably by replacing it, which would affect files created concurrently
+    by other threads.
+    """
+    import os
+
+    try:
+        # Linux exposes the mask without having to replace it.
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (IOError, ValueError, IndexError):
+        pass
+
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+def __file_contains(filename, data, value=None):
+    """Checks whether the specified file contains the given data.
+
+    Args:
+        filename (basestring): The name of the file to check.
+        data (str): The expected content.
+        value (object): If not None, the value that data is the JSON representation of.
+
+    Returns:
+        bool: True if the file exists and its content matches the data, or
+            deserializes to the specified value, False otherwise.
+    """
+    import os
+
+    try:
+        if os.path.getsize(filename) != len(data):
+            return False
+
+        chunk_size = write_file.CHUNK_SIZE
+        with open(filename, "rb") as file:
+            for offset in xrange(0, len(data), chunk_size):
+                if file.read(chunk_size) != data[offset:offset + chunk_size]:
+                    return __deserializes_to(file, value)
+    except (IOError, OSError):
+        return False
+
+    return True
+
+
+def __copy_file_prefix(source, destination, size):
+    """Copies the specified number of bytes from the beginning of a file into another.
+
+    Args:
+        source (file): The file to copy from.
+        destination (file): The file to copy to, at its current position.
+        size (int): The number of bytes to copy.
+
+    Raises:
+        IOError: If the source file is shorter than the specified size.
+    """
+    source.seek(0)
+    while size > 0:
+        chunk = source.read(min(size, write_file.CHUNK_SIZE))
+        if not chunk:
+            raise IOError("The file '{}' was truncated while it was read.".format(source.name))
+
+        destination.write(chunk)
+        size -= len(chunk)
+
+
+def __deserializes_to(file, value):
+    """Checks whether the JSON content of the specified file is equal to the given value.
+
+    Args:
+        file (file): The file to check.
+        value (object): The expected value. If None, the content is not deserialized.
+
+    Returns:
+        bool: True if the file's content deserializes to the value, False otherwise.
+    """
+    if value is None:
+        return False
+
+    from json import load
+    try:
+        file.seek(0)
+        return load(file, encoding="UTF-8") == value
+    except ValueError:
+        return False
+
+
+write_file.CHUNK_SIZE = 1 << 20
+"""The number of bytes compared or copied at a time when checking whether a file has changed."""
+
+__UMASK = __read_umask()
+"""The process's file mode creation mask, which newly created files are given permissions with."""
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+#
+# This module is part of the GeoTag-X project formatter tool.
+# It contains functions that record how long each stage of the formatting
+# pipeline takes, and how much data it processes.
+#
+# Author: Jeremy Othieno (j.othieno@gmail.com)
+#
+# Copyright (c) 2017 UNITAR/UNOSAT
+#
+# The MIT License (MIT)
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# Measurements are sent to the current thread's recorder, which is any object that
+# has a stage(name) method that returns a context manager, and a count(name, value)
+# method. If no recorder is set, which is the default, measurements are simply
+# discarded, which costs no more than a function call. Each thread has a recorder
+# of its own, so that projects formatted concurrently, e.g. by the daemon, are
+# measured separately. A stage entered within another, e.g. the formatting of
+# each chunk of a tutorial that is written as it is formatted, is not counted
+# in the other's time.
+import threading, time
+
+def get_recorder():
+    """Returns the current thread's recorder.
+
+    Returns:
+        object: The current recorder, or None if measurements are discarded.
+    """
+    return __state.recorder
+
+
+def set_recorder(recorder):
+    """Sets the recorder that the current thread's measurements are sent to.
+
+    Args:
+        recorder (object): A recorder, e.g. a Recorder instance, or None to discard
+            measurements.
+
+    Returns:
+        object: The previous recorder.
+    """
+    previous = __state.recorder
+    __state.recorder = recorder
+    return previous
+
+
+def stage(name):
+    """Returns a context manager that measures the time spent in the specified stage.
+
+    Args:
+        name (str): The stage's name.
+
+    Returns:
+        object: A context manager.
+    """
+    recorder = __state.recorder
+    return __NULL_STAGE if recorder is None else recorder.stage(name)
+
+
+def stage_iterator(name, iterable):
+    """Returns the items of the specified iterable unchanged, and measures the time
+    spent producing each of them in the specified stage.
+
+    This measures the time spent in a lazy iterable, e.g. a formatter that produces
+    chunks of data as they are written, apart from the time spent by its consumer.
+
+    Args:
+        name (str): The stage's name.
+        iterable (iterable): The items to produce.
+
+    Returns:
+        iterator: The items.
+    """
+    recorder = __state.recorder
+    return iter(iterable) if recorder is None else __iter_stage(recorder, name, iter(iterable))
+
+
+def __iter_stage(recorder, name, iterator):
+    """Produces the items of the specified iterator, and measures the time spent producing each of them."""
+    while True:
+        with recorder.stage(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def count(name, value=1):
+    """Adds the specified value to a counter.
+
+    Args:
+        name (str): The counter's name.
+        value (int): The value to add.
+    """
+    recorder = __state.recorder
+    if recorder is not None:
+        recorder.count(name, value)
+
+
+def count_nodes(configuration_set):
+    """Counts the questions, options, tutorial subjects and assertions in the
+    specified configuration set, and adds them to the current recorder's counters.
+
+    The configuration set is only traversed if a recorder is set.
+
+    Args:
+        configuration_set (dict): The configuration set to count the nodes of.
+    """
+    recorder = __state.recorder
+    if recorder is None:
+        return
+
+    questions = configuration_set.get("task_presenter", {}).get("questionnaire", {}).get("questions", [])
+    recorder.count("questions", len(questions))
+
+    options = 0
+    stack = [q.get("input", {}).get("options") or [] for q in questions]
+    while stack:
+        children = stack.pop()
+        options += len(children)
+        stack.extend(o["options"] for o in children if "options" in o)
+    recorder.count("options", options)
+
+    subjects = configuration_set.get("tutorial", {}).get("subjects", [])
+    recorder.count("subjects", len(subjects))
+    recorder.count("assertions", sum(len(s.get("assertions", ())) for s in subjects))
+
+
+class Recorder(object):
+    """A recorder that accumulates the time spent in each stage, and the value of each counter."""
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self.active_stages = []
+
+    def stage(self, name):
+        """Returns a context manager that measures the time spent in the specified stage,
+        except the time spent in any stage entered within it."""
+        return _Stage(self, name)
+
+    def count(self, name, value=1):
+        """Adds the specified value to a counter."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self):
+        """Returns the recorded measurements as a dictionary."""
+        return {
+            "stages": dict(self.stages),
+            "counters": dict(self.counters),
+        }
+
+
+class _Stage(object):
+    """A context manager that adds the time spent in its context, except the time spent
+    in the stages entered within it, to a stage's total."""
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.nested = 0.0
+        self.recorder.active_stages.append(self)
+        self.start = time.time()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        elapsed = time.time() - self.start
+        active_stages = self.recorder.active_stages
+        active_stages.pop()
+        if active_stages:
+            active_stages[-1].nested += elapsed
+
+        stages = self.recorder.stages
+        stages[self.name] = stages.get(self.name, 0.0) + elapsed - self.nested
+        return False
+
+
+class _NullStage(object):
+    """A context manager that does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        return False
+
+
+__NULL_STAGE = _NullStage()
+"""The context manager returned by stage() when there is no recorder."""
+
+class _State(threading.local):
+    """The module's state, of which each thread has a copy of its own."""
+    recorder = None
+
+
+__state = _State()
+"""The module's state."""
@@ -26,43 +26,63 @@
 # OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
 # OR OTHER DEALINGS IN THE SOFTWARE.
 from geotagx_validator.helper import check_arg_type
-import geotagx_validator.project as validator
 
-def format_project_configuration(configuration, validate_configuration=True):
+def format_project_configuration(configuration, validate_configuration=True, copy_on_write=False):
     """Formats the specified project configuration.
 
     Args:
         configuration (dict): A project configuration to format.
         validate_configuration (bool): If set to True, the specified configuration
             will be validated before it's processed.
+        copy_on_write (bool): If set to True, the specified configuration is left
+            unchanged and a formatted copy of it is returned instead.
 
     Returns:
         dict: The formatted project configuration.
 
     Raises:
         TypeError: If the configuration argument is not a dictionary, or
-            validate_configuration is not a boolean.
+            validate_configuration and copy_on_write are not booleans.
         ValueError: If the specified configuration is not a valid project configuration.
     """
     check_arg_type(format_project_configuration, "configuration", configuration, dict)
     check_arg_type(format_project_configuration, "validate_configuration", validate_configuration, bool)
+    check_arg_type(format_project_configuration, "copy_on_write", copy_on_write, bool)
 
     if validate_configuration:
-        valid, message = validator.is_project_configuration(configuration)
+        from geotagx_validator.project import is_project_configuration
+        valid, message = is_project_configuration(configuration)
         if not valid:
             raise ValueError(message)
 
-    formatters = {
-        "name": format_project_name,
-        "description": format_project_description,
-        "repository": format_project_repository,
-    }
-    for key in configuration:
-        formatter = formatters.get(key)
-        if formatter:
-            configuration[key] = formatter(configuration[key], False)
+    from helper import _interning
+    with _interning():
+        return _format_project_configuration(configuration, copy_on_write)
 
-    return configuration
+
+def _format_project_configuration(configuration, copy_on_write=False):
+    """Formats the specified project configuration.
+
+    Unlike format_project_configuration, this function neither checks its
+    arguments nor validates the configuration, and should only be called
+    with a configuration that is known to be valid.
+
+    Args:
+        configuration (dict): A project configuration to format.
+        copy_on_write (bool): If set to True, the configuration is left unchanged
+            and a formatted copy of it is returned instead.
+
+    Returns:
+        dict: The formatted project configuration.
+    """
+    from helper import _CopyOnWrite
+
+    writer = _CopyOnWrite(configuration, copy_on_write)
+    for key, formatter in __FORMATTERS:
+        if key in configuration:
+            writer.set(key, formatter(configuration[key]))
+
+    return writer.container
 
 
 def format_project_name(name, validate_name=True):
@@ -87,7 +107,8 @@ def format_project_name(name, validate_name=True):
     check_arg_type(format_project_name, "validate_name", validate_name, bool)
 
     if validate_name:
-        valid, message = validator.is_project_name(name)
+        from geotagx_validator.project import is_project_name
+        valid, message = is_project_name(name)
         if not valid:
             raise ValueError(message)
 
@@ -117,7 +138,8 @@ def format_project_description(description, validate_description=True):
     check_arg_type(format_project_description, "validate_description", validate_description, bool)
 
     if validate_description:
-        valid, message = validator.is_project_description(description)
+        from geotagx_validator.project import is_project_description
+        valid, message = is_project_description(description)
         if not valid:
             raise ValueError(message)
 
@@ -147,8 +169,17 @@ def format_project_repository(repository, validate_repository=True):
     check_arg_type(format_project_repository, "validate_repository", validate_repository, bool)
 
     if validate_repository:
-        valid, message = validator.is_project_repository(repository)
+        from geotagx_validator.project import is_project_repository
+        valid, message = is_project_repository(repository)
         if not valid:
             raise ValueError(message)
 
     return repository.strip()
+
+
+__FORMATTERS = (
+    ("name", lambda name: name.strip()),
+    ("description", lambda description: description.strip()),
+    ("repository", lambda repository: repository.strip()),
+)
+"""The formatters applied to each field of a valid project configuration."""
@@ -26,10 +26,9 @@
 # OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
 # OR OTHER DEALINGS IN THE SOFTWARE.
 from geotagx_validator.helper import check_arg_type
-from geotagx_validator.task_presenter import is_task_presenter_language
-from geotagx_validator.question import *
 from geotagx_validator.helper import is_normalized_string
-from helper import normalize_configuration_string
+from helper import normalize_configuration_string, _normalize_configuration_strings
+from helper import _CopyOnWrite, _interning, _interned_options
 
 def format_question(question, language, validate_configurations=True):
     """Formats the specified question configuration.
@@ -54,6 +53,8 @@ def format_question(question, language, validate_configurations=True):
     check_arg_type(format_question, "validate_configurations", validate_configurations, bool)
 
     if validate_configurations:
+        from geotagx_validator.task_presenter import is_task_presenter_language
+        from geotagx_validator.question import is_question
         valid, message = is_task_presenter_language(language)
         if not valid:
             raise ValueError(message)
@@ -62,18 +63,33 @@ def format_question(question, language, validate_configurations=True):
         if not valid:
             raise ValueError(message)
 
-    formatters = {
-        "title": format_question_title,
-        "hint": format_question_help,
-        "help": format_question_help,
-        "input": format_question_input,
-    }
-    for key, value in question.iteritems():
-        formatter = formatters.get(key)
-        if formatter:
-            question[key] = formatter(value, language, False)
+    with _interning():
+        return _format_question(question, language)
 
-    return question
+
+def _format_question(question, language, copy_on_write=False):
+    """Formats the specified question configuration.
+
+    Unlike format_question, this function neither checks its arguments nor
+    validates the configurations, and should only be called with configurations
+    that are known to be valid.
+
+    Args:
+        question (dict): A question configuration to format.
+        language (dict): A language configuration used to help format the
+            question configuration.
+        copy_on_write (bool): If set to True, the configuration is left unchanged
+            and a formatted copy of it is returned instead.
+
+    Returns:
+        dict: The formatted question configuration.
+    """
+    writer = _CopyOnWrite(question, copy_on_write)
+    for key, formatter in __QUESTION_FORMATTERS:
+        if key in question:
+            writer.set(key, formatter(question[key], language, copy_on_write))
+
+    return writer.container
 
 
 def format_question_title(question_title, language, validate_configurations=True):
@@ -102,6 +118,8 @@ def format_question_title(question_title, language, validate_configurations=True
     check_arg_type(format_question_title, "validate_configurations", validate_configurations, bool)
 
     if validate_configurations:
+        from geotagx_validator.task_presenter import is_task_presenter_language
+        from geotagx_validator.question import is_question_title
         valid, message = is_task_presenter_language(language)
         if not valid:
             raise ValueError(message)
@@ -110,7 +128,7 @@ def format_question_title(question_title, language, validate_configurations=True
         if not valid:
             raise ValueError(message)
 
-    return normalize_configuration_string(question_title, language["default"])
+    return _format_question_string(question_title, language)
 
 
 def format_question_help(question_help, language, validate_configurations=True):
@@ -139,6 +157,8 @@ def format_question_help(question_help, language, validate_configurations=True):
     check_arg_type(format_question_help, "validate_configurations", validate_configurations, bool)
 
     if validate_configurations:
+        from geotagx_validator.task_presenter import is_task_presenter_language
+        from geotagx_validator.question import is_question_help
         valid, message = is_task_presenter_language(language)
         if not valid:
             raise ValueError(message)
@@ -147,7 +167,21 @@ def format_question_help(question_help, language, validate_configurations=True):
         if not valid:
             raise ValueError(message)
 
-    return normalize_configuration_string(question_help, language["default"])
+    return _format_question_string(question_help, language)
+
+
+def _format_question_string(question_string, language):
+    """Formats the specified question title or help, without checking the arguments
+    or validating them.
+
+    Args:
+        question_string (basestring|dict): A valid question title or help to format.
+        language (dict): A valid language configuration used to help format the string.
+
+    Returns:
+        dict: The formatted question title or help.
+    """
+    return normalize_configuration_string(question_string, language["default"])
 
 
 def format_question_input(question_input, language, validate_configurations=True):
@@ -173,6 +207,8 @@ def format_question_input(question_input, language, validate_configurations=True
     check_arg_type(format_question_input, "validate_configurations", validate_configurations, bool)
 
     if validate_configurations:
+        from geotagx_validator.task_presenter import is_task_presenter_language
+        from geotagx_validator.question import is_question_input
         valid, message = is_task_presenter_language(language)
         if not valid:
             raise ValueError(message)
@@ -181,22 +217,33 @@ def format_question_input(question_input, language, validate_configurations=True
         if not valid:
             raise ValueError(message)
 
+    with _interning():
+        return _format_question_input(question_input, language)
+
+
+def _format_question_input(question_input, language, copy_on_write=False):
+    """Formats the specified question input configuration, without checking the
+    arguments or validating them.
+
+    Args:
+        question_input (dict): A valid question input configuration to format.
+        language (dict): A valid language configuration used to help format the
+            question input configuration.
+        copy_on_write (bool): If set to True, the configuration is left unchanged
+            and a formatted copy of it is returned instead.
+
+    Returns:
+        dict: The formatted question input configuration.
+    """
     input_type = question_input["type"]
     default_configuration = format_question_input.DEFAULT_CONFIGURATIONS.get(input_type, {})
-    formatter = {
-        "dropdown-list": __format_dropdown_list_input,
-        "multiple-option": __format_multiple_option_input,
-        "text": __format_text_input,
-        "number": __format_number_input,
-        "datetime": __format_datetime_input,
-        "url": __format_url_input,
-        "geotagging": __format_geotagging_input,
-    }.get(input_type, None)
+    formatter = __INPUT_FORMATTERS.get(input_type, None)
 
+    writer = _CopyOnWrite(question_input, copy_on_write)
     for key, value in default_configuration.iteritems():
-        question_input.setdefault(key, value)
+        writer.setdefault(key, value)
 
-    return formatter(question_input, language) if formatter else question_input
+    return formatter(writer.container, language, copy_on_write) if formatter else writer.container
 
 
 format_question_input.DEFAULT_CONFIGURATIONS = {
@@ -243,119 +290,139 @@ format_question_input.DEFAULT_CONFIGURATIONS = {
 """The set of default configuration values for each question input."""
 
 
-def __format_dropdown_list_input(dropdown_list_input, language):
+def __format_dropdown_list_input(dropdown_list_input, language, copy_on_write=False):
     """Formats the specified dropdown-list input.
 
     Args:
         dropdown_list_input (dict): A dropdown-list input configuration to format.
         language (dict): A language configuration used to help format the input configuration.
+        copy_on_write (bool): If set to True, the configuration is left unchanged
+            and a formatted copy of it is returned instead.
 
     Returns:
         dict: A formatted dropdown-list input configuration.
     """
-    dropdown_list_input["options"] = __format_options(dropdown_list_input["options"], language["default"])
+    writer = _CopyOnWrite(dropdown_list_input, copy_on_write)
+    writer.set("options", __format_options(dropdown_list_input["options"], language["default"], copy_on_write))
 
     prompt = dropdown_list_input.get("prompt")
     if prompt is not None:
-        dropdown_list_input["prompt"] = normalize_configuration_string(prompt, language["default"])
+        writer.set("prompt", normalize_configuration_string(prompt, language["default"]))
 
-    return dropdown_list_input
+    return writer.container
 
 
-def __format_multiple_option_input(multiple_option_input, language):
+def __format_multiple_option_input(multiple_option_input, language, copy_on_write=False):
     """Formats the specified multiple-option input.
 
     Args:
         multiple_option_input (dict): A multiple-option input configuration to format.
         language (dict): A language configuration used to help format the input configuration.
+        copy_on_write (bool): If set to True, the configuration is left unchanged
+            and a formatted copy of it is returned instead.
 
     Returns:
         dict: A formatted multiple-option input configuration.
     """
-    multiple_option_input["options"] = __format_options(multiple_option_input["options"], language["default"])
+    writer = _CopyOnWrite(multiple_option_input, copy_on_write)
+    writer.set("options", __format_options(multiple_option_input["options"], language["default"], copy_on_write))
 
-    return multiple_option_input
+    return writer.container
 
 
-def __format_text_input(text_input, language):
+def __format_text_input(text_input, language, copy_on_write=False):
     """Formats the specified text input.
 
     Args:
         text_input (dict): A text input configuration to format.
         language (dict): A language configuration used to help format the input configuration.
+        copy_on_write (bool): If set to True, the configuration is left unchanged
+            and a formatted copy of it is returned instead.
 
     Returns:
         dict: A formatted text input configuration.
     """
+    writer = _CopyOnWrite(text_input, copy_on_write)
     placeholder = text_input.get("placeholder")
     if placeholder is not None:
-        text_input["placeholder"] = normalize_configuration_string(placeholder, language["default"])
+        writer.set("placeholder", normalize_configuration_string(placeholder, language["default"]))
 
-    return text_input
+    return writer.container
 
 
-def __format_number_input(number_input, language):
+def __format_number_input(number_input, language, copy_on_write=False):
     """Formats the specified number input.
 
     Args:
         number_input (dict): A number input configuration to format.
         language (dict): A language configuration used to help format the input configuration.
+        copy_on_write (bool): If set to True, the configuration is left unchanged
+            and a formatted copy of it is returned instead.
 
     Returns:
         dict: A formatted number input configuration.
     """
+    writer = _CopyOnWrite(number_input, copy_on_write)
     placeholder = number_input.get("placeholder")
     if placeholder is not None:
-        number_input["placeholder"] = normalize_configuration_string(placeholder, language["default"])
+        writer.set("placeholder", normalize_configuration_string(placeholder, language["default"]))
 
-    return number_input
+    return writer.container
 
 
-def __format_datetime_input(datetime_input, language):
+def __format_datetime_input(datetime_input, language, copy_on_write=False):
     """Formats the specified datetime input.
 
     Args:
         datetime_input (dict): A datetime input configuration to format.
         language (dict): A language configuration used to help format the input configuration.
+        copy_on_write (bool): If set to True, the configuration is left unchanged
+            and a formatted copy of it is returned instead.
 
     Returns:
         dict: A formatted datetime input configuration.
     """
+    writer = _CopyOnWrite(datetime_input, copy_on_write)
     for key in ["date-format", "time-format"]:
         value = datetime_input.get(key)
         if value is not None:
-            datetime_input[key] = value.strip()
+            writer.set(key, value.strip())
 
-    return datetime_input
+    return writer.container
 
 
-def __format_url_input(url_input, language):
+def __format_url_input(url_input, language, copy_on_write=False):
     """Formats the specified URL input.
 
     Args:
         url_input (dict): A URL input configuration to format.
         language (dict): A language configuration used to help format the input configuration.
+        copy_on_write (bool): If set to True, the configuration is left unchanged
+            and a formatted copy of it is returned instead.
 
     Returns:
         dict: A formatted URL input configuration.
     """
+    writer = _CopyOnWrite(url_input, copy_on_write)
     domain = url_input.get("domain")
     if domain is not None:
-        url_input["domain"] = domain.strip()
+        writer.set("domain", domain.strip())
 
     placeholder = url_input.get("placeholder")
     if placeholder is not None:
-        url_input["placeholder"] = normalize_configuration_string(placeholder, language["default"])
+        writer.set("placeholder", normalize_configuration_string(placeholder, language["default"]))
 
-    return url_input
+    return writer.container
 
 
-def __format_geotagging_input(geotagging_input, language):
+def __format_geotagging_input(geotagging_input, language, copy_on_write=False):
     """Formats the specified geotagging input.
 
     Args:
         geotagging_input (dict): A geotagging input configuration to format.
         language (dict): A language configuration used to help format the input configuration.
+        copy_on_write (bool): If set to True, the configuration is left unchanged
+            and a formatted copy of it is returned instead.
 
     Returns:
         dict: A formatted geotagging input configuration.
@@ -363,25 +430,144 @@ def __format_geotagging_input(geotagging_input, language):
     return geotagging_input
 
 
-def __format_options(options, default_language):
+def __format_options(options, default_language, copy_on_write=False):
     """Formats the specified list of options.
 
     An option is usually a <label, value> pair but may contain other fields
     in some cases. Formatting an option simply normalizes its label.
 
+    An option may also be an optgroup (group of options), in which case it has
+    a subset of options in it that is processed too. The optgroups are traversed
+    depth-first, with an explicit stack rather than recursively so that they may
+    be nested to an arbitrary depth, and in post-order so that a list of options
+    is only formatted once all of its optgroups have been, at which point the
+    labels of its options are normalized in a single batch. A list of options,
+    or an option, that is shared by several optgroups is only formatted once.
+
+    Within the scope of a call to a formatter, i.e. while helper._interning is
+    in effect, lists of options are also memoized by content: a list of options
+    that is identical to one that has already been formatted, e.g. the same list
+    of regions repeated in several dropdown lists, is not formatted again and is
+    replaced by the formatted list, which both share. Note that this holds for
+    lists of options that were loaded separately from JSON.
+
     Args:
         options (list): The list of options to format.
         default_language (basestring): A default language used to format option labels.
+        copy_on_write (bool): If set to True, the options are left unchanged and
+            a formatted copy of them is returned instead. Otherwise, the options
+            are formatted in place, and the optgroups whose list of options is
+            identical to one that has already been formatted are modified to
+            refer to the formatted list.
 
     Returns:
         list: The list of formatted options.
     """
-    for i, option in enumerate(options):
-        option["label"] = normalize_configuration_string(option["label"], default_language)
+    interned = _interned_options()
+
+    # Each list of options, or option, is mapped to itself and its formatted
+    # version. The original is kept so that its id is not reused while the
+    # options are formatted, even if it is replaced by a memoized list.
+    formatted = {}
+    keys = {}
+    ancestors = set([id(options)])
+    stack = [(options, iter(options))]
+    while stack:
+        current_options, remaining = stack[-1]
+        for option in remaining:
+            children = option.get("options")
+            if children is not None and id(children) not in formatted and id(children) not in ancestors:
+                # The optgroup is formatted before the rest of the current list.
+                ancestors.add(id(children))
+                stack.append((children, iter(children)))
+                break
+        else:
+            stack.pop()
+            ancestors.discard(id(current_options))
+
+            key = None
+            if interned is not None:
+                key = keys[id(current_options)] = __get_options_key(current_options, default_language, keys)
+                if key is not None and key in interned:
+                    formatted[id(current_options)] = (current_options, interned[key])
+                    continue
+
+            pending = [option for option in current_options if id(option) not in formatted]
+            labels = _normalize_configuration_strings([option["label"] for option in pending], default_language)
+            for option, label in zip(pending, labels):
+                option_writer = _CopyOnWrite(option, copy_on_write)
+                option_writer.set("label", label)
+                if "options" in option:
+                    # Only an optgroup that contains one of its own ancestors, which
+                    # is still being formatted, refers to the original.
+                    children = option["options"]
+                    option_writer.set("options", formatted.get(id(children), (None, children))[1])
+                formatted[id(option)] = (option, option_writer.container)
+
+            writer = _CopyOnWrite(current_options, copy_on_write)
+            for i, option in enumerate(current_options):
+                writer.set(i, formatted[id(option)][1])
+
+            formatted[id(current_options)] = (current_options, writer.container)
+            if key is not None:
+                interned[key] = writer.container
+
+    return formatted[id(options)][1]
+
+
+def __get_options_key(options, default_language, keys):
+    """Returns a key that identifies the content of the specified list of options.
+
+    The key is a tuple that holds the set of fields of each option, without its
+    optgroup, and the key of the optgroup's list of options, which is looked up
+    rather than computed again. A field whose value is a dictionary, such as a
+    normalized label, is represented by the set of its items.
 
-        # Is the option an optgroup (group of options) ? If so, it has a subset of options in it
-        # that should be recursively processed.
-        if "options" in option:
-            option["options"] = __format_options(option["options"], default_language)
+    Args:
+        options (list): The list of options to identify.
+        default_language (basestring): The default language used to format option labels.
+        keys (dict): The keys of the lists of options that have been identified,
+            mapped to their id.
 
-    return options
+    Returns:
+        tuple|None: The key, or None if the list of options cannot be identified,
+            i.e. if an option contains a field whose value cannot be hashed, or
+            one of its optgroups contains one of its own ancestors.
+    """
+    key = [default_language]
+    for option in options:
+        children_key = None
+        if "options" in option:
+            children_key = keys.get(id(option["options"]))
+            if children_key is None:
+                return None
+        try:
+            fields = frozenset(
+                (name, frozenset(value.iteritems()) if isinstance(value, dict) else value)
+                for name, value in option.iteritems() if name != "options"
+            )
+        except TypeError:
+            return None
+        key.append((fields, children_key))
+
+    return tuple(key)
+
+
+__QUESTION_FORMATTERS = (
+    ("title", lambda title, language, _: _format_question_string(title, language)),
+    ("hint", lambda hint, language, _: _format_question_string(hint, language)),
+    ("help", lambda help, language, _: _format_question_string(help, language)),
+    ("input", _format_question_input),
+)
+"""The formatters applied to each field of a valid question configuration."""
+
+__INPUT_FORMATTERS = {
+    "dropdown-list": __format_dropdown_list_input,
+    "multiple-option": __format_multiple_option_input,
+    "text": __format_text_input,
+    "number": __format_number_input,
+    "datetime": __format_datetime_input,
+    "url": __format_url_input,
+    "geotagging": __format_geotagging_input,
+}
+"""The formatters applied to each type of valid question input configuration."""
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+#
+# This module is part of the GeoTag-X project formatter tool.
+# It contains a reader that gives access to the configurations of a project
+# lazily, from memory-mapped files.
+#
+# Author: Jeremy Othieno (j.othieno@gmail.com)
+#
+# Copyright (c) 2017 UNITAR/UNOSAT
+#
+# The MIT License (MIT)
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+from geotagx_validator.helper import check_arg_type
+from collections import Mapping
+import os
+
+class ConfigurationSetReader(Mapping):
+    """A read-only mapping of the configurations of a project, which are read lazily.
+
+    The configuration files are memory-mapped rather than read, so that their
+    content is never copied into memory, and a configuration is only decoded
+    the first time it is accessed. A configuration that is never accessed is
+    therefore never loaded in memory, but one that is accessed is decoded in
+    full, like helper.deserialize_configuration would. A configuration that is
+    too large to be held in memory, e.g. a tutorial of hundreds of megabytes,
+    should instead be iterated over with iter_members, which reads large arrays
+    such as a tutorial's subjects one item at a time, or opened and passed to
+    tutorial.format_tutorial_stream.
+    """
+
+    def __init__(self, path):
+        """Creates a reader for the project located at the specified path.
+
+        Args:
+            path (basestring): A path to a project directory.
+
+        Raises:
+            TypeError: If the path argument is not a basestring.
+        """
+        check_arg_type(ConfigurationSetReader, "path", path, basestring)
+
+        from helper import get_configuration_filenames
+
+        self.filenames = {k: f for k, f in get_configuration_filenames(path).iteritems() if os.path.isfile(f)}
+        self.configurations = {}
+
+    def __getitem__(self, key):
+        """Returns the configuration with the specified key, which is decoded on first access.
+
+        Raises:
+            KeyError: If the project has no such configuration.
+            IOError: If the configuration file could not be read.
+            ValueError: If the configuration file does not contain a JSON object.
+        """
+        configuration = self.configurations.get(key)
+        if configuration is None:
+            from types import GeneratorType
+
+            streamed_keys = ConfigurationSetReader.STREAMED_KEYS.get(key, ())
+            configuration = {
+                k: list(v) if isinstance(v, GeneratorType) else v
+                for k, v in self.iter_members(key, streamed_keys)
+            }
+            self.configurations[key] = configuration
+
+        return configuration
+
+    def __contains__(self, key):
+        # Mapping's implementation would decode the configuration.
+        return key in self.filenames
+
+    def __iter__(self):
+        return iter(self.filenames)
+
+    def __len__(self):
+        return len(self.filenames)
+
+    def is_loaded(self, key):
+        """Checks whether the configuration with the specified key has been decoded."""
+        return key in self.configurations
+
+    def iter_members(self, key, streamed_keys=()):
+        """Reads the configuration with the specified key, one member at a time.
+
+        Args:
+            key (str): The configuration's key, e.g. "tutorial".
+            streamed_keys (iterable): The keys of the members whose values are arrays
+                that should be read one item at a time, e.g. ("subjects",).
+
+        Returns:
+            iterator: The configuration's (key, value) pairs, as returned by
+                stream.iter_json_object.
+
+        Raises:
+            KeyError: If the project has no such configuration.
+            IOError: If the configuration file could not be read.
+            ValueError: If the configuration file does not contain a JSON object.
+        """
+        from stream import iter_json_object
+
+        file = self.open(key)
+        try:
+            for member in iter_json_object(file, streamed_keys):
+                yield member
+        finally:
+            file.close()
+
+    def open(self, key):
+        """Memory-maps the file of the configuration with the specified key.
+
+        Args:
+            key (str): The configuration's key, e.g. "tutorial".
+
+        Returns:
+            mmap.mmap: A read-only, file-like object, e.g. to be passed to
+                tutorial.format_tutorial_stream. It must be closed by the caller.
+
+        Raises:
+            KeyError: If the project has no such configuration.
+            IOError: If the configuration file could not be read.
+            ValueError: If the configuration file is empty.
+        """
+        import mmap
+
+        filename = self.filenames[key]
+        with open(filename, "rb") as file:
+            # An empty file cannot be mapped, and is not a configuration anyway.
+            if os.fstat(file.fileno()).st_size == 0:
+                raise ValueError("The file '{}' does not contain a configuration.".format(filename))
+
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+ConfigurationSetReader.STREAMED_KEYS = {
+    "tutorial": ("subjects",),
+}
+"""The keys of each configuration's array members that are decoded one item at
+a time, so that the decoder never holds more than one item's JSON in memory."""
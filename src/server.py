@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+#
+# This module is part of the GeoTag-X project formatter tool.
+# It contains functions that serve formatting requests over a Unix domain socket,
+# and send requests to a running server.
+#
+# Author: Jeremy Othieno (j.othieno@gmail.com)
+#
+# Copyright (c) 2017 UNITAR/UNOSAT
+#
+# The MIT License (MIT)
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+#
+# Requests and responses are JSON objects, one per line. A client may send any
+# number of requests over a connection, and receives one response per request,
+# in the same order. A request that cannot be handled is answered with an
+# object whose "error" member contains the type and message of the exception
+# that was raised, e.g. {"error": {"type": "ValueError", "message": "..."}}.
+from geotagx_validator.helper import check_arg_type
+import os
+
+def get_default_address():
+    """Returns the path to the default server socket.
+
+    Returns:
+        basestring: The path to the default server socket.
+    """
+    directory = os.environ.get("XDG_RUNTIME_DIR")
+    if directory:
+        return os.path.join(directory, "geotagx-formatter.sock")
+    else:
+        import tempfile
+        return os.path.join(tempfile.gettempdir(), "geotagx-formatter-{}.sock".format(os.getuid()))
+
+
+def serve(address, handler):
+    """Serves requests on the Unix domain socket at the specified address, until
+    the process is interrupted or terminated.
+
+    Each connection is handled by its own thread, so the handler must be thread-safe.
+
+    Args:
+        address (basestring): The path to the server socket.
+        handler (function): A function that is called with a request and returns
+            the response. Both are dictionaries.
+
+    Raises:
+        TypeError: If the address argument is not a basestring, or the handler is not callable.
+        socket.error: If a server is already listening on the socket, the address
+            refers to a file that is not a socket, or the socket could not be created.
+    """
+    check_arg_type(serve, "address", address, basestring)
+    if not callable(handler):
+        raise TypeError("The handler argument must be callable.")
+
+    import socket, stat
+
+    try:
+        mode = os.lstat(address).st_mode
+    except OSError:
+        mode = None
+
+    if mode is not None:
+        if not stat.S_ISSOCK(mode):
+            raise socket.error("The file '{}' is not a socket.".format(address))
+        elif is_running(address):
+            raise socket.error("A server is already listening on '{}'.".format(address))
+        # The socket was left behind by a server that did not shut down cleanly.
+        os.unlink(address)
+
+    from SocketServer import StreamRequestHandler, ThreadingMixIn, UnixStreamServer
+    import json, signal, sys
+
+    class Server(ThreadingMixIn, UnixStreamServer):
+        # Connections do not prevent the server from shutting down.
+        daemon_threads = True
+
+    class RequestHandler(StreamRequestHandler):
+        def handle(self):
+            for line in iter(self.rfile.readline, ""):
+                if not line.strip():
+                    continue
+
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("A request must be a JSON object.")
+                    response = handler(request)
+                except Exception as e:
+                    response = {"error": {"type": type(e).__name__, "message": unicode(e)}}
+
+                self.wfile.write(json.dumps(response) + "\n")
+                self.wfile.flush()
+
+    # The socket is only accessible to the current user, as the server reads and
+    # writes files on behalf of its clients.
+    umask = os.umask(0o077)
+    try:
+        server = Server(address, RequestHandler)
+    finally:
+        os.umask(umask)
+
+    previous_handler = signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
+        server.server_close()
+        os.unlink(address)
+
+
+def send_request(address, request, timeout=None):
+    """Sends a request to the server listening on the specified socket, and returns its response.
+
+    Args:
+        address (basestring): The path to the server socket.
+        request (dict): The request to send.
+        timeout (float): The number of seconds to wait for the response, or None to wait indefinitely.
+
+    Returns:
+        dict: The server's response.
+
+    Raises:
+        TypeError: If the address argument is not a basestring, or the request is not a dictionary.
+        socket.error: If the server could not be reached, or closed the connection
+            before responding.
+    """
+    check_arg_type(send_request, "address", address, basestring)
+    check_arg_type(send_request, "request", request, dict)
+
+    import json, socket
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.settimeout(timeout)
+        connection.connect(address)
+        connection.sendall(json.dumps(request) + "\n")
+
+        file = connection.makefile("rb")
+        try:
+            line = file.readline()
+        finally:
+            file.close()
+
+        if not line:
+            raise socket.error("The server closed the connection before responding.")
+
+        return json.loads(line)
+    finally:
+        connection.close()
+
+
+def is_running(address):
+    """Checks whether a server is listening on the specified socket.
+
+    Args:
+        address (basestring): The path to the server socket.
+
+    Returns:
+        bool: True if a server is listening on the socket, False otherwise.
+    """
+    import socket
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(address)
+        return True
+    except socket.error:
+        return False
+    finally:
+        connection.close()
+
+
+def get_exception(response):
+    """Returns the exception described by the specified response's error.
+
+    Args:
+        response (dict): A response.
+
+    Returns:
+        Exception: The exception raised by the server, or None if the request was handled.
+    """
+    import exceptions
+
+    error = response.get("error")
+    if error is None:
+        return None
+
+    # Built-in exceptions are recreated as such, any other exception is described by a generic one.
+    name, message = error.get("type") or "Exception", error.get("message", "")
+    exception_type = getattr(exceptions, name, None)
+    if isinstance(exception_type, type) and issubclass(exception_type, Exception):
+        return exception_type(message)
+    else:
+        return Exception("{}: {}".format(name, message))
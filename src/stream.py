@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+#
+# This module is part of the GeoTag-X project formatter tool.
+# It contains functions that read and write JSON objects incrementally, which
+# makes it possible to process configurations that are too large to be held
+# in memory.
+#
+# Author: Jeremy Othieno (j.othieno@gmail.com)
+#
+# Copyright (c) 2017 UNITAR/UNOSAT
+#
+# The MIT License (MIT)
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+from json.decoder import JSONDecoder, WHITESPACE
+
+def iter_json_object(file, streamed_keys=(), chunk_size=1 << 16):
+    """Reads the JSON object stored in the specified file, one member at a time.
+
+    Args:
+        file (file): A file that contains a UTF-8 encoded JSON object.
+        streamed_keys (iterable): The keys of the members whose values are arrays
+            that should be read one item at a time.
+        chunk_size (int): The number of bytes read from the file at a time.
+
+    Returns:
+        iterator: The object's (key, value) pairs, in the order they appear in the
+            file. The value of a streamed member is an iterator over the array's
+            items, which must be consumed before the next pair is requested.
+
+    Raises:
+        ValueError: If the file does not contain a JSON object.
+    """
+    reader = __Reader(file, chunk_size)
+    reader.expect(u"{")
+    if reader.peek() == u"}":
+        reader.expect(u"}")
+    else:
+        while True:
+            key = reader.read_value()
+            if not isinstance(key, unicode):
+                raise ValueError("Expecting a property name at offset {}.".format(reader.offset))
+
+            reader.expect(u":")
+            if key in streamed_keys and reader.peek() == u"[":
+                yield key, __iter_array(reader)
+            else:
+                yield key, reader.read_value()
+
+            if reader.peek() == u",":
+                reader.expect(u",")
+            else:
+                reader.expect(u"}")
+                break
+
+    if reader.peek() is not None:
+        raise ValueError("Extra data at offset {}.".format(reader.offset))
+
+
+def iter_json_object_string(members, compress=False):
+    """Converts the specified object members into a string in JSON format, one chunk at a time.
+
+    The string is formatted exactly as helper.to_json_string would format a
+    dictionary whose keys are ordered like the members.
+
+    Args:
+        members (iterable): The object's (key, value, streamed) triples. If streamed
+            is True, value is an iterable of items that is converted into an array,
+            one item at a time.
+        compress (bool): If set to True, the string will be compressed
+            as much as possible.
+
+    Returns:
+        iterator: The UTF-8 encoded chunks of a string in JSON format.
+    """
+    from helper import get_json_encoder, group_chunks
+    return group_chunks(__iter_object_fragments(members, get_json_encoder(compress), compress))
+
+
+def __iter_object_fragments(members, encoder, compress):
+    """Returns the string fragments of the JSON object with the specified members.
+
+    Args:
+        members (iterable): The object's (key, value, streamed) triples.
+        encoder (json.JSONEncoder): The encoder used to convert each value.
+        compress (bool): True if the encoder produces compressed strings.
+
+    Returns:
+        iterator: The string fragments of the JSON object.
+    """
+    separator = u"," if compress else u",\n" + u" " * 4
+    key_separator = encoder.key_separator
+    opened = False
+    for key, value, streamed in members:
+        if opened:
+            yield separator
+        else:
+            yield u"{" if compress else u"{\n    "
+            opened = True
+
+        yield encoder.encode(key) + key_separator
+        if streamed:
+            for fragment in __iter_array_fragments(value, encoder, compress):
+                yield fragment
+        else:
+            for fragment in __encode(value, encoder, 1, compress):
+                yield fragment
+
+    if not opened:
+        yield u"{}"
+    else:
+        yield u"}" if compress else u"\n}"
+
+
+def __iter_array_fragments(items, encoder, compress):
+    """Returns the string fragments of a JSON array, nested in a top-level object.
+
+    Args:
+        items (iterable): The array's items.
+        encoder (json.JSONEncoder): The encoder used to convert each item.
+        compress (bool): True if the encoder produces compressed strings.
+
+    Returns:
+        iterator: The string fragments of the JSON array.
+    """
+    separator = u"," if compress else u",\n" + u" " * 8
+    opened = False
+    for item in items:
+        if opened:
+            yield separator
+        else:
+            yield u"[" if compress else u"[\n" + u" " * 8
+            opened = True
+
+        for fragment in __encode(item, encoder, 2, compress):
+            yield fragment
+
+    if not opened:
+        yield u"[]"
+    else:
+        yield u"]" if compress else u"\n" + u" " * 4 + u"]"
+
+
+def __encode(value, encoder, level, compress):
+    """Returns the string fragments of a JSON value, indented to the specified level.
+
+    A compressed value is converted in a single call to the encoder, which then
+    uses its C implementation, if available, rather than producing the value one
+    tiny fragment at a time. Compressed values are never indented.
+
+    Since line breaks in JSON strings are always escaped, every line break in a
+    fragment of an indented value separates two lines of the value's structure.
+
+    Args:
+        value (object): The value to convert.
+        encoder (json.JSONEncoder): The encoder used to convert the value.
+        level (int): The value's nesting level.
+        compress (bool): True if the encoder produces compressed strings.
+
+    Returns:
+        iterable: The value's fragments.
+    """
+    if compress:
+        return (encoder.encode(value),)
+
+    line_break = u"\n" + u" " * (4 * level)
+    return (f.replace(u"\n", line_break) for f in encoder.iterencode(value))
+
+
+def __iter_array(reader):
+    """Reads a JSON array one item at a time.
+
+    Args:
+        reader (__Reader): The reader positioned at the array's opening bracket.
+
+    Returns:
+        iterator: The array's items.
+    """
+    reader.expect(u"[")
+    if reader.peek() == u"]":
+        reader.expect(u"]")
+        return
+
+    while True:
+        yield reader.read_value()
+        if reader.peek() == u",":
+            reader.expect(u",")
+        else:
+            reader.expect(u"]")
+            break
+
+
+class __Reader(object):
+    """An incremental reader of UTF-8 encoded JSON documents.
+
+    The reader only holds the part of the document it is currently decoding in memory.
+    """
+
+    def __init__(self, file, chunk_size):
+        from codecs import getincrementaldecoder
+
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = getincrementaldecoder("UTF-8")()
+        self.json_decoder = JSONDecoder(encoding="UTF-8")
+        self.buffer = u""
+        self.position = 0
+        self.offset = 0
+        self.eof = False
+
+    def fill(self, size):
+        """Reads the specified number of bytes into the buffer.
+
+        Returns:
+            bool: False if the end of the file has been reached, True otherwise.
+        """
+        if self.eof:
+            return False
+
+        data = self.file.read(size)
+        self.eof = not data
+        self.offset += self.position
+        self.buffer = self.buffer[self.position:] + self.decoder.decode(data, final=self.eof)
+        self.position = 0
+        return not self.eof
+
+    def peek(self):
+        """Returns the next character that is not whitespace, or None at the end of the file."""
+        while True:
+            self.position = WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            elif not self.fill(self.chunk_size):
+                return None
+
+    def expect(self, character):
+        """Consumes the next character that is not whitespace, which must be the specified character."""
+        if self.peek() != character:
+            raise ValueError("Expecting '{}' at offset {}.".format(character, self.offset + self.position))
+        self.position += 1
+
+    def read_value(self):
+        """Reads the next JSON value."""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.position)
+                # A number at the end of the buffer may be the start of a larger one.
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+
+            # The value is incomplete, so more of it is read, in increasingly
+            # larger chunks so that a large value is decoded a limited number of times.
+            self.fill(size)
+            size *= 2
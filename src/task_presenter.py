@@ -26,45 +26,68 @@
 # OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
 # OR OTHER DEALINGS IN THE SOFTWARE.
 from geotagx_validator.helper import check_arg_type
-from geotagx_validator.task_presenter import *
 from collections import OrderedDict
 
-def format_task_presenter_configuration(configuration, validate_configuration=True):
+def format_task_presenter_configuration(configuration, validate_configuration=True, copy_on_write=False):
     """Formats the specified task presenter configuration.
 
     Args:
         configuration (dict): A task presenter configuration to format.
         validate_configuration (bool): If set to True, the specified configuration
             will be validated before it's processed.
+        copy_on_write (bool): If set to True, the specified configuration is left
+            unchanged and a formatted copy of it is returned instead. The copy shares
+            every field that did not need to be formatted with the original.
 
     Returns:
         dict: The formatted task presenter configuration.
 
     Raises:
         TypeError: If the configuration argument is not a dictionary, or
-            validate_configuration is not a boolean.
+            validate_configuration and copy_on_write are not booleans.
         ValueError: If the specified configuration is not a valid task presenter
             configuration.
     """
     check_arg_type(format_task_presenter_configuration, "configuration", configuration, dict)
     check_arg_type(format_task_presenter_configuration, "validate_configuration", validate_configuration, bool)
+    check_arg_type(format_task_presenter_configuration, "copy_on_write", copy_on_write, bool)
 
     if validate_configuration:
+        from geotagx_validator.task_presenter import is_task_presenter_configuration
         valid, message = is_task_presenter_configuration(configuration)
         if not valid:
             raise ValueError(message)
 
-    formatters = {
-        "language": format_task_presenter_language,
-        "subject": format_task_presenter_subject,
-        "questionnaire": lambda q, v: format_task_presenter_questionnaire(q, configuration["language"], v),
-    }
-    for key in configuration:
-        formatter = formatters.get(key)
-        if formatter:
-            configuration[key] = formatter(configuration[key], False)
+    from helper import _interning
+    with _interning():
+        return _format_task_presenter_configuration(configuration, copy_on_write)
 
-    return configuration
+
+def _format_task_presenter_configuration(configuration, copy_on_write=False):
+    """Formats the specified task presenter configuration.
+
+    Unlike format_task_presenter_configuration, this function neither checks
+    its arguments nor validates the configuration, and should only be called
+    with a configuration that is known to be valid.
+
+    Args:
+        configuration (dict): A task presenter configuration to format.
+        copy_on_write (bool): If set to True, the configuration is left unchanged
+            and a formatted copy of it is returned instead.
+
+    Returns:
+        dict: The formatted task presenter configuration.
+    """
+    from helper import _CopyOnWrite
+
+    # The language configuration is formatted first since the questionnaire
+    # depends on it, and on its default values in particular.
+    writer = _CopyOnWrite(configuration, copy_on_write)
+    for key, formatter in __FORMATTERS:
+        if key in configuration:
+            writer.set(key, formatter(configuration[key], writer.container.get("language"), copy_on_write))
+
+    return writer.container
 
 
 def format_task_presenter_language(language, validate_language=True):
@@ -88,15 +111,34 @@ def format_task_presenter_language(language, validate_language=True):
     check_arg_type(format_task_presenter_language, "validate_language", validate_language, bool)
 
     if validate_language:
+        from geotagx_validator.task_presenter import is_task_presenter_language
         valid, message = is_task_presenter_language(language)
         if not valid:
             raise ValueError(message)
 
+    return _format_task_presenter_language(language)
+
+
+def _format_task_presenter_language(language, copy_on_write=False):
+    """Formats the specified task presenter language configuration, without
+    checking the argument or validating it.
+
+    Args:
+        language (dict): A valid language configuration to format.
+        copy_on_write (bool): If set to True, the configuration is left unchanged
+            and a formatted copy of it is returned instead.
+
+    Returns:
+        dict: The formatted language configuration.
+    """
+    from helper import _CopyOnWrite
+
     # Add any missing fields to the configuration.
+    writer = _CopyOnWrite(language, copy_on_write)
     for key, value in format_task_presenter_language.DEFAULT_CONFIGURATION.iteritems():
-        language.setdefault(key, value)
+        writer.setdefault(key, value)
 
-    return language
+    return writer.container
 
 
 format_task_presenter_language.DEFAULT_CONFIGURATION = OrderedDict({
@@ -127,15 +169,34 @@ def format_task_presenter_subject(subject, validate_subject=True):
     check_arg_type(format_task_presenter_subject, "validate_subject", validate_subject, bool)
 
     if validate_subject:
+        from geotagx_validator.task_presenter import is_task_presenter_subject
         valid, message = is_task_presenter_subject(subject)
         if not valid:
             raise ValueError(message)
 
+    return _format_task_presenter_subject(subject)
+
+
+def _format_task_presenter_subject(subject, copy_on_write=False):
+    """Formats the specified task presenter subject configuration, without
+    checking the argument or validating it.
+
+    Args:
+        subject (dict): A valid subject configuration to format.
+        copy_on_write (bool): If set to True, the configuration is left unchanged
+            and a formatted copy of it is returned instead.
+
+    Returns:
+        dict: The formatted subject configuration.
+    """
+    from helper import _CopyOnWrite
+
     # Add any missing fields to the configuration.
+    writer = _CopyOnWrite(subject, copy_on_write)
     for key, value in format_task_presenter_subject.DEFAULT_CONFIGURATION.iteritems():
-        subject.setdefault(key, value)
+        writer.setdefault(key, value)
 
-    return subject
+    return writer.container
 
 
 format_task_presenter_subject.DEFAULT_CONFIGURATION = OrderedDict({
@@ -167,6 +228,7 @@ def format_task_presenter_questionnaire(questionnaire, language, validate_config
     check_arg_type(format_task_presenter_questionnaire, "validate_configurations", validate_configurations, bool)
 
     if validate_configurations:
+        from geotagx_validator.task_presenter import is_task_presenter_language, is_task_presenter_questionnaire
         valid, message = is_task_presenter_language(language)
         if not valid:
             raise ValueError(message)
@@ -175,10 +237,42 @@ def format_task_presenter_questionnaire(questionnaire, language, validate_config
         if not valid:
             raise ValueError(message)
 
-    from question import format_question
+    from helper import _interning
+    with _interning():
+        return _format_task_presenter_questionnaire(questionnaire, language)
+
+
+def _format_task_presenter_questionnaire(questionnaire, language, copy_on_write=False):
+    """Formats the specified task presenter questionnaire configuration, without
+    checking the arguments or validating them.
+
+    Args:
+        questionnaire (dict): A valid questionnaire configuration to format.
+        language (dict): A valid language configuration used to help format the
+            questionnaire configuration.
+        copy_on_write (bool): If set to True, the configuration is left unchanged
+            and a formatted copy of it is returned instead.
+
+    Returns:
+        dict: The formatted questionnaire configuration.
+    """
+    from question import _format_question
+    from helper import _CopyOnWrite
 
     questions = questionnaire["questions"]
+    writer = _CopyOnWrite(questions, copy_on_write)
     for i, question in enumerate(questions):
-        questions[i] = format_question(question, language, False)
+        writer.set(i, _format_question(question, language, copy_on_write))
+
+    questionnaire_writer = _CopyOnWrite(questionnaire, copy_on_write)
+    questionnaire_writer.set("questions", writer.container)
+
+    return questionnaire_writer.container
+
 
-    return questionnaire
+__FORMATTERS = (
+    ("language", lambda language, _, copy_on_write: _format_task_presenter_language(language, copy_on_write)),
+    ("subject", lambda subject, _, copy_on_write: _format_task_presenter_subject(subject, copy_on_write)),
+    ("questionnaire", _format_task_presenter_questionnaire),
+)
+"""The formatters applied to each field of a valid task presenter configuration, in order."""
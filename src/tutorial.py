@@ -25,15 +25,17 @@
 # DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
 # OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
 # OR OTHER DEALINGS IN THE SOFTWARE.
-from geotagx_validator.task_presenter import is_task_presenter_language
-from geotagx_validator.tutorial import *
-from helper import normalize_configuration_string
+from geotagx_validator.helper import check_arg_type
+from helper import normalize_configuration_string, _CopyOnWrite
 
 def format_tutorial_configuration(
     configuration,
     task_presenter_configuration,
     validate_configuration=True,
-    validate_task_presenter_configuration=True
+    validate_task_presenter_configuration=True,
+    processes=1,
+    chunk_size=256,
+    copy_on_write=False
 ):
     """Formats the specified tutorial configuration.
 
@@ -46,42 +48,176 @@ def format_tutorial_configuration(
         validate_task_presenter_configuration (bool): If set to True, the specified
             task presenter configuration will be validated before it is used to format the
             tutorial configuration.
+        processes (int): The number of worker processes used to format the subjects.
+            If set to 1, the subjects are formatted in the current process. If set
+            to 0, one worker process is created per available CPU.
+        chunk_size (int): The number of subjects sent to a worker process at a time.
+        copy_on_write (bool): If set to True, the specified tutorial configuration is
+            left unchanged and a formatted copy of it is returned instead. The copy
+            shares every field that did not need to be formatted with the original.
 
     Returns:
         dict: The formatted tutorial configuration.
 
     Raises:
-        TypeError: If either the specified configurations is not a dictionary, or the
-            validate_configuration and validate_task_presenter_configuration arguments
-            are not booleans.
+        TypeError: If either the specified configurations is not a dictionary, the
+            validate_configuration, validate_task_presenter_configuration and
+            copy_on_write arguments are not booleans, or processes and chunk_size
+            are not integers.
         ValueError: If either of the specified configurations is invalid.
     """
     check_arg_type(format_tutorial_configuration, "configuration", configuration, dict)
     check_arg_type(format_tutorial_configuration, "task_presenter_configuration", task_presenter_configuration, dict)
     check_arg_type(format_tutorial_configuration, "validate_configuration", validate_configuration, bool)
     check_arg_type(format_tutorial_configuration, "validate_task_presenter_configuration", validate_task_presenter_configuration, bool)
-
-    def format_tutorial_subjects(tutorial_subjects, language):
-        for i, subject in enumerate(tutorial_subjects):
-            tutorial_subjects[i] = format_tutorial_subject(subject, language, False)
-
-        return tutorial_subjects
+    check_arg_type(format_tutorial_configuration, "processes", processes, int)
+    check_arg_type(format_tutorial_configuration, "chunk_size", chunk_size, int)
+    check_arg_type(format_tutorial_configuration, "copy_on_write", copy_on_write, bool)
 
     if validate_configuration:
+        from geotagx_validator.tutorial import is_tutorial_configuration
         valid, message = is_tutorial_configuration(configuration, task_presenter_configuration, validate_task_presenter_configuration=validate_task_presenter_configuration)
         if not valid:
             raise ValueError(message)
 
-    formatters = {
-        "default-message": lambda x, y: format_tutorial_default_messages(x, y, False),
-        "subjects": format_tutorial_subjects,
-    }
-    for key in configuration:
-        formatter = formatters.get(key)
-        if formatter:
-            configuration[key] = formatter(configuration[key], task_presenter_configuration["language"])
+    from helper import _interning
+    with _interning():
+        return _format_tutorial_configuration(configuration, task_presenter_configuration["language"], processes, chunk_size, copy_on_write)
+
+
+def _format_tutorial_configuration(configuration, language, processes=1, chunk_size=256, copy_on_write=False):
+    """Formats the specified tutorial configuration.
+
+    Unlike format_tutorial_configuration, this function neither checks its
+    arguments nor validates the configurations, and should only be called
+    with configurations that are known to be valid.
+
+    Args:
+        configuration (dict): A tutorial configuration to format.
+        language (dict): The task presenter's language configuration.
+        processes (int): The number of worker processes used to format the subjects.
+        chunk_size (int): The number of subjects sent to a worker process at a time.
+        copy_on_write (bool): If set to True, the configuration is left unchanged
+            and a formatted copy of it is returned instead.
+
+    Returns:
+        dict: The formatted tutorial configuration.
+    """
+    writer = _CopyOnWrite(configuration, copy_on_write)
+    for key, formatter in __TUTORIAL_FORMATTERS:
+        if key not in configuration:
+            continue
+        elif key == "subjects" and processes != 1:
+            writer.set(key, __format_tutorial_subjects_in_parallel(configuration[key], language, processes, chunk_size, copy_on_write))
+        else:
+            writer.set(key, formatter(configuration[key], language, copy_on_write))
+
+    return writer.container
+
+
+def format_tutorial_stream(
+    file,
+    task_presenter_configuration,
+    validate_configuration=True,
+    validate_task_presenter_configuration=True,
+    compress=False,
+    processes=1,
+    chunk_size=256
+):
+    """Formats the tutorial configuration stored in the specified file, one subject at a time.
+
+    Unlike format_tutorial_configuration, the tutorial configuration is never
+    loaded in memory in full: each subject is read, formatted and converted back
+    into JSON before the next one is read, which means the memory used to format
+    a tutorial does not depend on its number of subjects.
+
+    When the configuration is validated, each subject is validated individually
+    and the set of default messages is validated too, but the tutorial's other
+    fields are left unchanged and are not validated.
+
+    Args:
+        file (file): A file that contains a UTF-8 encoded tutorial configuration.
+        task_presenter_configuration (dict): A formatted task presenter configuration to
+            help format the tutorial configuration.
+        validate_configuration (bool): If set to True, the tutorial configuration will
+            be validated as it is processed.
+        validate_task_presenter_configuration (bool): If set to True, the specified
+            task presenter configuration will be validated before it is used to format the
+            tutorial configuration.
+        compress (bool): If set to True, the formatted configuration is compressed
+            as much as possible.
+        processes (int): The number of worker processes used to format the subjects.
+            If set to 1, the subjects are formatted in the current process. If set
+            to 0, one worker process is created per available CPU.
+        chunk_size (int): The number of subjects sent to a worker process at a time.
+            At most this many subjects per worker process are held in memory.
+
+    Returns:
+        iterator: The UTF-8 encoded chunks of the formatted configuration, in JSON
+            format, e.g. to be written with helper.write_file. An exception is raised
+            while the chunks are produced if the configuration is not valid.
 
-    return configuration
+    Raises:
+        TypeError: If the task_presenter_configuration argument is not a dictionary,
+            the validate_configuration, validate_task_presenter_configuration and
+            compress arguments are not booleans, or processes and chunk_size are not
+            integers.
+        ValueError: If the task presenter configuration is invalid.
+    """
+    check_arg_type(format_tutorial_stream, "task_presenter_configuration", task_presenter_configuration, dict)
+    check_arg_type(format_tutorial_stream, "validate_configuration", validate_configuration, bool)
+    check_arg_type(format_tutorial_stream, "validate_task_presenter_configuration", validate_task_presenter_configuration, bool)
+    check_arg_type(format_tutorial_stream, "compress", compress, bool)
+    check_arg_type(format_tutorial_stream, "processes", processes, int)
+    check_arg_type(format_tutorial_stream, "chunk_size", chunk_size, int)
+
+    from stream import iter_json_object, iter_json_object_string
+    from instrumentation import count
+    from helper import imap_parallel
+    from itertools import islice
+    from types import GeneratorType
+    from geotagx_validator.tutorial import is_tutorial_default_message
+
+    if validate_task_presenter_configuration:
+        from geotagx_validator.task_presenter import is_task_presenter_configuration
+        valid, message = is_task_presenter_configuration(task_presenter_configuration)
+        if not valid:
+            raise ValueError(message)
+
+    language = task_presenter_configuration["language"]
+    validators = {
+        "default-message": is_tutorial_default_message,
+    } if validate_configuration else {}
+    formatters = {"default-message": _format_tutorial_messages}
+
+    def validate(key, value):
+        validator = validators.get(key)
+        if validator:
+            valid, message = validator(value, language["available"])
+            if not valid:
+                raise ValueError(message)
+
+    def format_subjects(subjects):
+        chunks = iter(lambda: list(islice(subjects, chunk_size)), [])
+        jobs = ((chunk, language, validate_configuration, False) for chunk in chunks)
+        for formatted_subjects in imap_parallel(__format_subject_chunk, jobs, processes):
+            for subject in formatted_subjects:
+                count("subjects")
+                count("assertions", len(subject.get("assertions", ())))
+                yield subject
+
+    def format_members():
+        for key, value in iter_json_object(file, ("subjects",)):
+            if key == "subjects" and isinstance(value, GeneratorType):
+                yield key, format_subjects(value), True
+            elif key == "subjects" and validate_configuration:
+                raise ValueError("A tutorial's subjects must be stored in a list.")
+            else:
+                validate(key, value)
+                formatter = formatters.get(key)
+                yield key, formatter(value, language) if formatter else value, False
+
+    return iter_json_object_string(format_members(), compress)
 
 
 def format_tutorial_default_messages(default_messages, language, validate_configurations=True):
@@ -107,6 +243,8 @@ def format_tutorial_default_messages(default_messages, language, validate_config
     check_arg_type(format_tutorial_default_messages, "validate_configurations", validate_configurations, bool)
 
     if validate_configurations:
+        from geotagx_validator.task_presenter import is_task_presenter_language
+        from geotagx_validator.tutorial import is_tutorial_default_message
         valid, message = is_task_presenter_language(language)
         if not valid:
             raise ValueError(message)
@@ -115,10 +253,30 @@ def format_tutorial_default_messages(default_messages, language, validate_config
         if not valid:
             raise ValueError(message)
 
-    for key, message in default_messages.iteritems():
-        default_messages[key] = normalize_configuration_string(message, language["default"])
+    from helper import _interning
+    with _interning():
+        return _format_tutorial_messages(default_messages, language)
+
 
-    return default_messages
+def _format_tutorial_messages(messages, language, copy_on_write=False):
+    """Formats the specified set of default or assertion messages, without checking
+    the arguments or validating them.
+
+    Args:
+        messages (dict): A valid set of messages to format.
+        language (dict): A valid language configuration used to help format the messages.
+        copy_on_write (bool): If set to True, the messages are left unchanged and
+            a formatted copy of them is returned instead.
+
+    Returns:
+        dict: The set of formatted messages.
+    """
+    default_language = language["default"]
+    writer = _CopyOnWrite(messages, copy_on_write)
+    for key, message in messages.iteritems():
+        writer.set(key, normalize_configuration_string(message, default_language))
+
+    return writer.container
 
 
 def format_tutorial_subject(tutorial_subject, language, validate_configurations=True):
@@ -142,13 +300,9 @@ def format_tutorial_subject(tutorial_subject, language, validate_configurations=
     check_arg_type(format_tutorial_subject, "language", language, dict)
     check_arg_type(format_tutorial_subject, "validate_configurations", validate_configurations, bool)
 
-    def format_subject_assertions(assertions):
-        for key, assertion in assertions.iteritems():
-            assertions[key] = format_tutorial_subject_assertion(assertion, language, False)
-
-        return assertions
-
     if validate_configurations:
+        from geotagx_validator.task_presenter import is_task_presenter_language
+        from geotagx_validator.tutorial import is_tutorial_subject
         valid, message = is_task_presenter_language(language)
         if not valid:
             raise ValueError(message)
@@ -157,18 +311,31 @@ def format_tutorial_subject(tutorial_subject, language, validate_configurations=
         if not valid:
             raise ValueError(message)
 
-    formatters = {
-        "source": lambda s: s.strip(),
-        "page": lambda s: s.strip(),
-        "attribution": lambda s: s.strip(),
-        "assertions": format_subject_assertions,
-    }
-    for key, field in tutorial_subject.iteritems():
-        formatter = formatters.get(key)
-        if formatter:
-            tutorial_subject[key] = formatter(field)
+    from helper import _interning
+    with _interning():
+        return _format_tutorial_subject(tutorial_subject, language)
 
-    return tutorial_subject
+
+def _format_tutorial_subject(tutorial_subject, language, copy_on_write=False):
+    """Formats the specified tutorial subject, without checking the arguments
+    or validating them.
+
+    Args:
+        tutorial_subject (dict): A valid tutorial subject to format.
+        language (dict): A valid language configuration used to help format the
+            tutorial subject.
+        copy_on_write (bool): If set to True, the subject is left unchanged and
+            a formatted copy of it is returned instead.
+
+    Returns:
+        dict: The formatted tutorial subject.
+    """
+    writer = _CopyOnWrite(tutorial_subject, copy_on_write)
+    for key, formatter in __SUBJECT_FORMATTERS:
+        if key in tutorial_subject:
+            writer.set(key, formatter(tutorial_subject[key], language, copy_on_write))
+
+    return writer.container
 
 
 def format_tutorial_subject_assertion(tutorial_subject_assertion, language, validate_configurations=True):
@@ -192,12 +359,9 @@ def format_tutorial_subject_assertion(tutorial_subject_assertion, language, vali
     check_arg_type(format_tutorial_subject_assertion, "language", language, dict)
     check_arg_type(format_tutorial_subject_assertion, "validate_configurations", validate_configurations, bool)
 
-    def format_assertion_messages(messages):
-        for key, message in messages.iteritems():
-            messages[key] = normalize_configuration_string(message, language["default"])
-        return messages
-
     if validate_configurations:
+        from geotagx_validator.task_presenter import is_task_presenter_language
+        from geotagx_validator.tutorial import is_tutorial_subject_assertion
         valid, message = is_task_presenter_language(language)
         if not valid:
             raise ValueError(message)
@@ -206,13 +370,156 @@ def format_tutorial_subject_assertion(tutorial_subject_assertion, language, vali
         if not valid:
             raise ValueError(message)
 
-    formatters = {
-        "expects": lambda s: s.strip(),
-        "messages": format_assertion_messages,
-    }
-    for key, field in tutorial_subject_assertion.iteritems():
-        formatter = formatters.get(key)
-        if formatter:
-            tutorial_subject_assertion[key] = formatter(field)
+    from helper import _interning
+    with _interning():
+        return _format_tutorial_subject_assertion(tutorial_subject_assertion, language)
+
+
+def _format_tutorial_subject_assertion(tutorial_subject_assertion, language, copy_on_write=False):
+    """Formats the specified tutorial assertion, without checking the arguments
+    or validating them.
+
+    Args:
+        tutorial_subject_assertion (dict): A valid tutorial subject assertion to format.
+        language (dict): A valid language configuration used to help format the
+            tutorial subject assertion.
+        copy_on_write (bool): If set to True, the assertion is left unchanged and
+            a formatted copy of it is returned instead.
+
+    Returns:
+        dict: The formatted tutorial assertion.
+    """
+    writer = _CopyOnWrite(tutorial_subject_assertion, copy_on_write)
+    for key, formatter in __ASSERTION_FORMATTERS:
+        if key in tutorial_subject_assertion:
+            writer.set(key, formatter(tutorial_subject_assertion[key], language, copy_on_write))
+
+    return writer.container
+
+
+def __format_tutorial_subjects(tutorial_subjects, language, copy_on_write=False):
+    """Formats the specified list of valid tutorial subjects.
 
-    return tutorial_subject_assertion
+    Args:
+        tutorial_subjects (list): A list of valid tutorial subjects to format.
+        language (dict): A valid language configuration used to help format the subjects.
+        copy_on_write (bool): If set to True, the subjects are left unchanged and
+            a formatted copy of them is returned instead.
+
+    Returns:
+        list: The list of formatted tutorial subjects.
+    """
+    writer = _CopyOnWrite(tutorial_subjects, copy_on_write)
+    for i, subject in enumerate(tutorial_subjects):
+        writer.set(i, _format_tutorial_subject(subject, language, copy_on_write))
+
+    return writer.container
+
+
+def __format_tutorial_subjects_in_parallel(tutorial_subjects, language, processes, chunk_size, copy_on_write=False):
+    """Formats the specified list of valid tutorial subjects on a pool of worker processes.
+
+    The subjects are split into chunks that are formatted independently, and the
+    formatted subjects replace the originals in the same order.
+
+    Args:
+        tutorial_subjects (list): A list of valid tutorial subjects to format.
+        language (dict): A valid language configuration used to help format the subjects.
+        processes (int): The number of worker processes. If set to 0, one worker
+            process is created per available CPU.
+        chunk_size (int): The number of subjects sent to a worker process at a time.
+        copy_on_write (bool): If set to True, the subjects are left unchanged and
+            a formatted copy of them is returned instead. Subjects formatted by a
+            worker process are always copies.
+
+    Returns:
+        list: The list of formatted tutorial subjects.
+    """
+    from helper import imap_parallel
+
+    chunk_size = max(1, chunk_size)
+    jobs = (
+        (tutorial_subjects[i:i + chunk_size], language, False, copy_on_write)
+        for i in xrange(0, len(tutorial_subjects), chunk_size)
+    )
+    formatted_tutorial_subjects = list(tutorial_subjects) if copy_on_write else tutorial_subjects
+    i = 0
+    for formatted_subjects in imap_parallel(__format_subject_chunk, jobs, processes):
+        formatted_tutorial_subjects[i:i + len(formatted_subjects)] = formatted_subjects
+        i += len(formatted_subjects)
+
+    return formatted_tutorial_subjects
+
+
+def __format_subject_chunk(job):
+    """Formats a chunk of tutorial subjects.
+
+    This function is executed by worker processes.
+
+    Args:
+        job (tuple): A (tutorial_subjects, language, validate, copy_on_write) tuple where
+            tutorial_subjects is a list of subjects to format, language is a valid language
+            configuration, validate is True if each subject should be validated before
+            it's formatted, and copy_on_write is True if the subjects should be left
+            unchanged. The list itself is always modified.
+
+    Returns:
+        list: The list of formatted tutorial subjects.
+
+    Raises:
+        ValueError: If a subject is invalid.
+    """
+    from geotagx_validator.tutorial import is_tutorial_subject
+    from helper import _interning
+
+    tutorial_subjects, language, validate, copy_on_write = job
+    with _interning():
+        for i, subject in enumerate(tutorial_subjects):
+            if validate:
+                valid, message = is_tutorial_subject(subject, language["available"])
+                if not valid:
+                    raise ValueError(message)
+
+            tutorial_subjects[i] = _format_tutorial_subject(subject, language, copy_on_write)
+
+    return tutorial_subjects
+
+
+def __format_subject_assertions(assertions, language, copy_on_write=False):
+    """Formats the specified set of valid tutorial subject assertions.
+
+    Args:
+        assertions (dict): A set of valid tutorial subject assertions to format.
+        language (dict): A valid language configuration used to help format the assertions.
+        copy_on_write (bool): If set to True, the assertions are left unchanged and
+            a formatted copy of them is returned instead.
+
+    Returns:
+        dict: The set of formatted assertions.
+    """
+    writer = _CopyOnWrite(assertions, copy_on_write)
+    for key, assertion in assertions.iteritems():
+        writer.set(key, _format_tutorial_subject_assertion(assertion, language, copy_on_write))
+
+    return writer.container
+
+
+__TUTORIAL_FORMATTERS = (
+    ("default-message", _format_tutorial_messages),
+    ("subjects", __format_tutorial_subjects),
+)
+"""The formatters applied to each field of a valid tutorial configuration."""
+
+__SUBJECT_FORMATTERS = (
+    ("source", lambda source, language, copy_on_write: source.strip()),
+    ("page", lambda page, language, copy_on_write: page.strip()),
+    ("attribution", lambda attribution, language, copy_on_write: attribution.strip()),
+    ("assertions", __format_subject_assertions),
+)
+"""The formatters applied to each field of a valid tutorial subject."""
+
+__ASSERTION_FORMATTERS = (
+    ("expects", lambda expects, language, copy_on_write: expects.strip()),
+    ("messages", _format_tutorial_messages),
+)
+"""The formatters applied to each field of a valid tutorial subject assertion."""
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+# This module is part of the GeoTag-X project formatter tool.
+# It contains functions that monitor project directories for changes to their
+# configuration files.
+#
+# Author: Jeremy Othieno (j.othieno@gmail.com)
+#
+# Copyright (c) 2017 UNITAR/UNOSAT
+#
+# The MIT License (MIT)
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+from geotagx_validator.helper import check_arg_type
+import os, time
+
+def watch(paths, callback, debounce=1.0, interval=0.25, iterations=None, snapshot_function=None):
+    """Monitors the configuration files of the specified projects, and calls the
+    callback when they change.
+
+    The configuration files are polled, which works on any platform and file
+    system, including network file systems. A burst of changes to a project's
+    files is reported once, when none of them has changed for the debounce delay.
+    The files the callback writes are not reported as changes, but any other
+    change made while the callback runs, e.g. a file saved by its author while
+    the project is formatted, is reported once the callback has returned.
+
+    Args:
+        paths (list): The paths to the project directories to monitor.
+        callback (function): A function that is called with a project's path and
+            the set of keys of its configurations that have changed, e.g.
+            set(["task_presenter"]), and returns the names of the files it has
+            written, if any.
+        debounce (float): The number of seconds a project's files must remain
+            unchanged before the changes are reported.
+        interval (float): The number of seconds between two polls.
+        iterations (int): The number of polls after which this function returns.
+            If None, the projects are monitored until the process is interrupted.
+        snapshot_function (function): The function that returns the state of a
+            project's configuration files, given the project's path. If None,
+            get_snapshot is used.
+
+    Raises:
+        TypeError: If the paths argument is not a list, callback is not callable,
+            debounce and interval are not numbers, iterations is neither an
+            integer nor None, or snapshot_function is neither callable nor None.
+    """
+    check_arg_type(watch, "paths", paths, list)
+    check_arg_type(watch, "debounce", debounce, (int, float))
+    check_arg_type(watch, "interval", interval, (int, float))
+    check_arg_type(watch, "iterations", iterations, (int, type(None)))
+    if not callable(callback):
+        raise TypeError("The callback argument must be callable.")
+    elif snapshot_function is not None and not callable(snapshot_function):
+        raise TypeError("The snapshot_function argument must be callable or None.")
+
+    from helper import get_configuration_filenames
+
+    snapshot_function = snapshot_function or get_snapshot
+    snapshots = {path: snapshot_function(path) for path in paths}
+    pending = {}
+    while iterations is None or iterations > 0:
+        time.sleep(interval)
+        now = time.time()
+        for path in paths:
+            snapshot = snapshot_function(path)
+            changes = set(k for k, v in snapshot.iteritems() if v != snapshots[path].get(k))
+            if changes:
+                snapshots[path] = snapshot
+                previous_changes, _ = pending.get(path, (set(), None))
+                pending[path] = (previous_changes | changes, now)
+            elif path in pending and now - pending[path][1] >= debounce:
+                keys, _ = pending.pop(path)
+                written = set(callback(path, keys) or ())
+
+                # Only the state of the files the callback has written is updated,
+                # so that the other files' changes are reported by the next poll.
+                written_keys = [k for k, f in get_configuration_filenames(path).iteritems() if f in written]
+                if written_keys:
+                    snapshot = snapshot_function(path)
+                    snapshots[path] = dict(snapshots[path])
+                    for key in written_keys:
+                        snapshots[path][key] = snapshot.get(key)
+
+        if iterations is not None:
+            iterations -= 1
+
+
+def get_snapshot(path):
+    """Returns the state of the configuration files of the specified project.
+
+    Args:
+        path (basestring): A path to a project directory.
+
+    Returns:
+        dict: A dictionary that maps each configuration key to the modification time,
+            size and inode of its file, or None if the file does not exist.
+    """
+    from helper import get_configuration_filenames
+
+    snapshot = {}
+    for key, filename in get_configuration_filenames(path).iteritems():
+        try:
+            status = os.stat(filename)
+            snapshot[key] = (status.st_mtime, status.st_size, status.st_ino)
+        except OSError:
+            snapshot[key] = None
+
+    return snapshot
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# This module is part of the GeoTag-X project formatter tool.
+# It contains tests for the asynchronous interface to the formatter.
+#
+# Author: Jeremy Othieno (j.othieno@gmail.com)
+#
+# Copyright (c) 2017 UNITAR/UNOSAT
+#
+# The MIT License (MIT)
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+from geotagx_formatter.core import format_configuration_set
+import copy, json, multiprocessing, os, shutil, tempfile, unittest
+
+try:
+    from geotagx_formatter.asynchronous import AsyncFormatter, _get_asyncio
+    asyncio = _get_asyncio()
+except ImportError:
+    asyncio = None
+
+@unittest.skipIf(asyncio is None, "The asynchronous interface requires asyncio or trollius.")
+class TestAsyncFormatter(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.directory = tempfile.mkdtemp()
+        self.configuration_set = {
+            "project": {"name": " Demo ", "short_name": "demo", "description": " A demo ", "repository": "https://example.org"},
+            "task_presenter": {
+                "language": {"default": "en", "available": ["en"]},
+                "subject": {"type": "image"},
+                "questionnaire": {"questions": [{"key": "q", "title": "Is it?", "input": {"type": "polar"}}]},
+            },
+            "tutorial": {
+                "subjects": [
+                    {"source": " http://example.org/{} ".format(i), "page": "http://example.org", "assertions": {"q": {"expects": "yes"}}}
+                    for i in range(20)
+                ],
+            },
+        }
+
+    def tearDown(self):
+        self.loop.close()
+        shutil.rmtree(self.directory)
+
+    def run_future(self, future):
+        return self.loop.run_until_complete(future)
+
+    def test_formatted_set_matches_synchronous_formatting(self):
+        expected = format_configuration_set(copy.deepcopy(self.configuration_set))
+        formatter = AsyncFormatter(loop=self.loop)
+        try:
+            formatted = self.run_future(formatter.format_configuration_set(self.configuration_set, copy_on_write=True))
+        finally:
+            formatter.close()
+        self.assertEqual(formatted, expected)
+
+    def test_tutorial_subjects_are_formatted_by_the_shared_pool(self):
+        expected = format_configuration_set(copy.deepcopy(self.configuration_set))
+        formatter = AsyncFormatter(max_workers=2, tutorial_processes=2, tutorial_chunk_size=3, loop=self.loop)
+        pool = multiprocessing.Pool
+        try:
+            # No other pool may be created once the formatter's worker threads may be running.
+            multiprocessing.Pool = None
+            futures = [formatter.format_configuration_set(self.configuration_set, copy_on_write=True) for _ in range(2)]
+            formatted = self.run_future(asyncio.gather(*futures, loop=self.loop))
+        finally:
+            multiprocessing.Pool = pool
+            formatter.close()
+        self.assertEqual(formatted, [expected, expected])
+
+    def test_output_options_are_passed_to_the_serializer(self):
+        formatter = AsyncFormatter(loop=self.loop)
+        try:
+            configuration_set = {"project": self.configuration_set["project"]}
+            future = formatter.serialize_configuration_set(configuration_set, self.directory, sync=False, compress=True, gzip=True)
+            self.assertEqual(self.run_future(future), 2)
+        finally:
+            formatter.close()
+
+        with open(os.path.join(self.directory, "project.json"), "rb") as file:
+            self.assertEqual(file.read(), json.dumps(configuration_set["project"], separators=(",", ":")))
+        self.assertTrue(os.path.isfile(os.path.join(self.directory, "project.json.gz")))
+
+
+if __name__ == "__main__":
+    unittest.main()
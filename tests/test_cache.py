@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+#
+# This module is part of the GeoTag-X project formatter tool.
+# It contains tests for the cache of formatted projects.
+#
+# Author: Jeremy Othieno (j.othieno@gmail.com)
+#
+# Copyright (c) 2017 UNITAR/UNOSAT
+#
+# The MIT License (MIT)
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+from geotagx_formatter.cache import get_cache_key, is_cached, add_to_cache, evict
+import os, shutil, tempfile, unittest
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.project = tempfile.mkdtemp()
+        self.directory = os.path.join(tempfile.mkdtemp(), "cache")
+        self.write("project.json", '{"name": "Demo"}')
+
+    def tearDown(self):
+        shutil.rmtree(self.project)
+        shutil.rmtree(os.path.dirname(self.directory))
+
+    def write(self, basename, data):
+        with open(os.path.join(self.project, basename), "wb") as file:
+            file.write(data)
+
+    def test_key_is_stable(self):
+        self.assertEqual(get_cache_key(self.project), get_cache_key(self.project))
+
+    def test_key_depends_on_content(self):
+        key = get_cache_key(self.project)
+        self.write("project.json", '{"name": "Demo!"}')
+        self.assertNotEqual(get_cache_key(self.project), key)
+
+    def test_key_depends_on_missing_files(self):
+        key = get_cache_key(self.project)
+        self.write("tutorial.json", "")
+        self.assertNotEqual(get_cache_key(self.project), key)
+
+    def test_key_depends_on_salt(self):
+        self.assertNotEqual(get_cache_key(self.project, "compact"), get_cache_key(self.project))
+
+    def test_added_key_is_cached(self):
+        key = get_cache_key(self.project)
+        self.assertFalse(is_cached(key, self.directory))
+        add_to_cache(key, self.directory)
+        self.assertTrue(is_cached(key, self.directory))
+        self.assertFalse(is_cached(get_cache_key(self.project, "compact"), self.directory))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        for i, key in enumerate(("a", "b", "c")):
+            add_to_cache(key, self.directory)
+            os.utime(os.path.join(self.directory, key), (i, i))
+
+        self.assertTrue(is_cached("a", self.directory))
+        self.assertEqual(evict(self.directory, 2), 1)
+        self.assertEqual(sorted(os.listdir(self.directory)), ["a", "c"])
+        self.assertEqual(evict(self.directory, 2), 0)
+
+    def test_missing_cache_is_not_evicted(self):
+        self.assertEqual(evict(self.directory, 0), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
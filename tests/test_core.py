@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+#
+# This module is part of the GeoTag-X project formatter tool.
+# It contains tests for the formatting of configuration sets.
+#
+# Author: Jeremy Othieno (j.othieno@gmail.com)
+#
+# Copyright (c) 2017 UNITAR/UNOSAT
+#
+# The MIT License (MIT)
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+from geotagx_formatter.core import format_configuration_set, format_configuration_sets
+import copy, unittest
+
+class TestFormatConfigurationSets(unittest.TestCase):
+    def setUp(self):
+        self.configuration_sets = [
+            {
+                "project": {"name": " Project {} ".format(i), "short_name": "p{}".format(i), "description": " A demo "},
+                "task_presenter": {
+                    "language": {"default": "en", "available": ["en"]},
+                    "subject": {"type": "image"},
+                    "questionnaire": {"questions": [{"key": "q", "title": "Is it? {}".format(i), "input": {"type": "polar"}}]},
+                },
+                "tutorial": {
+                    "subjects": [{"source": " http://example.org/{} ".format(i), "page": "http://example.org", "assertions": {"q": {"expects": "yes"}}}],
+                },
+            }
+            for i in range(5)
+        ]
+
+    def expected(self):
+        return [format_configuration_set(copy.deepcopy(c)) for c in self.configuration_sets]
+
+    def test_results_match_each_set_formatted_alone(self):
+        expected = self.expected()
+        for processes in (1, 2):
+            results = list(format_configuration_sets(copy.deepcopy(self.configuration_sets), processes=processes))
+            self.assertEqual(results, [(c, None) for c in expected])
+
+    def test_configuration_sets_are_read_lazily(self):
+        read = []
+
+        def configuration_sets():
+            for configuration_set in self.configuration_sets:
+                read.append(configuration_set)
+                yield configuration_set
+
+        results = format_configuration_sets(configuration_sets())
+        self.assertEqual(read, [])
+        next(results)
+        self.assertEqual(len(read), 1)
+
+    def test_invalid_set_does_not_prevent_others_from_being_formatted(self):
+        expected = self.expected()
+        for processes in (1, 2):
+            configuration_sets = copy.deepcopy(self.configuration_sets)
+            configuration_sets[2] = "not a configuration set"
+            results = list(format_configuration_sets(configuration_sets, processes=processes))
+            self.assertEqual(len(results), 5)
+            self.assertIsNone(results[2][0])
+            self.assertIsInstance(results[2][1], TypeError)
+            for i in (0, 1, 3, 4):
+                self.assertEqual(results[i], (expected[i], None))
+
+    def test_invalid_arguments(self):
+        self.assertRaises(TypeError, format_configuration_sets, [], processes="2")
+        self.assertRaises(TypeError, format_configuration_sets, [], validate_configuration_sets=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
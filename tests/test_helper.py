@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+#
+# This module is part of the GeoTag-X project formatter tool.
+# It contains tests for the helper functions that serialize configurations, write them
+# to files and normalize strings.
+#
+# Author: Jeremy Othieno (j.othieno@gmail.com)
+#
+# Copyright (c) 2017 UNITAR/UNOSAT
+#
+# The MIT License (MIT)
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+from geotagx_formatter.helper import write_file, file_contains, sync_directories, iter_json_string
+from geotagx_formatter.helper import write_configuration_file, find_stale_files
+from geotagx_formatter.helper import normalize_configuration_string, get_cache_statistics, clear_caches, _interning
+from gzip import GzipFile
+import json, os, shutil, tempfile, unittest
+
+class TestWriteFile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "configuration.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self):
+        with open(self.filename, "rb") as file:
+            return file.read()
+
+    def write(self, data):
+        with open(self.filename, "wb") as file:
+            file.write(data)
+
+    def test_writes_new_file(self):
+        self.assertTrue(write_file(self.filename, "abc"))
+        self.assertEqual(self.read(), "abc")
+
+    def test_writes_chunks(self):
+        self.assertTrue(write_file(self.filename, iter(["ab", "", "cd"]), sync=False))
+        self.assertEqual(self.read(), "abcd")
+
+    def age(self):
+        os.utime(self.filename, (0, 0))
+
+    def test_unchanged_file_is_untouched(self):
+        for data in ("abcd", iter(["a", "bc", "d"])):
+            self.write("abcd")
+            self.age()
+            self.assertFalse(write_file(self.filename, data))
+            self.assertEqual(os.path.getmtime(self.filename), 0)
+
+    def test_changed_file_is_replaced(self):
+        for chunks in (["ab", "cX"], ["X", "bcd"], ["ab"], ["ab", "cd", "e"]):
+            self.write("abcd")
+            self.assertTrue(write_file(self.filename, iter(chunks)))
+            self.assertEqual(self.read(), "".join(chunks))
+
+    def test_file_that_deserializes_to_value_is_untouched(self):
+        self.write('{"b": 1, "a": 2}')
+        self.age()
+        value = {"a": 2, "b": 1}
+        self.assertFalse(write_file(self.filename, iter(['{"a": 2, ', '"b": 1}']), value))
+        self.assertEqual(os.path.getmtime(self.filename), 0)
+        self.assertTrue(write_file(self.filename, iter(['{"a": 2, ', '"b": 1}'])))
+        self.assertEqual(self.read(), '{"a": 2, "b": 1}')
+
+    def test_file_contains(self):
+        self.write("abcd")
+        self.assertTrue(file_contains(self.filename, "abcd"))
+        self.assertTrue(file_contains(self.filename, iter(["ab", "cd"])))
+        self.assertFalse(file_contains(self.filename, iter(["ab", "c"])))
+        self.assertFalse(file_contains(self.filename + ".missing", "abcd"))
+
+    def test_permissions_are_preserved(self):
+        self.write("abcd")
+        os.chmod(self.filename, 0o640)
+        write_file(self.filename, "efgh")
+        self.assertEqual(os.stat(self.filename).st_mode & 0o777, 0o640)
+
+    def test_failed_write_leaves_file_untouched(self):
+        def chunks():
+            yield "ab"
+            raise RuntimeError()
+
+        self.write("abcd")
+        self.assertRaises(RuntimeError, write_file, self.filename, chunks())
+        self.assertEqual(self.read(), "abcd")
+        self.assertEqual(os.listdir(self.directory), ["configuration.json"])
+
+    def test_no_temporary_file_is_left(self):
+        self.write("abcd")
+        write_file(self.filename, iter(["efgh"]))
+        write_file(self.filename, "ijkl", sync=False)
+        self.assertEqual(os.listdir(self.directory), ["configuration.json"])
+
+
+class TestSyncDirectories(unittest.TestCase):
+    def test_each_directory_is_flushed_once(self):
+        directory = tempfile.mkdtemp()
+        try:
+            self.assertEqual(sync_directories([directory, directory + os.sep, tempfile.gettempdir()]), 2)
+            self.assertEqual(sync_directories([]), 0)
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestIterJsonString(unittest.TestCase):
+    def setUp(self):
+        self.configuration = {
+            "name": u"Caf\xe9",
+            "description": "A line\nand a \"quote\"",
+            "empty": {},
+            "nothing": [],
+            "items": [{"key": i, "values": [True, None, 1.5, {"label": {"en": "Yes"}}]} for i in range(100)],
+        }
+
+    def test_chunks_match_the_indented_json_string(self):
+        expected = json.dumps(
+            self.configuration, indent=4, separators=(",", ": "), ensure_ascii=False
+        ).encode("utf-8")
+        self.assertEqual("".join(iter_json_string(self.configuration)), expected)
+
+    def test_compressed_chunks_match_the_compact_json_string(self):
+        expected = json.dumps(self.configuration, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        self.assertEqual("".join(iter_json_string(self.configuration, True)), expected)
+
+    def test_compressed_string_has_no_whitespace(self):
+        string = "".join(iter_json_string(self.configuration, True))
+        self.assertNotIn("\n", string)
+        self.assertNotIn(": ", string)
+        self.assertNotIn(", ", string)
+
+    def test_chunks_are_strings(self):
+        for compress in (False, True):
+            for chunk in iter_json_string(self.configuration, compress):
+                self.assertIsInstance(chunk, str)
+
+    def test_empty_dictionary(self):
+        for compress in (False, True):
+            self.assertEqual("".join(iter_json_string({}, compress)), "{}")
+
+    def test_invalid_arguments(self):
+        self.assertRaises(TypeError, iter_json_string, [])
+        self.assertRaises(TypeError, iter_json_string, {}, 1)
+
+
+class TestGzipCopy(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "project.json")
+        self.chunks = ['{"name": ', '"Project"', "}"]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, filename):
+        with open(filename, "rb") as file:
+            return file.read()
+
+    def test_copy_decompresses_to_the_file(self):
+        written = write_configuration_file(self.filename, iter(self.chunks), gzip=True)
+        self.assertEqual(written, [self.filename, self.filename + ".gz"])
+        with GzipFile(self.filename + ".gz", "rb") as file:
+            self.assertEqual(file.read(), "".join(self.chunks))
+
+    def test_copy_is_reproducible(self):
+        write_configuration_file(self.filename, iter(self.chunks), gzip=True)
+        compressed = self.read(self.filename + ".gz")
+        os.remove(self.filename + ".gz")
+        write_configuration_file(self.filename, iter(self.chunks), gzip=True)
+        self.assertEqual(self.read(self.filename + ".gz"), compressed)
+
+    def test_unchanged_files_are_untouched(self):
+        write_configuration_file(self.filename, iter(self.chunks), gzip=True)
+        self.assertEqual(write_configuration_file(self.filename, iter(self.chunks), gzip=True), [])
+        self.assertEqual(find_stale_files(self.filename, iter(self.chunks), gzip=True), [])
+
+    def test_stale_copy_is_found_and_rewritten(self):
+        write_configuration_file(self.filename, iter(self.chunks), gzip=True)
+        with open(self.filename + ".gz", "wb") as file:
+            file.write("stale")
+        self.assertEqual(find_stale_files(self.filename, iter(self.chunks), gzip=True), [self.filename + ".gz"])
+        self.assertEqual(write_configuration_file(self.filename, iter(self.chunks), gzip=True), [self.filename + ".gz"])
+
+    def test_copy_of_a_changed_file_is_stale(self):
+        write_configuration_file(self.filename, iter(self.chunks), gzip=True)
+        changed = ['{"name": "Other"}']
+        self.assertEqual(find_stale_files(self.filename, iter(changed), gzip=True), [self.filename, self.filename + ".gz"])
+        self.assertEqual(self.read(self.filename), "".join(self.chunks))
+
+
+class TestCaches(unittest.TestCase):
+    def setUp(self):
+        clear_caches()
+
+    def tearDown(self):
+        clear_caches()
+
+    def normalize(self, *strings):
+        with _interning():
+            for string in strings:
+                normalize_configuration_string(string, "en")
+        return get_cache_statistics()
+
+    def test_caches_are_discarded_after_each_call(self):
+        first = self.normalize("Yes", "No", "Yes")
+        second = self.normalize("Yes", "No", "Yes")
+        for name in ("language_code", "configuration_string", "normalized_string"):
+            self.assertEqual(second[name]["misses"], 2 * first[name]["misses"])
+            self.assertEqual(second[name]["hits"], 2 * first[name]["hits"])
+        self.assertEqual(second["normalized_string"], {"hits": 2, "misses": 4, "peak_size": 2})
+
+    def test_normalized_strings_with_one_translation_are_cached(self):
+        statistics = self.normalize({"en": "Yes"}, {"en": "Yes"}, {"en": "Yes", "fr": "Oui"})
+        self.assertEqual(statistics["configuration_string"], {"hits": 1, "misses": 1, "peak_size": 1})
+
+    def test_nothing_is_cached_outside_a_call(self):
+        normalize_configuration_string("Yes", "en")
+        for statistics in get_cache_statistics().itervalues():
+            self.assertEqual(statistics, {"hits": 0, "misses": 0, "peak_size": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
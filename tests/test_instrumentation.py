@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+#
+# This module is part of the GeoTag-X project formatter tool.
+# It contains tests for the instrumentation of the formatter.
+#
+# Author: Jeremy Othieno (j.othieno@gmail.com)
+#
+# Copyright (c) 2017 UNITAR/UNOSAT
+#
+# The MIT License (MIT)
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+from geotagx_formatter.instrumentation import Recorder, count, get_recorder, set_recorder, stage, stage_iterator
+from geotagx_formatter import instrumentation
+import threading, unittest
+
+class TestRecorder(unittest.TestCase):
+    def setUp(self):
+        self.previous = set_recorder(None)
+
+    def tearDown(self):
+        set_recorder(self.previous)
+
+    def test_measurements_are_discarded_without_recorder(self):
+        count("questions")
+        self.assertIsNone(get_recorder())
+
+    def test_each_thread_has_its_own_recorder(self):
+        recorder = Recorder()
+        set_recorder(recorder)
+        recorders = {}
+
+        def work(name):
+            own = recorders[name] = Recorder()
+            set_recorder(own)
+            count("questions", 2)
+            barrier.wait()
+            count("questions", 3)
+            set_recorder(None)
+
+        # Both threads hold a recorder while the other one measures.
+        barrier = _Barrier(2)
+        threads = [threading.Thread(target=work, args=(name,)) for name in ("first", "second")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        count("questions")
+        self.assertIs(get_recorder(), recorder)
+        self.assertEqual(recorder.counters, {"questions": 1})
+        for name in ("first", "second"):
+            self.assertEqual(recorders[name].counters, {"questions": 5})
+
+
+class TestStages(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.time_module, instrumentation.time = instrumentation.time, self
+        self.recorder = Recorder()
+        self.previous = set_recorder(self.recorder)
+
+    def tearDown(self):
+        set_recorder(self.previous)
+        instrumentation.time = self.time_module
+
+    def time(self):
+        return self.now
+
+    def test_nested_stage_is_not_counted_in_enclosing_stage(self):
+        with stage("serialize"):
+            self.now += 1
+            with stage("format"):
+                self.now += 2
+            self.now += 4
+        self.assertEqual(self.recorder.stages, {"serialize": 5, "format": 2})
+
+    def test_items_are_produced_in_their_own_stage(self):
+        def produce():
+            for item in range(3):
+                self.now += 2
+                yield item
+
+        with stage("serialize"):
+            for item in stage_iterator("format", produce()):
+                self.now += 1
+        self.assertEqual(self.recorder.stages, {"serialize": 3, "format": 6})
+
+    def test_items_are_unchanged_without_recorder(self):
+        set_recorder(None)
+        self.assertEqual(list(stage_iterator("format", range(3))), [0, 1, 2])
+
+
+class _Barrier(object):
+    """A barrier that a number of threads wait at until all of them have reached it."""
+
+    def __init__(self, parties):
+        self.parties = parties
+        self.condition = threading.Condition()
+
+    def wait(self):
+        with self.condition:
+            self.parties -= 1
+            if self.parties:
+                while self.parties:
+                    self.condition.wait(10)
+            else:
+                self.condition.notify_all()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+#
+# This module is part of the GeoTag-X project formatter tool.
+# It contains tests for the command-line tool.
+#
+# Author: Jeremy Othieno (j.othieno@gmail.com)
+#
+# Copyright (c) 2017 UNITAR/UNOSAT
+#
+# The MIT License (MIT)
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+from geotagx_formatter.__main__ import get_argparser, run
+from StringIO import StringIO
+import json, os, shutil, subprocess, sys, tempfile, unittest
+
+class TestCheck(unittest.TestCase):
+    def setUp(self):
+        self.project = tempfile.mkdtemp()
+        self.filename = os.path.join(self.project, "project.json")
+        with open(self.filename, "wb") as file:
+            file.write('{"name": " Demo ", "short_name": "demo", "description": " A demo ", "repository": "https://example.org"}')
+
+    def tearDown(self):
+        shutil.rmtree(self.project)
+
+    def run_tool(self, *arguments):
+        stdout, sys.stdout = sys.stdout, StringIO()
+        try:
+            exit_code = run(get_argparser().parse_args(["--no-cache", "--no-daemon"] + list(arguments) + [self.project]))
+            return exit_code, sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+
+    def read(self):
+        with open(self.filename, "rb") as file:
+            return file.read()
+
+    def test_unformatted_project_fails_and_is_not_written(self):
+        data = self.read()
+        exit_code, output = self.run_tool("--check")
+        self.assertEqual(exit_code, 1)
+        self.assertIn("is not formatted", output)
+        self.assertIn(self.filename, output)
+        self.assertEqual(self.read(), data)
+        self.assertEqual(os.listdir(self.project), ["project.json"])
+
+    def test_formatted_project_passes(self):
+        self.assertEqual(self.run_tool()[0], 0)
+        data = self.read()
+        self.assertEqual(self.run_tool("--check"), (0, "The project located at '{}' is already formatted.\n".format(self.project)))
+        self.assertEqual(self.read(), data)
+
+    def test_output_options_are_checked(self):
+        self.run_tool()
+        self.assertEqual(self.run_tool("--check", "--compact")[0], 1)
+        exit_code, output = self.run_tool("--check", "--gzip")
+        self.assertEqual(exit_code, 1)
+        self.assertIn(self.filename + ".gz", output)
+
+    def test_differences_are_summarized(self):
+        exit_code, output = self.run_tool("--check", "--diff")
+        self.assertEqual(exit_code, 1)
+        self.assertIn("{}: ".format(self.filename), output)
+
+    def test_check_cannot_watch(self):
+        self.assertEqual(self.run_tool("--check", "--watch")[0], 1)
+
+
+class TestStatistics(unittest.TestCase):
+    def setUp(self):
+        self.project = tempfile.mkdtemp()
+        with open(os.path.join(self.project, "project.json"), "wb") as file:
+            file.write('{"name": "Demo", "short_name": "demo", "description": "A demo", "repository": "https://example.org"}')
+
+    def tearDown(self):
+        shutil.rmtree(self.project)
+
+    def run_tool(self, *arguments):
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = StringIO(), StringIO()
+        try:
+            run(get_argparser().parse_args(["--no-cache", "--no-daemon"] + list(arguments) + [self.project]))
+            return sys.stdout.getvalue(), sys.stderr.getvalue()
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+
+    def test_standard_output_only_contains_statistics(self):
+        output, messages = self.run_tool("--stats", "-")
+        records = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual([(r["path"], r["status"]) for r in records], [(self.project, "formatted")])
+        self.assertIn("The project located at '{}'".format(self.project), messages)
+
+    def test_statistics_are_appended_to_file(self):
+        filename = os.path.join(self.project, "statistics.jsonl")
+        for _ in range(2):
+            output, _ = self.run_tool("--stats", filename)
+            self.assertIn("The project located at '{}'".format(self.project), output)
+
+        with open(filename) as file:
+            self.assertEqual(len(file.readlines()), 2)
+
+    def test_streamed_tutorial_is_formatted_and_written_in_separate_stages(self):
+        with open(os.path.join(self.project, "task_presenter.json"), "wb") as file:
+            file.write('{"language": {"default": "en", "available": ["en"]}, "subject": {"type": "image"}, "questionnaire": {"questions": [{"key": "q", "title": "Is it?", "input": {"type": "polar"}}]}}')
+        with open(os.path.join(self.project, "tutorial.json"), "wb") as file:
+            file.write('{"subjects": [{"source": "http://example.org", "page": "http://example.org", "assertions": {"q": {"expects": "yes"}}}]}')
+
+        output, _ = self.run_tool("--stream-tutorial", "--stats", "-")
+        stages = json.loads(output)["stages"]
+        self.assertIn("format.tutorial", stages)
+        self.assertIn("serialize", stages)
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.project = tempfile.mkdtemp()
+        self.cache_directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.project, "project.json")
+        with open(self.filename, "wb") as file:
+            file.write('{"name": "Demo", "short_name": "demo", "description": "A demo", "repository": "https://example.org"}')
+
+        self.environment = dict(os.environ)
+        os.environ["XDG_CACHE_HOME"] = self.cache_directory
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environment)
+        shutil.rmtree(self.project)
+        shutil.rmtree(self.cache_directory)
+
+    def run_tool(self, *arguments):
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = StringIO(), StringIO()
+        try:
+            arguments = ["--no-daemon", "--stats", "-"] + list(arguments)
+            run(get_argparser().parse_args(arguments + [self.project]))
+            return json.loads(sys.stdout.getvalue())["status"]
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+
+    def test_projects_are_not_cached_by_default(self):
+        self.assertEqual(self.run_tool(), "formatted")
+        self.assertEqual(self.run_tool(), "formatted")
+        self.assertEqual(os.listdir(self.cache_directory), [])
+
+    def test_unchanged_project_is_skipped(self):
+        self.assertEqual(self.run_tool("--cache"), "formatted")
+        self.assertEqual(self.run_tool("--cache"), "cached")
+        self.assertEqual(self.run_tool("--cache", "--no-cache"), "formatted")
+        self.assertEqual(os.listdir(self.cache_directory), ["geotagx-formatter"])
+
+    def test_cache_directory_turns_the_cache_on(self):
+        directory = os.path.join(self.cache_directory, "projects")
+        self.assertEqual(self.run_tool("--cache-dir", directory), "formatted")
+        self.assertEqual(self.run_tool("--cache-dir", directory), "cached")
+
+    def test_project_whose_copies_were_removed_is_formatted_again(self):
+        self.assertEqual(self.run_tool("--cache", "--gzip"), "formatted")
+        self.assertEqual(self.run_tool("--cache", "--gzip"), "cached")
+        os.remove(self.filename + ".gz")
+        self.assertEqual(self.run_tool("--cache", "--gzip"), "formatted")
+        self.assertTrue(os.path.isfile(self.filename + ".gz"))
+
+
+class TestStartup(unittest.TestCase):
+    BUDGET = 0.25
+    """The number of seconds the tool may take to import its entry point and build
+    its argument parser, which is several times what it takes on a developer's machine."""
+
+    def start(self):
+        # The tool is started in a new interpreter, which has not loaded any of its modules yet.
+        script = (
+            "import sys, time\n"
+            "start = time.time()\n"
+            "from geotagx_formatter.__main__ import get_argparser\n"
+            "get_argparser()\n"
+            "print time.time() - start\n"
+            "print ' '.join(sorted(m for m, module in sys.modules.items() if module and m.startswith('geotagx')))\n"
+        )
+        output = subprocess.check_output([sys.executable, "-c", script], cwd=tempfile.gettempdir())
+        duration, modules = output.split("\n", 1)
+        return float(duration), set(modules.split())
+
+    def test_startup_is_within_budget(self):
+        # The fastest of a few starts is measured, which is the least affected by the machine's load.
+        duration = min(self.start()[0] for _ in range(3))
+        self.assertLess(duration, TestStartup.BUDGET)
+
+    def test_formatter_is_not_loaded_at_startup(self):
+        modules = self.start()[1]
+        self.assertNotIn("geotagx_validator", modules)
+        self.assertFalse(modules & set(["geotagx_formatter.core", "geotagx_formatter.helper", "geotagx_formatter.tutorial"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+#
+# This module is part of the GeoTag-X project formatter tool.
+# It contains tests for the formatting of question configurations.
+#
+# Author: Jeremy Othieno (j.othieno@gmail.com)
+#
+# Copyright (c) 2017 UNITAR/UNOSAT
+#
+# The MIT License (MIT)
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+from geotagx_formatter.helper import normalize_configuration_string, _normalize_configuration_strings
+from geotagx_formatter.question import format_question
+from geotagx_formatter.task_presenter import format_task_presenter_configuration, format_task_presenter_questionnaire
+import copy, json, unittest
+
+class TestCopyOnWrite(unittest.TestCase):
+    def setUp(self):
+        shared = [{"value": "s", "label": "shared"}]
+        self.configuration = {
+            "language": {"default": "en", "available": ["en"]},
+            "subject": {"type": "image"},
+            "questionnaire": {
+                "questions": [{
+                    "key": "q",
+                    "title": "  Title  ",
+                    "input": {
+                        "type": "dropdown-list",
+                        "options": [
+                            {"label": "a", "options": shared},
+                            {"label": "b", "options": [{"label": "c", "options": shared}]},
+                        ],
+                    },
+                }],
+            },
+        }
+
+    def format(self, configuration, copy_on_write):
+        return format_task_presenter_configuration(configuration, validate_configuration=False, copy_on_write=copy_on_write)
+
+    def test_input_is_unchanged(self):
+        original = copy.deepcopy(self.configuration)
+        self.format(self.configuration, True)
+        self.assertEqual(self.configuration, original)
+
+    def test_output_matches_in_place_output(self):
+        expected = self.format(copy.deepcopy(self.configuration), False)
+        formatted = self.format(self.configuration, True)
+        self.assertEqual(json.dumps(formatted, sort_keys=True), json.dumps(expected, sort_keys=True))
+
+    def test_shared_options_are_formatted_at_every_depth(self):
+        formatted = self.format(self.configuration, True)
+        options = formatted["questionnaire"]["questions"][0]["input"]["options"]
+        shallow, deep = options[0]["options"], options[1]["options"][0]["options"]
+        self.assertIs(shallow, deep)
+        self.assertEqual(deep[0]["label"], {"en": "shared"})
+
+    def test_formatted_configuration_is_not_copied(self):
+        formatted = self.format(self.configuration, True)
+        self.assertIs(self.format(formatted, True), formatted)
+
+
+class TestInterning(unittest.TestCase):
+    def setUp(self):
+        self.language = {"default": "en", "available": ["en", "fr"]}
+        self.questions = [
+            {"key": "q{}".format(i), "title": "Is it?", "input": {"type": "polar"}}
+            for i in range(3)
+        ]
+
+    def test_identical_strings_share_their_content(self):
+        questionnaire = format_task_presenter_questionnaire({"questions": self.questions}, self.language, False)
+        titles = [q["title"] for q in questionnaire["questions"]]
+        self.assertEqual(titles, [{"en": "Is it?"}] * 3)
+        for title in titles[1:]:
+            self.assertIs(title.values()[0], titles[0].values()[0])
+            self.assertIs(title.keys()[0], titles[0].keys()[0])
+
+    def test_modifying_a_string_does_not_affect_others(self):
+        configuration = {"language": self.language, "subject": {"type": "image"}, "questionnaire": {"questions": self.questions}}
+        questions = format_task_presenter_configuration(configuration, validate_configuration=False)["questionnaire"]["questions"]
+        questions[0]["title"]["fr"] = "Est-ce ?"
+        self.assertEqual(questions[1]["title"], {"en": "Is it?"})
+        self.assertEqual(questions[2]["title"], {"en": "Is it?"})
+
+    def test_strings_are_not_shared_across_calls(self):
+        first = format_question(dict(self.questions[0]), self.language, False)
+        second = format_question(dict(self.questions[1]), self.language, False)
+        first["title"]["fr"] = "Est-ce ?"
+        self.assertEqual(second["title"], {"en": "Is it?"})
+
+
+class TestOptionMemoization(unittest.TestCase):
+    def setUp(self):
+        regions = [{"label": "Region {}".format(i), "value": "r{}".format(i)} for i in range(4)]
+        groups = [{"label": "North", "options": regions[:2]}, {"label": "South", "options": regions[2:]}]
+        # Each question is serialized separately so that no list is shared once they are loaded.
+        self.questions = [
+            json.dumps({"key": "q{}".format(i), "title": "Where?", "input": {"type": "dropdown-list", "options": groups}})
+            for i in range(3)
+        ]
+        self.questions.append(json.dumps({
+            "key": "other",
+            "title": "Where?",
+            "input": {"type": "dropdown-list", "options": [{"label": "Elsewhere", "value": "e"}]},
+        }))
+
+    def format(self, copy_on_write):
+        configuration = {
+            "language": {"default": "en", "available": ["en"]},
+            "subject": {"type": "image"},
+            "questionnaire": {"questions": [json.loads(question) for question in self.questions]},
+        }
+        formatted = format_task_presenter_configuration(configuration, validate_configuration=False, copy_on_write=copy_on_write)
+        return [question["input"]["options"] for question in formatted["questionnaire"]["questions"]]
+
+    def test_identical_options_are_formatted_once(self):
+        for copy_on_write in (False, True):
+            options = self.format(copy_on_write)
+            self.assertIs(options[1], options[0])
+            self.assertIs(options[2], options[0])
+            self.assertIsNot(options[3], options[0])
+            self.assertEqual(options[0][1]["options"][0]["label"], {"en": "Region 2"})
+
+    def test_output_matches_unmemoized_output(self):
+        language = {"default": "en", "available": ["en"]}
+        expected = [format_question(json.loads(question), language, False)["input"]["options"] for question in self.questions]
+        for copy_on_write in (False, True):
+            self.assertEqual(self.format(copy_on_write), expected)
+
+    def test_normalized_labels_are_memoized(self):
+        options = [{"label": {"en": "Yes"}, "value": "y"}]
+        self.questions = [
+            json.dumps({"key": "q{}".format(i), "title": "Is it?", "input": {"type": "dropdown-list", "options": options}})
+            for i in range(2)
+        ]
+        options = self.format(False)
+        self.assertIs(options[1], options[0])
+
+
+class TestNormalizeConfigurationStrings(unittest.TestCase):
+    def test_batch_matches_each_string(self):
+        strings = ["Yes", {"fr": "Non"}, "Yes"]
+        expected = [normalize_configuration_string(string, "en") for string in strings]
+        self.assertEqual(_normalize_configuration_strings(strings, "en"), expected)
+
+    def test_invalid_strings_are_rejected(self):
+        self.assertRaises(ValueError, _normalize_configuration_strings, ["Yes", ""], "en")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+#
+# This module is part of the GeoTag-X project formatter tool.
+# It contains tests for the server that the daemon listens with.
+#
+# Author: Jeremy Othieno (j.othieno@gmail.com)
+#
+# Copyright (c) 2017 UNITAR/UNOSAT
+#
+# The MIT License (MIT)
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+from geotagx_formatter.server import serve, send_request, is_running
+import os, shutil, socket, subprocess, sys, tempfile, time, unittest
+
+class TestServe(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.address = os.path.join(self.directory, "server.sock")
+        self.process = None
+
+    def tearDown(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+        shutil.rmtree(self.directory)
+
+    def start(self):
+        # The server installs a signal handler, so it runs in a process of its own.
+        script = (
+            "import sys\n"
+            "from geotagx_formatter.server import serve\n"
+            "serve(sys.argv[1], lambda request: {'echo': request})\n"
+        )
+        self.process = subprocess.Popen([sys.executable, "-c", script, self.address], cwd=tempfile.gettempdir())
+        for _ in range(200):
+            if is_running(self.address):
+                return
+            time.sleep(0.025)
+        self.fail("The server did not start.")
+
+    def test_file_that_is_not_a_socket_is_untouched(self):
+        with open(self.address, "wb") as file:
+            file.write("data")
+        self.assertRaises(socket.error, serve, self.address, lambda request: request)
+        with open(self.address, "rb") as file:
+            self.assertEqual(file.read(), "data")
+
+    def test_stale_socket_is_replaced(self):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.address)
+        stale.close()
+        self.start()
+        self.assertEqual(send_request(self.address, {"a": 1}, timeout=10), {"echo": {"a": 1}})
+
+    def test_running_server_is_not_replaced(self):
+        self.start()
+        self.assertRaises(socket.error, serve, self.address, lambda request: request)
+        self.assertTrue(is_running(self.address))
+
+
+if __name__ == "__main__":
+    unittest.main()
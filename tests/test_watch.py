@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+#
+# This module is part of the GeoTag-X project formatter tool.
+# It contains tests for the monitoring of project files.
+#
+# Author: Jeremy Othieno (j.othieno@gmail.com)
+#
+# Copyright (c) 2017 UNITAR/UNOSAT
+#
+# The MIT License (MIT)
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+# DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+# OR OTHER DEALINGS IN THE SOFTWARE.
+from geotagx_formatter.helper import get_configuration_filenames
+from geotagx_formatter.watch import watch
+import unittest
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.path = "/path/to/project"
+        self.filenames = get_configuration_filenames(self.path)
+        self.states = {"project": 1, "task_presenter": 1, "tutorial": None}
+        self.polls = 0
+        self.calls = []
+
+    def snapshot(self, path):
+        # The project's configuration is saved once the initial snapshot has been taken.
+        self.polls += 1
+        if self.polls == 2:
+            self.states["project"] += 1
+        return dict(self.states)
+
+    def watch(self, callback):
+        def record(path, keys):
+            self.calls.append((path, keys))
+            return callback()
+
+        watch([self.path], record, debounce=0, interval=0, iterations=10, snapshot_function=self.snapshot)
+
+    def test_changes_are_reported_once(self):
+        self.watch(lambda: None)
+        self.assertEqual(self.calls, [(self.path, set(["project"]))])
+
+    def test_files_written_by_the_callback_are_not_reported(self):
+        def callback():
+            self.states["project"] += 1
+            self.states["tutorial"] = 1
+            return [self.filenames["project"], self.filenames["project"] + ".gz", self.filenames["tutorial"]]
+
+        self.watch(callback)
+        self.assertEqual(self.calls, [(self.path, set(["project"]))])
+
+    def test_changes_saved_during_callback_are_reported(self):
+        def callback():
+            self.states["project"] += 1
+            if len(self.calls) == 1:
+                self.states["task_presenter"] += 1
+            return [self.filenames["project"]]
+
+        self.watch(callback)
+        self.assertEqual(self.calls, [(self.path, set(["project"])), (self.path, set(["task_presenter"]))])
+
+    def test_invalid_snapshot_function(self):
+        self.assertRaises(TypeError, watch, [self.path], lambda path, keys: None, snapshot_function=1)
+
+
+if __name__ == "__main__":
+    unittest.main()